@@ -0,0 +1,81 @@
+"""Benchmark decoding and encoding a long sample: per-field conversion loops vs. compiled record codecs.
+
+Run with:
+    python benchmarks/codec_benchmark.py --n-timesteps 5000
+"""
+
+import argparse
+import datetime
+import timeit
+from typing import Any, Dict, List
+
+from tempor.clinic import field_def
+
+FIELD_DEFS_RAW = {
+    "static": {
+        "age": {"data_type": "int", "readable_name": "Age"},
+        "sex": {"data_type": "categorical", "readable_name": "Sex", "options": ["female", "male"]},
+        "date_of_birth": {"data_type": "date", "readable_name": "Date of birth"},
+    },
+    "temporal": {
+        "time_index": {"data_type": "date", "readable_name": "Date", "is_time_index": True},
+        **{f"vital_{i}": {"data_type": "float", "readable_name": f"Vital {i}"} for i in range(8)},
+        **{f"count_{i}": {"data_type": "int", "readable_name": f"Count {i}"} for i in range(4)},
+        "smoker": {"data_type": "binary", "readable_name": "Smoker"},
+        "note": {"data_type": "str", "readable_name": "Note"},
+    },
+}
+
+
+def make_raw_sample(n_timesteps: int) -> Dict[str, Any]:
+    start = datetime.date(2000, 1, 1)
+    temporal = [
+        {
+            "time_index": (start + datetime.timedelta(days=t)).strftime("%Y-%m-%d"),
+            **{f"vital_{i}": 60.0 + (t * i) % 40 for i in range(8)},
+            **{f"count_{i}": (t + i) % 7 for i in range(4)},
+            "smoker": t % 2 == 0,
+            "note": "",
+        }
+        for t in range(n_timesteps)
+    ]
+    return {"static": {"age": 50, "sex": "male", "date_of_birth": "1970-01-01"}, "temporal": temporal, "event": []}
+
+
+def decode_per_field(raw: Dict[str, Any], field_defs: field_def.FieldDefsCollection) -> List[Dict]:
+    # The conversion as done before the codecs: sort the fields, then convert them value by value.
+    temporal = [{key: x[key] for key in field_defs.temporal.keys()} for x in raw["temporal"]]
+    return [field_def.process_db_to_input(field_defs=field_defs.temporal, data=x) for x in temporal]
+
+
+def encode_per_field(records: List[Dict], field_defs: field_def.FieldDefsCollection) -> List[Dict]:
+    return [field_def.process_input_to_db(field_defs=field_defs.temporal, data=x) for x in records]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--n-timesteps", type=int, default=5000)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    field_defs = field_def.parse_field_defs(FIELD_DEFS_RAW)
+    codec = field_def.get_codecs(field_defs).temporal
+    raw = make_raw_sample(args.n_timesteps)
+    decoded = codec.decode_many(raw["temporal"])
+    assert decoded == decode_per_field(raw, field_defs)
+    assert codec.encode_many(decoded) == encode_per_field(decoded, field_defs)
+
+    cases = {
+        "decode, per field": lambda: decode_per_field(raw, field_defs),
+        "decode, codec": lambda: codec.decode_many(raw["temporal"]),
+        "encode, per field": lambda: encode_per_field(decoded, field_defs),
+        "encode, codec": lambda: codec.encode_many(decoded),
+    }
+    print(f"{args.n_timesteps} time-steps, best of {args.repeats}:")
+    for name, fn in cases.items():
+        best = min(timeit.repeat(fn, number=1, repeat=args.repeats))
+        print(f"  {name:<20} {best * 1000:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
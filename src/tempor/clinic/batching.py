@@ -0,0 +1,169 @@
+import concurrent.futures
+import queue
+import threading
+import time
+from typing import Any, Dict, Hashable, List, NamedTuple, Optional, Tuple
+
+import pandas as pd
+from loguru import logger
+from typing_extensions import Protocol
+
+from . import predictions
+from .const import DEFAULTS, DataSample
+
+
+class BatchedRiskPredictionCallback(Protocol):
+    def __call__(
+        self,
+        data_samples: List[DataSample],
+        time_max: Any,
+        time_resolution: Any,
+        **kwargs,
+    ) -> List[pd.DataFrame]:
+        ...
+
+
+_CLOSE = object()
+
+
+class _Request(NamedTuple):
+    data_sample: DataSample
+    future: "concurrent.futures.Future[pd.DataFrame]"
+
+
+class _Batch(NamedTuple):
+    args: Tuple[Any, Any, Dict[str, Any]]  # `time_max`, `time_resolution`, `kwargs`.
+    requests: List[_Request]
+    deadline: float
+
+
+class MicroBatchScheduler:
+    """Groups the risk prediction requests of all sessions into batches for a batched callback.
+
+    The scheduler is itself a `components.RiskPredictionCallback`: each call queues its sample and blocks until the
+    result is back. Requests with the same ``time_max``, ``time_resolution`` and ``kwargs`` are batched together. A
+    batch is sent to ``batch_callback`` once it has ``max_batch_size`` samples, or ``max_wait_ms`` after its first
+    request, whichever comes first. Batches are run one at a time by a dispatcher thread. If the dispatcher thread
+    stops (e.g. on a `BaseException` of the callback), the requests still waiting fail.
+
+    Args:
+        batch_callback (BatchedRiskPredictionCallback): Makes the predictions for a list of samples, in order.
+        max_batch_size (int, optional): The maximum number of samples in a batch.
+        max_wait_ms (float, optional): The maximum time a request waits for others to join its batch.
+        timeout (Optional[float], optional): Seconds a call waits for its result, `None` to wait indefinitely.
+    """
+
+    def __init__(
+        self,
+        batch_callback: BatchedRiskPredictionCallback,
+        max_batch_size: int = DEFAULTS.batch_max_size,
+        max_wait_ms: float = DEFAULTS.batch_max_wait_ms,
+        timeout: Optional[float] = DEFAULTS.batch_timeout,
+    ) -> None:
+        self.__name__ = getattr(batch_callback, "__name__", type(self).__name__)
+        self.__doc__ = getattr(batch_callback, "__doc__", None)
+        self.prefix_consistent = predictions.is_prefix_consistent(batch_callback)
+        cache_key = getattr(batch_callback, "cache_key", None)
+        if isinstance(cache_key, str):
+            self.cache_key = cache_key
+        self.batch_callback = batch_callback
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self.timeout = timeout
+        self._queue: "queue.Queue[Any]" = queue.Queue()
+        self._thread = threading.Thread(target=self._dispatch, name="micro_batch_scheduler", daemon=True)
+        self._thread.start()
+
+    def submit(
+        self, data_sample: DataSample, time_max: Any, time_resolution: Any, **kwargs
+    ) -> "concurrent.futures.Future[pd.DataFrame]":
+        if not self._thread.is_alive():
+            raise RuntimeError("The scheduler is closed")
+        future: "concurrent.futures.Future[pd.DataFrame]" = concurrent.futures.Future()
+        batch_key = (repr(time_max), repr(time_resolution), repr(sorted(kwargs.items())))
+        self._queue.put((batch_key, (time_max, time_resolution, kwargs), _Request(data_sample, future)))
+        return future
+
+    def __call__(self, data_sample: DataSample, time_max: Any, time_resolution: Any, **kwargs) -> pd.DataFrame:
+        future = self.submit(data_sample, time_max=time_max, time_resolution=time_resolution, **kwargs)
+        try:
+            return future.result(timeout=self.timeout)
+        except concurrent.futures.TimeoutError:
+            future.cancel()  # Not run, if its batch has not started yet.
+            raise TimeoutError(f"The batched prediction did not complete within {self.timeout} s") from None
+
+    def close(self) -> None:
+        """Stop the dispatcher thread, after running the batches already queued."""
+        self._queue.put(_CLOSE)
+        self._thread.join()
+
+    def _run_batch(self, batch: _Batch) -> None:
+        time_max, time_resolution, kwargs = batch.args
+        requests = [request for request in batch.requests if request.future.set_running_or_notify_cancel()]
+        if not requests:
+            return
+        try:
+            results = self.batch_callback(
+                [request.data_sample for request in requests],
+                time_max=time_max,
+                time_resolution=time_resolution,
+                **kwargs,
+            )
+            if len(results) != len(requests):
+                raise ValueError(f"The batch callback returned {len(results)} results for {len(requests)} samples")
+        except Exception as ex:  # pylint: disable=broad-except
+            logger.exception(ex)
+            for request in requests:
+                request.future.set_exception(ex)
+            return
+        except BaseException:
+            for request in requests:
+                request.future.set_exception(RuntimeError("The scheduler stopped while running the batch"))
+            raise
+        for request, result in zip(requests, results):
+            request.future.set_result(result)
+
+    def _dispatch(self) -> None:
+        batches: Dict[Hashable, _Batch] = dict()
+        try:
+            self._dispatch_loop(batches)
+        finally:
+            # The requests queued after closing, or left when the thread is stopped by an exception.
+            requests = [request for batch in batches.values() for request in batch.requests]
+            while True:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is not _CLOSE:
+                    requests.append(item[2])
+            for request in requests:
+                if request.future.set_running_or_notify_cancel():
+                    request.future.set_exception(RuntimeError("The scheduler is closed"))
+
+    def _dispatch_loop(self, batches: Dict[Hashable, _Batch]) -> None:
+        while True:
+            timeout = None
+            if batches:
+                timeout = max(min(batch.deadline for batch in batches.values()) - time.monotonic(), 0.0)
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+            closing = item is _CLOSE
+            if item is not None and not closing:
+                batch_key, args, request = item
+                if batch_key not in batches:
+                    batches[batch_key] = _Batch(
+                        args=args, requests=[], deadline=time.monotonic() + self.max_wait_ms / 1000
+                    )
+                batches[batch_key].requests.append(request)
+
+            now = time.monotonic()
+            for batch_key in list(batches.keys()):
+                batch = batches[batch_key]
+                if closing or len(batch.requests) >= self.max_batch_size or batch.deadline <= now:
+                    del batches[batch_key]
+                    self._run_batch(batch)
+            if closing:
+                return
@@ -0,0 +1,85 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, NamedTuple, Optional, Tuple
+
+
+class CacheStats(NamedTuple):
+    hits: int
+    misses: int
+    size: int
+    max_size: int
+
+
+class LRUCache:
+    """A thread-safe, size-bounded cache with least-recently-used eviction and an optional time-to-live.
+
+    Args:
+        max_size (int): Maximum number of entries, the least recently used entry is evicted beyond this.
+        ttl (Optional[float], optional): Seconds after which an entry expires. Defaults to `None` (never expires).
+    """
+
+    def __init__(self, max_size: int, ttl: Optional[float] = None) -> None:
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.RLock()
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+    def configure(self, max_size: int, ttl: Optional[float] = None) -> None:
+        with self._lock:
+            self.max_size = max_size
+            self.ttl = ttl
+            self._evict()
+
+    def _evict(self) -> None:
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry: Optional[Tuple[float, Any]] = self._data.get(key)
+            if entry is not None:
+                stored_at, value = entry
+                if self.ttl is None or time.monotonic() - stored_at < self.ttl:
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return default
+
+    def put(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._data[key] = (time.monotonic(), value)
+            self._data.move_to_end(key)
+            self._evict()
+
+    def pop(self, key: Hashable) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def discard_where(self, predicate: Callable[[Hashable], bool]) -> int:
+        """Remove all entries whose key satisfies ``predicate``, return the number of entries removed."""
+        with self._lock:
+            keys = [key for key in self._data if predicate(key)]
+            for key in keys:
+                del self._data[key]
+            return len(keys)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> CacheStats:
+        with self._lock:
+            return CacheStats(hits=self.hits, misses=self.misses, size=len(self._data), max_size=self.max_size)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._data
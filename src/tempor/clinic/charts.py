@@ -0,0 +1,60 @@
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+import plotly.express as px
+
+from . import cache, columnar, downsampling, field_def, utils
+from .const import DEFAULTS
+
+# Process-wide cache of the temporal data figures, shared by all sessions. Entries are keyed by the version of the
+# sample (see `deta_utils.get_sample_version_key`, bumped on every write, so a modified sample never hits the figure
+# of its previous version), the feature shown and the display settings.
+# NOTE: The cached figures are shared, they must not be modified.
+FIGURE_CACHE = cache.LRUCache(max_size=DEFAULTS.figure_cache_size)
+
+
+def configure_figure_cache(max_size: int = DEFAULTS.figure_cache_size) -> None:
+    FIGURE_CACHE.configure(max_size=max_size)
+
+
+def temporal_feature_figure(
+    temporal: List[Dict[str, Any]],
+    field_defs: Dict[str, field_def.FieldDef],
+    feature_key: str,
+    sample_version: Hashable,
+    webgl_threshold: Optional[int] = DEFAULTS.webgl_threshold,
+    max_points: Optional[int] = DEFAULTS.chart_max_points,
+    downsampling_method: str = DEFAULTS.downsampling_method,
+    time_range: Optional[Tuple[Any, Any]] = None,
+) -> Any:
+    """Get the line chart of a temporal feature, from `FIGURE_CACHE` if it has already been made for the same
+    ``sample_version`` (see `deta_utils.get_sample_version_key`), which ``temporal`` must be the data of.
+
+    Only the time-steps within ``time_range`` (inclusive) are shown, if given. If there are more than ``max_points``
+    of them, the series is downsampled (see `downsampling.downsample`), so narrowing the range shows it at a higher
+    resolution, up to the full one. Series of more than ``webgl_threshold`` points are drawn with WebGL, `None` to
+    never use it.
+    """
+    cache_key = (
+        sample_version,
+        feature_key,
+        webgl_threshold,
+        max_points,
+        downsampling_method,
+        repr(time_range),
+    )
+    fig = FIGURE_CACHE.get(cache_key)
+    if fig is None:
+        df = utils.get_temporal_data_as_df(columnar.TemporalColumns.from_records(temporal, field_defs=field_defs))
+        if time_range is not None:
+            df = df[(df.index >= time_range[0]) & (df.index <= time_range[1])]
+        df = downsampling.downsample(df, feature_key, max_points=max_points, method=downsampling_method)
+        # For debugging, preview temporal data as a table:
+        # st.write(df)
+        fig = px.line(
+            df,
+            y=feature_key,
+            labels={k: fd.get_full_label() for k, fd in field_defs.items()},
+            render_mode="webgl" if webgl_threshold is not None and len(df) > webgl_threshold else "svg",
+        )
+        FIGURE_CACHE.put(cache_key, fig)
+    return fig
@@ -0,0 +1,43 @@
+import argparse
+import importlib
+from typing import Any
+
+from . import deta_utils, field_def, storage
+
+
+def add_db_arguments(parser: argparse.ArgumentParser) -> None:
+    db_group = parser.add_mutually_exclusive_group(required=True)
+    db_group.add_argument("--sqlite", help="Path of the SQLite database")
+    db_group.add_argument("--deta-base-env", help="Environment variable holding the name of the Deta Base")
+    parser.add_argument("--deta-key-env", default="DETA_KEY", help="Environment variable holding the Deta project key")
+
+
+def db_from_args(args: argparse.Namespace) -> storage.SampleStore:
+    if args.sqlite is not None:
+        return storage.SQLiteBackend(path=args.sqlite)
+    _, db, _ = deta_utils.connect_to_db(
+        deta_key_secret=args.deta_key_env, base_name_env_var=args.deta_base_env, take_vars_from="env"
+    )
+    return db
+
+
+def add_field_defs_argument(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--field-defs", required=True, help="Field defs of the samples, as 'module:attribute', e.g. app:FIELD_DEFS"
+    )
+
+
+def load_object(spec: str) -> Any:
+    # `spec` is "module:attribute".
+    module_name, _, attribute = spec.partition(":")
+    if not attribute:
+        raise ValueError(f"Expected 'module:attribute', got: '{spec}'")
+    return getattr(importlib.import_module(module_name), attribute)
+
+
+def load_field_defs(spec: str) -> field_def.FieldDefsCollection:
+    # The attribute is raw field defs or an already parsed collection.
+    field_defs = load_object(spec)
+    if isinstance(field_defs, field_def.FieldDefsCollection):
+        return field_defs
+    return field_def.parse_field_defs(field_defs)
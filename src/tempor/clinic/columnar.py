@@ -0,0 +1,123 @@
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Union, overload
+
+import numpy as np
+import pandas as pd
+
+from . import field_def
+from .const import DEFAULTS
+
+NUMPY_DTYPES: Dict[str, Any] = {
+    "int": np.int64,
+    "float": np.float64,
+    "binary": np.bool_,
+    "date": "datetime64[D]",
+}
+
+
+# The array types of the features with missing (`None`) values, for the types that cannot represent them: ints
+# become floats (with NaN), booleans are kept as objects (NumPy would make `None` `False`).
+NULLABLE_NUMPY_DTYPES: Dict[str, Any] = {
+    "int": np.float64,
+    "binary": object,
+}
+
+
+def _to_python(value: Any) -> Any:
+    # NumPy scalars are converted back to the plain Python values used everywhere else (`datetime64[D]` -> `date`).
+    return value.item() if isinstance(value, np.generic) else value
+
+
+class TemporalColumns(Sequence[Dict[str, Any]]):
+    """Temporal data of a sample stored column-wise: one typed NumPy array per feature, with the rows sorted by the
+    time index.
+
+    Behaves as a read-only sequence of row dictionaries, like `DataSample.temporal`, so it can be used wherever the
+    list-of-dicts form is read. Whole-column operations (`column`, `time_index`, `to_df`) do not loop over the rows.
+
+    Args:
+        columns (Dict[str, np.ndarray]): Feature name to array of values, all of the same length.
+        time_index_field (str, optional): The name of the time index feature. Defaults to ``"time_index"``.
+    """
+
+    def __init__(self, columns: Dict[str, np.ndarray], time_index_field: str = DEFAULTS.time_index_field) -> None:
+        if time_index_field not in columns:
+            raise ValueError(f"Time index column '{time_index_field}' not found")
+        lengths = {len(values) for values in columns.values()}
+        if len(lengths) > 1:
+            raise ValueError(f"All columns must have the same length, found lengths: {lengths}")
+        self.time_index_field = time_index_field
+        order = np.argsort(columns[time_index_field], kind="stable")
+        if (order != np.arange(len(order))).any():
+            columns = {name: values[order] for name, values in columns.items()}
+        self.columns = columns
+
+    @classmethod
+    def from_records(
+        cls,
+        records: List[Dict[str, Any]],
+        field_defs: Optional[Dict[str, field_def.FieldDef]] = None,
+        time_index_field: str = DEFAULTS.time_index_field,
+    ) -> "TemporalColumns":
+        """Build from the list-of-dicts form. The array types are taken from ``field_defs`` if given (features of
+        types without a NumPy equivalent are kept as object arrays), else inferred by NumPy. Features with missing
+        (`None`) values get an array type that can hold them, see `NULLABLE_NUMPY_DTYPES`, so the missing values of
+        an int feature are read back as NaN.
+        """
+        if len(records) < 1:
+            raise ValueError("Temporal data list must contain at least one element")
+        feature_names = field_defs.keys() if field_defs is not None else records[0].keys()
+        columns: Dict[str, np.ndarray] = dict()
+        for name in feature_names:
+            values = [record[name] for record in records]
+            if field_defs is not None:
+                data_type = field_defs[name].data_type
+                dtype = NUMPY_DTYPES.get(data_type, object)
+                if data_type in NULLABLE_NUMPY_DTYPES and any(value is None for value in values):
+                    dtype = NULLABLE_NUMPY_DTYPES[data_type]
+                columns[name] = np.array(values, dtype=dtype)
+            else:
+                columns[name] = np.array(values)
+        return cls(columns, time_index_field=time_index_field)
+
+    @property
+    def feature_names(self) -> List[str]:
+        return list(self.columns.keys())
+
+    @property
+    def time_index(self) -> np.ndarray:
+        return self.columns[self.time_index_field]
+
+    def column(self, name: str) -> np.ndarray:
+        return self.columns[name]
+
+    def __len__(self) -> int:
+        return len(self.time_index)
+
+    @overload
+    def __getitem__(self, idx: int) -> Dict[str, Any]:
+        ...
+
+    @overload
+    def __getitem__(self, idx: slice) -> List[Dict[str, Any]]:
+        ...
+
+    def __getitem__(self, idx: Union[int, slice]) -> Union[Dict[str, Any], List[Dict[str, Any]]]:
+        if isinstance(idx, slice):
+            return [self[i] for i in range(*idx.indices(len(self)))]
+        return {name: _to_python(values[idx]) for name, values in self.columns.items()}
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for idx in range(len(self)):
+            yield self[idx]
+
+    def to_records(self) -> List[Dict[str, Any]]:
+        # Convert each column to Python values in one go, rather than value by value.
+        names = list(self.columns.keys())
+        python_columns = [values.tolist() for values in self.columns.values()]
+        return [dict(zip(names, row)) for row in zip(*python_columns)]
+
+    def to_df(self) -> pd.DataFrame:
+        """Get the data as a dataframe indexed by the time index. The dataframe shares the memory of the arrays."""
+        index = pd.Index(self.time_index, name=self.time_index_field, copy=False)
+        data = {name: values for name, values in self.columns.items() if name != self.time_index_field}
+        return pd.DataFrame(data, index=index, copy=False)
@@ -1,8 +1,7 @@
+import functools
 import os
-import random
-import string
 import time
-from typing import TYPE_CHECKING, Any, Callable, Dict, List, NamedTuple, Optional, Sequence, Union, cast
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple, Union, cast
 
 import pandas as pd
 import plotly.express as px
@@ -12,12 +11,22 @@ from packaging.version import Version
 from streamlit_modal import Modal
 from typing_extensions import Literal, Protocol
 
-from . import deta_utils, field_def, utils
+from . import (
+    charts,
+    deta_utils,
+    downsampling,
+    field_def,
+    keygen,
+    predictions,
+    sample_index,
+    scoring,
+    storage,
+    time_index,
+    utils,
+)
 from .app_state import AppState
-from .const import DEFAULTS, DataSample
-
-if TYPE_CHECKING:
-    from deta import _Base as DetaBase
+from .const import DEFAULTS, STATE_KEYS, DataSample
+from .transaction import SampleTransaction
 
 
 class AppSettings(NamedTuple):
@@ -39,6 +48,12 @@ else:
             st.write("")
 
 
+if Version(st.__version__) >= Version("1.27.0"):
+    _rerun = st.rerun
+else:
+    _rerun = st.experimental_rerun  # type: ignore [attr-defined]  # pylint: disable=no-member
+
+
 def page_config(app_settings: AppSettings, icon_path: Optional[str] = None) -> None:
     st.set_page_config(
         page_title=app_settings.name,
@@ -121,20 +136,44 @@ def _set_current_example(app_state: AppState, sample_selector_key: str):
     app_state.current_timestep = 0
 
 
-def _delete_current_example(app_state: AppState, db: "DetaBase"):
+def _delete_current_example(
+    app_state: AppState, db: storage.SampleStore, score_index: Optional[scoring.ScoreIndex] = None
+):
     current_sample = app_state.current_sample
     if current_sample is None:
         raise RuntimeError("`current_sample` was `None`")
     deta_utils.delete_sample(db=db, key=current_sample)
+    sample_index.on_sample_deleted(db=db, key=current_sample)
+    if score_index is not None:
+        score_index.delete(current_sample)
+    if current_sample in st.session_state.get(STATE_KEYS.loaded_sample_keys, []):
+        st.session_state[STATE_KEYS.loaded_sample_keys].remove(current_sample)
     app_state.current_sample = None
 
 
-def _add_new_sample(app_state: AppState, db: "DetaBase", key: str, field_defs: field_def.FieldDefsCollection):
+def _add_new_sample(app_state: AppState, db: storage.SampleStore, key: str, field_defs: field_def.FieldDefsCollection):
     app_state.current_timestep = 0  # New sample is added with just one timestep, timestep 0.
-    deta_utils.add_empty_sample(db=db, key=key, field_defs=field_defs, current_timestep=app_state.current_timestep)
+    added = deta_utils.add_empty_sample(
+        db=db, key=key, field_defs=field_defs, current_timestep=app_state.current_timestep
+    )
+    sample_index.on_sample_added(db=db, key=key, static=added["static"])
+    if STATE_KEYS.loaded_sample_keys in st.session_state:
+        st.session_state[STATE_KEYS.loaded_sample_keys].append(key)
     app_state.current_sample = key
 
 
+def _load_more_sample_keys(db: storage.SampleStore, page_size: int):
+    # Appends the next page of sample keys to the keys loaded so far in this session.
+    if STATE_KEYS.loaded_sample_keys not in st.session_state:
+        st.session_state[STATE_KEYS.loaded_sample_keys] = []
+        st.session_state[STATE_KEYS.loaded_sample_keys_last] = None
+    page = deta_utils.fetch_sample_keys_page(
+        db=db, page_size=page_size, last=st.session_state[STATE_KEYS.loaded_sample_keys_last]
+    )
+    st.session_state[STATE_KEYS.loaded_sample_keys].extend(page.keys)
+    st.session_state[STATE_KEYS.loaded_sample_keys_last] = page.last
+
+
 StPanel = Literal["error", "warning", "info"]
 PANEL_TYPES: Dict[StPanel, Callable] = {
     "error": st.error,
@@ -180,54 +219,21 @@ def _reset_interaction_state(app_state: AppState):
     app_state.interaction_state = "showing"
 
 
-def _generate_new_sample_key():
-    length = 12
-    characters = string.ascii_lowercase + string.digits
-    return "".join(random.choice(characters) for _ in range(length))  # nosec: B311
-
-
-def sample_selector(
+def _sample_add_delete(
     app_settings: AppSettings,
     app_state: AppState,
-    db: "DetaBase",
+    db: storage.SampleStore,
     field_defs: field_def.FieldDefsCollection,
-    sample_keys: List[str],  # TODO: Is this needed here like this? Rethink.
-) -> DataSample:
-    col_patient_select, col_add, col_delete, _ = st.columns([0.8, 0.2 / 3, 0.2 / 3, 0.2 / 3])
-
-    # Special case: no samples in database - create one. ---
-    no_data_found = len(sample_keys) == 0
-    if no_data_found:
-        new_key = _generate_new_sample_key()
-        with st.container():
-            st.error(f"No data found, adding first {app_settings.example_name}, ID={new_key}...")
-        _add_new_sample(app_state=app_state, db=db, key=new_key, field_defs=field_defs)
-        time.sleep(3)
-        st.experimental_rerun()
-    # Special case: [END] ---
-
-    with col_patient_select:
-        sample_selector_key = DEFAULTS.key_sample_selector
-        st.selectbox(
-            label=app_settings.example_name.capitalize(),
-            options=sample_keys,
-            index=sample_keys.index(app_state.current_sample) if app_state.current_sample is not None else 0,
-            key=sample_selector_key,
-            on_change=_set_current_example,
-            kwargs=dict(app_state=app_state, sample_selector_key=sample_selector_key),
-        )
-        if app_state.current_sample is None:
-            app_state.current_sample = sample_keys[0]
-
-        data_sample = deta_utils.get_sample(key=app_state.current_sample, db=db, field_defs=field_defs)
-
+    col_add: Any,
+    col_delete: Any,
+    score_index: Optional[scoring.ScoreIndex] = None,
+) -> None:
     with col_add:
         add_vertical_space(2)
         add_btn = st.button("➕", help=f"Add {app_settings.example_name}")
     with col_delete:
         add_vertical_space(2)
         delete_btn = st.button("❌", help=f"Delete {app_settings.example_name}")
-
     if add_btn:
         app_state.interaction_state = "adding_sample"
     elif delete_btn:
@@ -245,14 +251,14 @@ def sample_selector(
             ),
             panel_icon="⚠️",
             confirm_btn_on_click=_delete_current_example,
-            confirm_btn_on_click_kwargs=dict(app_state=app_state, db=db),
+            confirm_btn_on_click_kwargs=dict(app_state=app_state, db=db, score_index=score_index),
             confirm_btn_help=f"Confirm deleting {app_settings.example_name}",
             cancel_btn_on_click=_reset_interaction_state,
             cancel_btn_on_click_kwargs=dict(app_state=app_state),
             cancel_btn_help=f"Cancel deleting {app_settings.example_name}",
         )
     if app_state.interaction_state == "adding_sample":
-        new_key = _generate_new_sample_key()
+        new_key = keygen.new_sample_key(db=db)
         faux_confirm_modal(
             panel_type="info",
             panel_text=(
@@ -269,38 +275,224 @@ def sample_selector(
             cancel_btn_help=f"Cancel adding {app_settings.example_name}",
         )
 
+
+def sample_selector(
+    app_settings: AppSettings,
+    app_state: AppState,
+    db: storage.SampleStore,
+    field_defs: field_def.FieldDefsCollection,
+    sample_keys: Optional[List[str]] = None,
+    sample_keys_page_size: int = DEFAULTS.sample_keys_page_size,
+    score_index: Optional[scoring.ScoreIndex] = None,
+    score_format: str = ".2f",
+) -> DataSample:
+    # If `sample_keys` is not provided, the keys are loaded from the DB page by page, `sample_keys_page_size` at a
+    # time, with a button to load the next page.
+    incremental_keys = sample_keys is None
+    if sample_keys is None:
+        if STATE_KEYS.loaded_sample_keys not in st.session_state:
+            _load_more_sample_keys(db=db, page_size=sample_keys_page_size)
+        sample_keys = cast(List[str], st.session_state[STATE_KEYS.loaded_sample_keys])
+
+    # If a `score_index` is provided, the scored samples are listed first, highest risk first (see
+    # `scoring.score_samples`), a page of `sample_keys_page_size` of them at a time, followed by any loaded samples not
+    # scored yet.
+    scores: Dict[str, float] = dict()
+    if score_index is not None:
+        page_key = DEFAULTS.key_sample_score_page
+        ranked_page = score_index.ranked_page(
+            page=st.session_state.get(page_key, 1) - 1, page_size=sample_keys_page_size
+        )
+        # The page may be out of range once scores were removed.
+        st.session_state[page_key] = ranked_page.page + 1
+        _, col_score_page = st.columns([0.8, 0.2])
+        with col_score_page:
+            st.number_input(
+                label=f"Risk ranking page (of {ranked_page.n_pages})",
+                min_value=1,
+                max_value=ranked_page.n_pages,
+                key=page_key,
+            )
+        scores = {entry.key: entry.score for entry in ranked_page.entries}
+        sample_keys = list(scores) + [key for key in sample_keys if score_index.get(key) is None]
+
+    col_patient_select, col_add, col_delete, col_more = st.columns([0.8, 0.2 / 3, 0.2 / 3, 0.2 / 3])
+
+    # Special case: no samples in database - create one. ---
+    no_data_found = len(sample_keys) == 0
+    if no_data_found:
+        new_key = keygen.new_sample_key(db=db)
+        with st.container():
+            st.error(f"No data found, adding first {app_settings.example_name}, ID={new_key}...")
+        _add_new_sample(app_state=app_state, db=db, key=new_key, field_defs=field_defs)
+        time.sleep(3)
+        _rerun()
+    # Special case: [END] ---
+
+    if app_state.current_sample is not None and app_state.current_sample not in sample_keys:
+        # The current sample may be on a page that has not been loaded yet.
+        sample_keys = sample_keys + [app_state.current_sample]
+
+    with col_patient_select:
+        sample_selector_key = DEFAULTS.key_sample_selector
+        st.selectbox(
+            label=app_settings.example_name.capitalize(),
+            options=sample_keys,
+            index=sample_keys.index(app_state.current_sample) if app_state.current_sample is not None else 0,
+            key=sample_selector_key,
+            format_func=lambda key: f"{key} (risk: {scores[key]:{score_format}})" if key in scores else key,
+            on_change=_set_current_example,
+            kwargs=dict(app_state=app_state, sample_selector_key=sample_selector_key),
+        )
+        if app_state.current_sample is None:
+            app_state.current_sample = sample_keys[0]
+
+        data_sample = deta_utils.get_sample(key=app_state.current_sample, db=db, field_defs=field_defs)
+
+    with col_more:
+        if incremental_keys:
+            add_vertical_space(2)
+            st.button(
+                "⏬",
+                help=f"Load more {app_settings.example_name} IDs",
+                disabled=st.session_state[STATE_KEYS.loaded_sample_keys_last] is None,
+                on_click=_load_more_sample_keys,
+                kwargs=dict(db=db, page_size=sample_keys_page_size),
+            )
+
+    _sample_add_delete(
+        app_settings=app_settings,
+        app_state=app_state,
+        db=db,
+        field_defs=field_defs,
+        col_add=col_add,
+        col_delete=col_delete,
+        score_index=score_index,
+    )
+
+    return data_sample
+
+
+def sample_finder(
+    app_settings: AppSettings,
+    app_state: AppState,
+    db: storage.SampleStore,
+    field_defs: field_def.FieldDefsCollection,
+    search_fields: Sequence[str] = (),
+    page_size: int = DEFAULTS.sample_search_page_size,
+) -> DataSample:
+    # NOTE: The samples are searched in a process-wide index of the keys (and of the `search_fields` static fields),
+    # see `sample_index.get_sample_index`, which is kept up to date as samples are added, deleted and edited, instead
+    # of listing all the keys from the DB on every rerun. Only the matches of the current page are put in the selector.
+    index = sample_index.get_sample_index(db=db, search_fields=search_fields)
+
+    # Special case: no samples in database - create one. ---
+    if len(index) == 0:
+        new_key = keygen.new_sample_key(db=db)
+        with st.container():
+            st.error(f"No data found, adding first {app_settings.example_name}, ID={new_key}...")
+        _add_new_sample(app_state=app_state, db=db, key=new_key, field_defs=field_defs)
+        time.sleep(3)
+        _rerun()
+    # Special case: [END] ---
+
+    col_query, col_field, col_mode, col_page = st.columns([0.45, 0.25, 0.15, 0.15])
+    field_labels = {"": "ID", **{field: field_defs.static[field].get_full_label() for field in search_fields}}
+    with col_query:
+        query = st.text_input(label=f"Search {app_settings.example_name}", key=DEFAULTS.key_sample_search)
+    with col_field:
+        search_field = st.selectbox(
+            label="Search in",
+            options=list(field_labels.keys()),
+            format_func=lambda field: field_labels[field],
+            key=DEFAULTS.key_sample_search_field,
+        )
+    with col_mode:
+        mode = st.selectbox(
+            label="Match",
+            options=["prefix", "substring"],
+            format_func=lambda mode: "Starts with" if mode == "prefix" else "Contains",
+        )
+    page_key = DEFAULTS.key_sample_search_page
+    results = index.search(
+        query=query,
+        field=search_field or None,
+        mode=cast(str, mode),
+        page=st.session_state.get(page_key, 1) - 1,
+        page_size=page_size,
+    )
+    # The page may be out of range for a new query.
+    st.session_state[page_key] = results.page + 1
+    with col_page:
+        st.number_input(label=f"Page (of {results.n_pages})", min_value=1, max_value=results.n_pages, key=page_key)
+
+    col_patient_select, col_add, col_delete, col_matches = st.columns([0.8, 0.2 / 3, 0.2 / 3, 0.2 / 3])
+
+    sample_keys = results.keys
+    if app_state.current_sample is None:
+        app_state.current_sample = sample_keys[0] if sample_keys else index.search().keys[0]
+    if app_state.current_sample is not None and app_state.current_sample not in sample_keys:
+        sample_keys = [app_state.current_sample] + sample_keys
+
+    with col_patient_select:
+        sample_selector_key = DEFAULTS.key_sample_selector
+        st.selectbox(
+            label=app_settings.example_name.capitalize(),
+            options=sample_keys,
+            index=sample_keys.index(app_state.current_sample),
+            key=sample_selector_key,
+            on_change=_set_current_example,
+            kwargs=dict(app_state=app_state, sample_selector_key=sample_selector_key),
+        )
+        data_sample = deta_utils.get_sample(key=cast(str, app_state.current_sample), db=db, field_defs=field_defs)
+    with col_matches:
+        add_vertical_space(2)
+        st.markdown(f"`{results.n_matches} found`")
+
+    _sample_add_delete(
+        app_settings=app_settings,
+        app_state=app_state,
+        db=db,
+        field_defs=field_defs,
+        col_add=col_add,
+        col_delete=col_delete,
+    )
+
     return data_sample
 
 
 def _update_sample_static_data(
     app_state: AppState,
-    db: "DetaBase",
+    db: storage.SampleStore,
     field_defs: field_def.FieldDefsCollection,
     data_sample: DataSample,
-    computed_only: bool = False,
 ):
     current_sample = app_state.current_sample
     if current_sample is None:
         raise RuntimeError("`current_sample` was `None`")
 
-    static = field_def.update(
-        field_defs=field_defs.static,
-        session_state=st.session_state,
-        modality="static",
+    with SampleTransaction(
+        db=db,
+        key=current_sample,
         data_sample=data_sample,
+        field_defs=field_defs,
         current_timestep=app_state.current_timestep,
-        computed_only=computed_only,
-    )
-
-    data_sample = DataSample(static=static, temporal=data_sample.temporal, event=data_sample.event)
-
-    deta_utils.update_sample(db=db, key=current_sample, data_sample=data_sample, field_defs=field_defs)
+    ) as transaction:
+        data_sample.static = field_def.update(
+            field_defs=field_defs.static,
+            session_state=st.session_state,
+            modality="static",
+            data_sample=data_sample,
+            current_timestep=app_state.current_timestep,
+            skip_computed=True,
+        )
+        # The computed fields that depend on the changed static fields, including the temporal ones (at all
+        # time-steps), are recomputed on commit.
+        transaction.mark_modified("static")
 
+    sample_index.on_sample_updated(db=db, key=current_sample, static=data_sample.static)
     app_state.interaction_state = "showing"
 
-    # TODO: Temporal computed fields may depend on the static fields.
-    # Need code to update them (all timesteps) upon static data change.
-
 
 def _show_validation_error(validation_error_container: Any, msg: str):
     with validation_error_container:
@@ -309,7 +501,7 @@ def _show_validation_error(validation_error_container: Any, msg: str):
 
 def _update_sample_temporal_data(
     app_state: AppState,
-    db: "DetaBase",
+    db: storage.SampleStore,
     field_defs: field_def.FieldDefsCollection,
     data_sample: DataSample,
     validation_error_container: Any,
@@ -321,54 +513,52 @@ def _update_sample_temporal_data(
     if current_timestep is None:
         raise RuntimeError("`current_timestep` was `None`")
 
-    temporal = field_def.update(
-        field_defs=field_defs.temporal,
-        session_state=st.session_state,
-        modality="temporal",
+    with SampleTransaction(
+        db=db,
+        key=current_sample,
         data_sample=data_sample,
+        field_defs=field_defs,
         current_timestep=current_timestep,
-    )
-
-    # --- --- ---
-    # If user sets time index to a time index that is the same as the time index in another existing time-step,
-    # raise a validation "error".
-    time_indexes = utils.get_temporal_data_time_indexes(data_sample_temporal=data_sample.temporal)
-    existing_time_indexes = utils.remove_ith_element(time_indexes, current_timestep)
-    if temporal[DEFAULTS.time_index_field] in existing_time_indexes:
-        validation_error_msg = f"Time index {temporal['time_index']} already exists, choose a different time index"
-        _show_validation_error(validation_error_container, msg=validation_error_msg)
-        return
-    # --- --- ---
-
-    data_sample.temporal[current_timestep] = temporal
-
-    # --- --- ---
-    # In case the newly added time-step is not in the same position in the array of timesteps, re-sort the timesteps.
-    new_time_index = temporal[DEFAULTS.time_index_field]
-    time_indexes = utils.get_temporal_data_time_indexes(data_sample_temporal=data_sample.temporal)
-    time_indexes = sorted(time_indexes)
-    temp_dict = {x[DEFAULTS.time_index_field]: x for x in data_sample.temporal}
-    reordered = [temp_dict[ti] for ti in time_indexes]
-    current_timestep = time_indexes.index(new_time_index)
-    data_sample.temporal = reordered
-    # --- --- ---
-
-    data_sample = DataSample(static=data_sample.static, temporal=data_sample.temporal, event=data_sample.event)
+    ) as transaction:
+        # NOTE: The index is taken before the time-step is changed: it is rebuilt from the time-steps (and these are
+        # re-sorted) if it is not attached to the sample yet.
+        sorted_time_index = time_index.get_time_index(data_sample)
+        temporal = field_def.update(
+            field_defs=field_defs.temporal,
+            session_state=st.session_state,
+            modality="temporal",
+            data_sample=data_sample,
+            current_timestep=current_timestep,
+            skip_computed=True,
+            write=False,
+        )
 
-    deta_utils.update_sample(db=db, key=current_sample, data_sample=data_sample, field_defs=field_defs)
+        # --- --- ---
+        # If user sets time index to a time index that is the same as the time index in another existing time-step,
+        # raise a validation "error". The sample is left as it was.
+        new_time_index = temporal[DEFAULTS.time_index_field]
+        if new_time_index in sorted_time_index and sorted_time_index.position(new_time_index) != current_timestep:
+            validation_error_msg = f"Time index {temporal['time_index']} already exists, choose a different time index"
+            _show_validation_error(validation_error_container, msg=validation_error_msg)
+            transaction.rollback()
+            return
+        # --- --- ---
+
+        # The time-step is written, and moved to its position in time order in case the time index was changed.
+        current_timestep = time_index.move_timestep(data_sample, current_timestep, temporal)
+
+        # The computed fields that depend on the changed data are recomputed on commit, with the new position of the
+        # time-step.
+        transaction.current_timestep = current_timestep
+        transaction.mark_modified("temporal")
 
     app_state.current_timestep = current_timestep
     app_state.interaction_state = "showing"
 
-    # If any static fields are computed, since they may depend on the temporal data, re-compute them.
-    _update_sample_static_data(
-        app_state=app_state, db=db, field_defs=field_defs, data_sample=data_sample, computed_only=True
-    )
-
 
 def _add_sample_temporal_data(
     app_state: AppState,
-    db: "DetaBase",
+    db: storage.SampleStore,
     field_defs: field_def.FieldDefsCollection,
     data_sample: DataSample,
     new_time_index: Any,
@@ -377,30 +567,28 @@ def _add_sample_temporal_data(
     if current_sample is None:
         raise RuntimeError("`current_sample` was `None`")
 
-    new_timestep = field_def.get_default(field_defs.temporal, modality="temporal", data_sample=data_sample)
-    new_timestep[DEFAULTS.time_index_field] = new_time_index
-    data_sample.temporal += [new_timestep]
-
-    new_timestep = field_def.get_default_computed(
-        field_defs=field_defs.temporal,
-        modality="temporal",
-        data_sample_before_computation=data_sample,
+    with SampleTransaction(
+        db=db,
+        key=current_sample,
+        data_sample=data_sample,
+        field_defs=field_defs,
         current_timestep=app_state.current_timestep,
-    )
-    data_sample.temporal[-1] = new_timestep
+    ) as transaction:
+        new_timestep = field_def.get_default(field_defs.temporal, modality="temporal", data_sample=data_sample)
+        new_timestep[DEFAULTS.time_index_field] = new_time_index
+        new_timestep_idx = time_index.insert_timestep(data_sample, new_timestep)
+        # The computed fields of the new time-step are computed on commit.
 
-    data_sample = DataSample(static=data_sample.static, temporal=data_sample.temporal, event=data_sample.event)
+        transaction.current_timestep = new_timestep_idx
+        transaction.mark_modified("temporal")
 
-    deta_utils.update_sample(db=db, key=current_sample, data_sample=data_sample, field_defs=field_defs)
-
-    new_timestep_idx = len(data_sample.temporal) - 1  # Last timestep is the newly-added timestep.
     app_state.current_timestep = new_timestep_idx
     app_state.interaction_state = "showing"
 
 
 def _delete_sample_temporal_data(
     app_state: AppState,
-    db: "DetaBase",
+    db: storage.SampleStore,
     field_defs: field_def.FieldDefsCollection,
     data_sample: DataSample,
 ):
@@ -417,14 +605,19 @@ def _delete_sample_temporal_data(
     if current_timestep < 0 or current_timestep >= num_timesteps:
         raise RuntimeError(f"Invalid timestep to delete, index: {current_timestep}")
 
-    del data_sample.temporal[current_timestep]
-
-    data_sample = DataSample(static=data_sample.static, temporal=data_sample.temporal, event=data_sample.event)
-
-    deta_utils.update_sample(db=db, key=current_sample, data_sample=data_sample, field_defs=field_defs)
+    with SampleTransaction(
+        db=db,
+        key=current_sample,
+        data_sample=data_sample,
+        field_defs=field_defs,
+        current_timestep=current_timestep,
+    ) as transaction:
+        time_index.delete_timestep(data_sample, current_timestep)
 
-    # Fall to the next or last time step after deletion:
-    new_timestep_idx = min(current_timestep, len(data_sample.temporal) - 1)
+        # Fall to the next or last time step after deletion:
+        new_timestep_idx = min(current_timestep, len(data_sample.temporal) - 1)
+        transaction.current_timestep = new_timestep_idx
+        transaction.mark_modified("temporal")
 
     app_state.current_timestep = new_timestep_idx
     app_state.interaction_state = "showing"
@@ -441,7 +634,7 @@ def _prepare_data_table(data: Dict[str, Any], field_defs: Dict[str, field_def.Fi
 def static_data_table(
     app_settings: AppSettings,
     app_state: AppState,
-    db: "DetaBase",
+    db: storage.SampleStore,
     field_defs: field_def.FieldDefsCollection,
     data_sample: DataSample,
     heading: str = "### Static Data",
@@ -477,13 +670,13 @@ def static_data_table(
 
 
 def _set_current_timestep(app_state: AppState, data_sample: DataSample, timestep_selector_key: str):
-    app_state.current_timestep = utils.get_temporal_data_time_indexes(data_sample_temporal=data_sample.temporal).index(
+    app_state.current_timestep = time_index.get_time_index(data_sample).position(
         st.session_state[timestep_selector_key]
     )
 
 
 def _generate_new_time_index(field_defs: field_def.FieldDefsCollection, data_sample: DataSample) -> Any:
-    max_time_index = max(utils.get_temporal_data_time_indexes(data_sample_temporal=data_sample.temporal))
+    max_time_index = time_index.get_time_index(data_sample).max()
     time_index_def = field_defs.temporal[DEFAULTS.time_index_field]
     if not isinstance(time_index_def, field_def.TimeIndexDef):
         raise RuntimeError(f"Time index field def was not an instance of {field_def.TimeIndexDef.__name__}")
@@ -500,10 +693,43 @@ def _navigate_to_next_timestep(app_state: AppState, n_timesteps: int):
         app_state.current_timestep += 1
 
 
+def _timestep_window(current_timestep: int, n_timesteps: int, window_size: int) -> Tuple[int, int]:
+    # The page of `window_size` time-steps that contains the current time-step.
+    window_start = (current_timestep // window_size) * window_size
+    return window_start, min(window_start + window_size, n_timesteps)
+
+
+def _navigate_timestep_window(app_state: AppState, n_timesteps: int, window_size: int, direction: int):
+    window_start, _ = _timestep_window(app_state.current_timestep, n_timesteps, window_size)
+    app_state.current_timestep = min(max(window_start + direction * window_size, 0), n_timesteps - 1)
+
+
+def _jump_to_time_index(app_state: AppState, data_sample: DataSample, timestep_search_key: str):
+    app_state.current_timestep = time_index.get_time_index(data_sample).search(st.session_state[timestep_search_key])
+
+
+def _prepare_timesteps_grid(timesteps: List[Dict[str, Any]], field_defs: Dict[str, field_def.FieldDef]) -> pd.DataFrame:
+    time_index_def = field_defs[DEFAULTS.time_index_field]
+    return pd.DataFrame(
+        [
+            {
+                fd.get_full_label(): utils.format_with_field_formatting(timestep[field_name], fd)
+                for field_name, fd in field_defs.items()
+                if field_name != DEFAULTS.time_index_field
+            }
+            for timestep in timesteps
+        ],
+        index=pd.Index(
+            [utils.format_with_field_formatting(x[DEFAULTS.time_index_field], time_index_def) for x in timesteps],
+            name=time_index_def.get_full_label(),
+        ),
+    )
+
+
 def temporal_data_table(
     app_settings: AppSettings,
     app_state: AppState,
-    db: "DetaBase",
+    db: storage.SampleStore,
     field_defs: field_def.FieldDefsCollection,
     data_sample: DataSample,
     heading: str = "### Temporal Data",
@@ -511,11 +737,17 @@ def temporal_data_table(
     heading_row_columns: Sequence[Union[int, float]] = (0.5, 0.133, 0.133, 0.134, 0.1),
     first_timestep_note: Optional[str] = None,
     last_timestep_note: Optional[str] = None,
+    window_size: int = DEFAULTS.timestep_window_size,
+    show_window_grid: bool = True,
 ) -> None:
     # If split_heading_and_buttons == True, the heading_row_columns should NOT include the dimensions for
     # the heading column - the hading will be on its own row.
 
+    # NOTE: Only the window (page) of `window_size` time-steps that contains the current time-step is put in the
+    # selector and the grid, and formatted. Other windows are reached with the paging buttons or the time index search.
     n_timesteps = len(data_sample.temporal)
+    sorted_time_index = time_index.get_time_index(data_sample)
+    window_start, window_end = _timestep_window(app_state.current_timestep, n_timesteps, window_size)
 
     if not split_heading_and_buttons:
         col_title, col_edit, col_add, col_delete, *_ = st.columns(heading_row_columns)
@@ -523,6 +755,7 @@ def temporal_data_table(
         col_title = st.container()
         col_edit, col_add, col_delete, *_ = st.columns(heading_row_columns)
     col_left, col_select, col_right, col_steps = st.columns([0.15, 0.4, 0.15, 0.3])
+    col_page_prev, col_search, col_page_next, col_window = st.columns([0.15, 0.4, 0.15, 0.3])
     validation_error_container = st.container()
 
     with col_title:
@@ -555,8 +788,8 @@ def temporal_data_table(
             label="Select time step with time index:",
             label_visibility="collapsed",
             key=timestep_selector_key,
-            options=utils.get_temporal_data_time_indexes(data_sample_temporal=data_sample.temporal),
-            index=app_state.current_timestep,
+            options=sorted_time_index.window(window_start, window_end),
+            index=app_state.current_timestep - window_start,
             on_change=_set_current_timestep,
             kwargs=dict(app_state=app_state, data_sample=data_sample, timestep_selector_key=timestep_selector_key),
             format_func=lambda x: utils.format_with_field_formatting(x, field_defs.temporal[DEFAULTS.time_index_field]),
@@ -574,6 +807,39 @@ def temporal_data_table(
         add_vertical_space(1)
         st.markdown(f"`time-step: {app_state.current_timestep + 1}/{n_timesteps}`")
 
+    with col_page_prev:
+        st.button(
+            "⏪",
+            help=f"Navigate to the previous {window_size} time-steps",
+            disabled=window_start == 0,
+            on_click=_navigate_timestep_window,
+            kwargs=dict(app_state=app_state, n_timesteps=n_timesteps, window_size=window_size, direction=-1),
+        )
+    with col_search:
+        timestep_search_key = DEFAULTS.key_timestep_search
+        time_index_def = field_defs.temporal[DEFAULTS.time_index_field]
+        search_widget = st.date_input if isinstance(time_index_def, field_def.DateTimeIndexDef) else st.number_input
+        search_widget(
+            label="Jump to time index:",
+            label_visibility="collapsed",
+            key=timestep_search_key,
+            value=sorted_time_index[app_state.current_timestep],
+            on_change=_jump_to_time_index,
+            kwargs=dict(app_state=app_state, data_sample=data_sample, timestep_search_key=timestep_search_key),
+            help="Jump to the first time-step at or after the time index",
+        )
+    with col_page_next:
+        st.button(
+            "⏩",
+            help=f"Navigate to the next {window_size} time-steps",
+            disabled=window_end == n_timesteps,
+            on_click=_navigate_timestep_window,
+            kwargs=dict(app_state=app_state, n_timesteps=n_timesteps, window_size=window_size, direction=1),
+        )
+    with col_window:
+        add_vertical_space(1)
+        st.markdown(f"`window: {window_start + 1}-{window_end}/{n_timesteps}`")
+
     if app_state.interaction_state == "adding_temporal_data":
         new_time_index = _generate_new_time_index(field_defs=field_defs, data_sample=data_sample)
         faux_confirm_modal(
@@ -628,6 +894,10 @@ def temporal_data_table(
             data=data_sample.temporal[app_state.current_timestep], field_defs=field_defs.temporal
         )
         st.table(timestep_df)
+        if show_window_grid:
+            st.dataframe(
+                _prepare_timesteps_grid(data_sample.temporal[window_start:window_end], field_defs=field_defs.temporal)
+            )
     else:
         with st.form(key=DEFAULTS.key_edit_form_temporal):
             for field_name, dd in field_defs.temporal.items():
@@ -651,10 +921,17 @@ def temporal_data_table(
                 app_state.interaction_state = "showing"
 
 
-def temporal_data_chart(data_sample: DataSample, field_defs: field_def.FieldDefsCollection):
-    feature_keys = list(field_defs.temporal.keys())
-    feature_readable_names = [fd.get_full_label() for _, fd in field_defs.temporal.items()]
-    selectbox_feature_keys = [feature_key for feature_key in feature_keys if feature_key != DEFAULTS.time_index_field]
+def temporal_data_chart(
+    data_sample: DataSample,
+    field_defs: field_def.FieldDefsCollection,
+    db: storage.SampleStore,
+    sample_key: str,
+    max_points: Optional[int] = DEFAULTS.chart_max_points,
+    downsampling_method: str = DEFAULTS.downsampling_method,
+):
+    selectbox_feature_keys = [
+        feature_key for feature_key in field_defs.temporal.keys() if feature_key != DEFAULTS.time_index_field
+    ]
     selectbox_feature_readable_names = [
         fd.get_full_label()
         for feature_key, fd in field_defs.temporal.items()
@@ -666,19 +943,38 @@ def temporal_data_chart(data_sample: DataSample, field_defs: field_def.FieldDefs
     selected_feature_index = selectbox_feature_readable_names.index(selected_feature_readable_name)
     selected_feature_key = selectbox_feature_keys[selected_feature_index]
 
-    df = utils.get_temporal_data_as_df(data_sample.temporal)
-    # For debugging, preview temporal data as a table:
-    # st.write(df)
+    # NOTE: Long series are downsampled to `max_points`. As Streamlit does not send the zoom events of Plotly charts
+    # back to the app, the time range to zoom into is selected with a slider, and the figure is made again for that
+    # range, at full resolution once it has at most `max_points` time-steps.
+    time_range = None
+    if max_points is not None and len(data_sample.temporal) > max_points:
+        time_indexes = [x[DEFAULTS.time_index_field] for x in data_sample.temporal]
+        time_range = st.slider(
+            label="Time range",
+            min_value=min(time_indexes),
+            max_value=max(time_indexes),
+            value=(min(time_indexes), max(time_indexes)),
+            key=DEFAULTS.key_temporal_data_time_range,
+        )
 
-    fig = px.line(
-        df,
-        y=selected_feature_key,
-        labels={k: v for k, v in zip(feature_keys, feature_readable_names)},
+    # NOTE: The figure is cached (see `charts.FIGURE_CACHE`), and only made again when the sample is written.
+    fig = charts.temporal_feature_figure(
+        data_sample.temporal,
+        field_defs=field_defs.temporal,
+        feature_key=selected_feature_key,
+        sample_version=deta_utils.get_sample_version_key(db, sample_key),
+        max_points=max_points,
+        downsampling_method=downsampling_method,
+        time_range=time_range,
     )
     st.plotly_chart(fig)
 
 
 class RiskPredictionCallback(Protocol):
+    # NOTE: A callback whose predictions up to any `time_max` are a prefix of those up to a larger `time_max` can
+    # declare it with a `prefix_consistent = True` attribute (see `predictions.prefix_consistent`), for
+    # `risk_prediction_chart` to serve the time limit slider from one call at the slider maximum.
+
     def __call__(
         self,
         data_sample: DataSample,
@@ -699,23 +995,15 @@ def risk_estimation_time_max_slider(min_value: Any, max_value: Any, step: Any, i
     )
 
 
-def risk_prediction_chart(
-    data_sample: DataSample,
+def _make_risk_prediction_figure(
+    risk_predictions: pd.DataFrame,
     time_axis_title: str,
     risk_axis_title: str,
-    time_max: Any,
-    time_resolution: Any,
-    risk_prediction_callback: RiskPredictionCallback,
     time_format: Optional[str] = None,
     risk_format: Optional[str] = None,
-    **kwargs,
-):
-    risk_predictions = risk_prediction_callback(
-        data_sample,
-        time_max=time_max,
-        time_resolution=time_resolution,
-        **kwargs,
-    )
+    max_points: Optional[int] = DEFAULTS.chart_max_points,
+) -> Any:
+    risk_predictions = downsampling.downsample(risk_predictions, "risk_prediction", max_points=max_points)
     fig = px.area(
         risk_predictions,
         y="risk_prediction",
@@ -739,11 +1027,148 @@ def risk_prediction_chart(
     fig.update_yaxes(title=risk_axis_title)
     fig.update_layout(yaxis_tickformat=time_format)
     fig.update_layout(yaxis_tickformat=risk_format)
-    st.plotly_chart(fig, use_container_width=True)
+    return fig
+
+
+class PendingRiskPredictionChart(NamedTuple):
+    placeholder: Any
+    pending: predictions.PendingPrediction
+    make_figure: Callable[[pd.DataFrame], Any]
+
+
+def _fill_risk_prediction_chart(chart: PendingRiskPredictionChart) -> None:
+    try:
+        risk_predictions = chart.pending.result()
+    except Exception as ex:  # pylint: disable=broad-except
+        chart.placeholder.error(f"Risk prediction failed: {ex}", icon="⛔")
+        return
+    chart.placeholder.plotly_chart(chart.make_figure(risk_predictions), use_container_width=True)
     # For debug, show data:
     # st.write(risk_predictions)
 
 
+def risk_prediction_chart(
+    data_sample: DataSample,
+    time_axis_title: str,
+    risk_axis_title: str,
+    time_max: Any,
+    time_resolution: Any,
+    risk_prediction_callback: RiskPredictionCallback,
+    time_format: Optional[str] = None,
+    risk_format: Optional[str] = None,
+    sample_key: Optional[str] = None,
+    use_cache: bool = True,
+    time_max_horizon: Any = None,
+    background: bool = False,
+    db: Optional[storage.SampleStore] = None,
+    key: str = DEFAULTS.key_risk_prediction_chart,
+    max_points: Optional[int] = DEFAULTS.chart_max_points,
+    **kwargs,
+) -> Optional[PendingRiskPredictionChart]:
+    # NOTE: The predictions are cached (see `predictions.PREDICTION_CACHE`), so that the reruns of the app that do not
+    # modify the sample do not call the callback again. With the `db` and `sample_key` of the stored sample, the sample
+    # is identified by its version, rather than by hashing its data on every rerun.
+    sample_version = (
+        deta_utils.get_sample_version_key(db, sample_key) if db is not None and sample_key is not None else None
+    )
+    make_figure = functools.partial(
+        _make_risk_prediction_figure,
+        time_axis_title=time_axis_title,
+        risk_axis_title=risk_axis_title,
+        time_format=time_format,
+        risk_format=risk_format,
+        max_points=max_points,
+    )
+    if not background:
+        risk_predictions = predictions.predict_risk(
+            risk_prediction_callback,
+            data_sample,
+            time_max=time_max,
+            time_resolution=time_resolution,
+            sample_key=sample_key,
+            use_cache=use_cache,
+            time_max_horizon=time_max_horizon,
+            sample_version=sample_version,
+            **kwargs,
+        )
+        st.plotly_chart(make_figure(risk_predictions), use_container_width=True)
+        return None
+
+    # In background mode, the prediction is run on the prediction executor and a placeholder is shown until it is
+    # done, see `render_pending_risk_predictions`. The prediction of the previous run is kept in the session state
+    # (under `key`), to be reused if the request is the same, or discarded if the user switched sample, model or
+    # horizon.
+    request = (
+        sample_key,
+        predictions.callback_id(risk_prediction_callback),
+        sample_version if sample_version is not None else predictions.sample_fingerprint(data_sample),
+        repr(time_max),
+        repr(time_resolution),
+        repr(time_max_horizon),
+        repr(sorted(kwargs.items())),
+    )
+    previous = st.session_state.get(key)
+    if previous is not None and previous[0] == request and not previous[1].cancelled:
+        pending = previous[1]
+    else:
+        pending = predictions.submit_prediction(
+            risk_prediction_callback,
+            data_sample,
+            time_max=time_max,
+            time_resolution=time_resolution,
+            sample_key=sample_key,
+            use_cache=use_cache,
+            time_max_horizon=time_max_horizon,
+            sample_version=sample_version,
+            **kwargs,
+        )
+        if previous is not None:
+            previous[1].cancel()
+        st.session_state[key] = (request, pending)
+
+    chart = PendingRiskPredictionChart(placeholder=st.empty(), pending=pending, make_figure=make_figure)
+    if pending.done():
+        _fill_risk_prediction_chart(chart)
+        return None
+    chart.placeholder.info("Computing risk predictions...", icon="⏳")
+    return chart
+
+
+def render_pending_risk_predictions(
+    pending: Sequence[Optional[PendingRiskPredictionChart]],
+    poll_interval: float = 0.2,
+    timeout: Optional[float] = DEFAULTS.prediction_render_timeout,
+) -> None:
+    """Fill in the background risk prediction charts (as returned by `risk_prediction_chart`) as their predictions
+    arrive. Call at the end of the app, after the rest of the page has been rendered.
+
+    Waits at most ``timeout`` seconds (`None` to wait until all are done). The charts still pending then are left with
+    a message, their predictions keep running in the background and are shown on the next rerun once done.
+    """
+    remaining = [chart for chart in pending if chart is not None]
+    start = time.monotonic()
+    while remaining:
+        elapsed = time.monotonic() - start
+        timed_out = timeout is not None and elapsed >= timeout
+        for chart in list(remaining):
+            if chart.pending.done():
+                _fill_risk_prediction_chart(chart)
+                remaining.remove(chart)
+            elif timed_out:
+                chart.placeholder.warning(
+                    f"Risk predictions not ready after {elapsed:.0f} s, they are shown on the next rerun once done.",
+                    icon="⏳",
+                )
+            else:
+                # NOTE: Updating the placeholder also lets Streamlit stop this run as soon as the user interacts with
+                # the page.
+                chart.placeholder.info(f"Computing risk predictions... ({elapsed:.0f} s)", icon="⏳")
+        if timed_out:
+            return
+        if remaining:
+            time.sleep(poll_interval)
+
+
 def debug_info(
     data_sample: DataSample,
 ) -> None:
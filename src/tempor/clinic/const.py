@@ -1,7 +1,7 @@
 import os
-from typing import Any, Dict, List, NamedTuple
+from typing import Any, Dict, List, NamedTuple, Optional
 
-from pydantic import BaseModel
+from pydantic import BaseModel, PrivateAttr
 from typing_extensions import Literal
 
 DataModality = Literal["static", "temporal", "event"]
@@ -26,6 +26,8 @@ class SessionStateKeys(NamedTuple):
     current_sample: str = "current_sample"
     current_timestep: str = "current_timestep"
     interaction_state: str = "interaction_state"
+    loaded_sample_keys: str = "loaded_sample_keys"
+    loaded_sample_keys_last: str = "loaded_sample_keys_last"
     # Field prefixes:
     data_field_prefix: str = "data"
     time_index_prefix: str = "time_index"
@@ -41,10 +43,51 @@ class Defaults(NamedTuple):
     icon: str = os.path.join(ASSETS_PATH, "TemporAI_Clinic_Logo_Icon.ico")
     # Special fields:
     time_index_field: str = "time_index"
+    # Sample listing:
+    sample_keys_page_size: int = 100
+    sample_search_page_size: int = 50
+    sample_index_max_count: int = 16
+    sample_key_strategy: Literal["random", "sortable"] = "random"
+    # Storage:
+    chunk_size: int = 500
+    # Sample cache:
+    sample_cache_size: int = 256
+    sample_cache_ttl: Optional[float] = None
+    # Computed fields:
+    computed_memo_size: int = 4096
+    # Risk prediction cache:
+    prediction_cache_size: int = 64
+    prediction_cache_ttl: Optional[float] = None
+    prediction_workers: int = 2
+    prediction_render_timeout: Optional[float] = 120.0
+    # Inference micro-batching:
+    batch_max_size: int = 32
+    batch_max_wait_ms: float = 10.0
+    batch_timeout: Optional[float] = 60.0
+    # Model worker processes:
+    model_workers: int = 2
+    model_worker_timeout: Optional[float] = 60.0
+    model_worker_health_check_interval: Optional[float] = 30.0
+    # Risk score index:
+    score_index_ttl: Optional[float] = 60.0
+    # Charts:
+    figure_cache_size: int = 128
+    webgl_threshold: Optional[int] = 1000
+    chart_max_points: Optional[int] = 2000
+    downsampling_method: str = "lttb"
+    # Temporal data table:
+    timestep_window_size: int = 50
     # Streamlit component keys:
     key_sample_selector: str = "sample_selector"
     key_edit_form_static: str = "edit_form_static"
     key_edit_form_temporal: str = "edit_form_static"
+    key_risk_prediction_chart: str = "risk_prediction_chart"
+    key_temporal_data_time_range: str = "temporal_data_time_range"
+    key_timestep_search: str = "timestep_search"
+    key_sample_search: str = "sample_search"
+    key_sample_search_field: str = "sample_search_field"
+    key_sample_search_page: str = "sample_search_page"
+    key_sample_score_page: str = "sample_score_page"
 
 
 DEFAULTS = Defaults()
@@ -55,3 +98,6 @@ class DataSample(BaseModel):
     static: Dict[str, Any]
     temporal: List[Dict[str, Any]]
     event: List[Dict[str, Any]]
+
+    # The sorted time index of `temporal`, with the list it was built from, see `time_index.get_time_index`.
+    _time_index: Optional[Any] = PrivateAttr(default=None)
@@ -0,0 +1,95 @@
+from typing import Any, Dict, List, NamedTuple, Tuple, Union
+
+from .const import DataModality
+
+RecordPath = Tuple[Union[str, int], ...]
+
+LIST_MODALITIES: Tuple[DataModality, ...] = ("temporal", "event")
+
+
+class SetValue(NamedTuple):
+    """Set the value at ``path``, e.g. ``("static", "age")`` or ``("temporal", 3, "hr")``."""
+
+    path: RecordPath
+    value: Any
+
+
+class AppendItems(NamedTuple):
+    """Append ``items`` to the end of the list of ``modality`` items."""
+
+    modality: DataModality
+    items: List[Dict[str, Any]]
+
+
+class ReplaceModality(NamedTuple):
+    """Replace the whole list of ``modality`` items with ``items``."""
+
+    modality: DataModality
+    items: List[Dict[str, Any]]
+
+
+Change = Union[SetValue, AppendItems, ReplaceModality]
+
+
+def _diff_items(
+    modality: DataModality, old: List[Dict[str, Any]], new: List[Dict[str, Any]], max_changed_fraction: float
+) -> List[Change]:
+    if len(new) < len(old):
+        # Items were removed, there is no cheaper way to express this than replacing the list.
+        return [ReplaceModality(modality=modality, items=new)]
+
+    changes: List[Change] = []
+    changed_items = 0
+    for idx, (old_item, new_item) in enumerate(zip(old, new)):
+        if old_item == new_item:
+            continue
+        changed_items += 1
+        if old_item.keys() != new_item.keys():
+            changes.append(SetValue(path=(modality, idx), value=new_item))
+        else:
+            changes.extend(
+                SetValue(path=(modality, idx, field_name), value=value)
+                for field_name, value in new_item.items()
+                if old_item[field_name] != value
+            )
+    if old and changed_items > max_changed_fraction * len(old):
+        # E.g. the items were re-sorted, sending the whole list is cheaper than the individual changes.
+        return [ReplaceModality(modality=modality, items=new)]
+
+    if len(new) > len(old):
+        changes.append(AppendItems(modality=modality, items=new[len(old) :]))
+    return changes
+
+
+def diff_records(old: Dict[str, Any], new: Dict[str, Any], max_changed_fraction: float = 0.5) -> List[Change]:
+    """Get the changes that turn the DB record ``old`` into ``new``. An empty list means the records are equal.
+
+    Args:
+        old (Dict[str, Any]): The record as currently stored, in DB format.
+        new (Dict[str, Any]): The new record, in DB format.
+        max_changed_fraction (float, optional): If more than this fraction of the temporal (or event) items changed,
+            the whole list is replaced rather than updated item by item. Defaults to ``0.5``.
+
+    Returns:
+        List[Change]: The changes.
+    """
+    changes: List[Change] = []
+    old_static, new_static = old.get("static", dict()), new.get("static", dict())
+    if old_static.keys() != new_static.keys():
+        changes.append(SetValue(path=("static",), value=new_static))
+    else:
+        changes.extend(
+            SetValue(path=("static", field_name), value=value)
+            for field_name, value in new_static.items()
+            if old_static[field_name] != value
+        )
+    for modality in LIST_MODALITIES:
+        changes.extend(
+            _diff_items(
+                modality=modality,
+                old=old.get(modality, []),
+                new=new.get(modality, []),
+                max_changed_fraction=max_changed_fraction,
+            )
+        )
+    return changes
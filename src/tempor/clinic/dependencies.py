@@ -0,0 +1,202 @@
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+from .const import DEFAULTS, DataModality, DataSample
+
+if TYPE_CHECKING:  # pragma: no cover
+    from .field_def import FieldDefsCollection, TimeStep
+
+# NOTE: The order of the modalities is the order of the computation cascade.
+MODALITIES: Tuple[DataModality, ...] = ("static", "temporal", "event")
+
+FieldKey = Tuple[DataModality, str]
+
+
+class Dependency(NamedTuple):
+    modality: DataModality
+    field: Optional[str]  # `None`: any field of the modality.
+
+
+class Edit(NamedTuple):
+    """A modification of the data of a sample.
+
+    * ``field`` and ``item_index`` set: the value of the field of the item (time-step or event) at the index changed.
+    * Only ``item_index`` set: the item at the index is new.
+    * Neither set: items were added, removed or reordered.
+
+    Static data has no items, its edits only ever have ``field`` set.
+    """
+
+    modality: DataModality
+    field: Optional[str] = None
+    item_index: Optional[int] = None
+
+
+def parse_dependency(ref: str) -> Dependency:
+    # `ref` is "modality.field" or just "modality".
+    modality, _, field = ref.partition(".")
+    if modality not in MODALITIES:
+        raise ValueError(f"Unknown modality in dependency '{ref}', must be one of {MODALITIES}")
+    return Dependency(modality=modality, field=field or None)  # type: ignore [arg-type]
+
+
+class DependencyGraph:
+    """The dependencies of the computed fields on the other fields, as declared by their ``depends_on``.
+
+    A computed field without ``depends_on`` depends on all the data of the sample. A temporal or event computed field
+    with ``item_local`` set depends only on the same-modality fields of its own item (time-step or event), otherwise
+    (the default) on those of all the items.
+
+    Args:
+        field_defs (FieldDefsCollection): The field definitions.
+    """
+
+    def __init__(self, field_defs: "FieldDefsCollection") -> None:
+        self.field_defs = field_defs
+        self.dependencies: Dict[FieldKey, List[Dependency]] = dict()
+        for modality in MODALITIES:
+            for name, fd in getattr(field_defs, modality).items():
+                if not fd.is_computed:
+                    continue
+                if fd.depends_on is None:
+                    self.dependencies[(modality, name)] = [Dependency(modality=m, field=None) for m in MODALITIES]
+                    continue
+                dependencies = [parse_dependency(ref) for ref in fd.depends_on]
+                for dependency in dependencies:
+                    if dependency.field is not None and dependency.field not in getattr(
+                        field_defs, dependency.modality
+                    ):
+                        raise ValueError(
+                            f"Computed field '{name}' depends on an unknown field: "
+                            f"'{dependency.modality}.{dependency.field}'"
+                        )
+                self.dependencies[(modality, name)] = dependencies
+        self.order = self._sort()
+
+    def _predecessors(self, key: FieldKey) -> Set[FieldKey]:
+        # The computed fields that must be computed before the field.
+        # NOTE: A dependency on a whole modality only waits for the computed fields that come before the field in the
+        # cascade order (and in the field defs order), as it always did, so that it does not make a cycle.
+        cascade = list(self.dependencies.keys())
+        predecessors: Set[FieldKey] = set()
+        for dependency in self.dependencies[key]:
+            if dependency.field is not None:
+                if (dependency.modality, dependency.field) in self.dependencies:
+                    predecessors.add((dependency.modality, dependency.field))
+            else:
+                predecessors.update(other for other in cascade[: cascade.index(key)] if other[0] == dependency.modality)
+        return predecessors
+
+    def _sort(self) -> List[FieldKey]:
+        # Topological sort, keeping the cascade order where the dependencies allow it.
+        predecessors = {key: self._predecessors(key) for key in self.dependencies}
+        order: List[FieldKey] = []
+        remaining = list(self.dependencies.keys())
+        while remaining:
+            ready = [key for key in remaining if predecessors[key].issubset(order)]
+            if not ready:
+                raise ValueError(f"Computed fields have circular dependencies: {[f'{m}.{f}' for m, f in remaining]}")
+            order.append(ready[0])
+            remaining.remove(ready[0])
+        return order
+
+    def _affected_indexes(self, key: FieldKey, edits: List[Edit], n_items: int) -> Set[int]:
+        modality, name = key
+        item_local = modality != "static" and getattr(self.field_defs, modality)[name].item_local
+        affected: Set[int] = set()
+        for edit in edits:
+            if (
+                modality != "static"
+                and edit.modality == modality
+                and edit.field is None
+                and edit.item_index is not None
+            ):
+                # New items get all their computed fields computed.
+                affected.add(edit.item_index)
+                continue
+            for dependency in self.dependencies[key]:
+                if dependency.modality != edit.modality:
+                    continue
+                if dependency.field is not None and edit.field is not None and dependency.field != edit.field:
+                    continue
+                if item_local and dependency.modality == modality:
+                    if edit.item_index is not None:
+                        affected.add(edit.item_index)
+                    elif edit.field is not None:
+                        return set(range(n_items))
+                    # Else only the items were added, removed or reordered, which does not affect item-local values.
+                else:
+                    return set(range(n_items))
+        return affected
+
+    def recompute(self, data_sample: DataSample, edits: Iterable[Edit], current_timestep: "TimeStep") -> List[Edit]:
+        """Recompute, in place, only the computed fields (and the items of them) affected by the ``edits``, in
+        dependency order. The edits of the computed values that changed are propagated to their dependents.
+
+        Args:
+            data_sample (DataSample): The sample, already modified.
+            edits (Iterable[Edit]): The modifications made to the sample, see `diff_samples`.
+            current_timestep (TimeStep): The currently selected time step, passed on to the static computations.
+                Temporal and event computations get the index of the item being computed.
+
+        Returns:
+            List[Edit]: The edits of the computed values that changed.
+        """
+        edits = list(edits)
+        computed_edits: List[Edit] = []
+        for key in self.order:
+            modality, name = key
+            fd = getattr(self.field_defs, modality)[name]
+            field_edits: List[Edit] = []
+            if modality == "static":
+                if self._affected_indexes(key, edits, n_items=1):
+                    value = fd.compute(data_sample, current_timestep)
+                    if name not in data_sample.static or data_sample.static[name] != value:
+                        data_sample.static[name] = value
+                        field_edits.append(Edit(modality=modality, field=name))
+            else:
+                items: List[Dict[str, Any]] = getattr(data_sample, modality)
+                for idx in sorted(self._affected_indexes(key, edits, n_items=len(items))):
+                    value = fd.compute(data_sample, idx)
+                    if name not in items[idx] or items[idx][name] != value:
+                        items[idx][name] = value
+                        field_edits.append(Edit(modality=modality, field=name, item_index=idx))
+            edits.extend(field_edits)
+            computed_edits.extend(field_edits)
+        return computed_edits
+
+
+def _changed_fields(old: Dict[str, Any], new: Dict[str, Any]) -> List[str]:
+    return [name for name, value in new.items() if name not in old or old[name] != value]
+
+
+def _diff_items(modality: DataModality, old: List[Dict[str, Any]], new: List[Dict[str, Any]]) -> List[Edit]:
+    # Time-steps are matched by their time index, so that they can be reordered. Events by their position.
+    if modality == "temporal":
+        old_by_key = {item[DEFAULTS.time_index_field]: item for item in old}
+        new_keys = [item[DEFAULTS.time_index_field] for item in new]
+    else:
+        old_by_key = dict(enumerate(old))
+        new_keys = list(range(len(new)))
+    edits: List[Edit] = []
+    if new_keys != list(old_by_key.keys()):
+        edits.append(Edit(modality=modality))
+    for idx, (key, item) in enumerate(zip(new_keys, new)):
+        old_item = old_by_key.get(key)
+        if old_item is None:
+            edits.append(Edit(modality=modality, item_index=idx))
+        else:
+            edits.extend(
+                Edit(modality=modality, field=name, item_index=idx) for name in _changed_fields(old_item, item)
+            )
+    return edits
+
+
+def diff_samples(old: DataSample, new: DataSample, modalities: Iterable[DataModality] = MODALITIES) -> List[Edit]:
+    """Get the edits that turn the ``old`` sample into the ``new`` one, for the given modalities."""
+    edits: List[Edit] = []
+    for modality in modalities:
+        if modality == "static":
+            edits.extend(Edit(modality="static", field=name) for name in _changed_fields(old.static, new.static))
+        else:
+            edits.extend(_diff_items(modality, getattr(old, modality), getattr(new, modality)))
+    return edits
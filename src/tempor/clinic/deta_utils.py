@@ -1,7 +1,9 @@
+import copy
 import io
 import os
+import threading
 import zipfile
-from typing import Any, Dict, List, Optional, Tuple, cast
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple, cast
 
 import streamlit as st
 from deta import Deta
@@ -10,8 +12,8 @@ from deta import _Drive as DetaDrive
 from loguru import logger
 from typing_extensions import Literal
 
-from . import field_def
-from .const import DataDefsCollectionDict, DataSample
+from . import cache, delta, field_def, predictions, storage, time_index
+from .const import DEFAULTS, DataDefsCollectionDict, DataModality, DataSample
 
 TakeVarsFrom = Literal["st_secrets", "env"]
 
@@ -51,46 +53,197 @@ def download_zipped_dir(drive: DetaDrive, zip_file: str = "data.zip", local_dir:
         logger.info("Downloading and extracting zip file finished")
 
 
-def get_all_sample_keys(db: DetaBase) -> List[str]:
-    # TODO: This is inefficient. Needs to be improved.
-    all_data = db.fetch()
-    # if all_data.count == 0:
-    #     raise RuntimeError("No data found")
-    if all_data.last is not None:
-        raise RuntimeError("Too many data rows. Supported max rows is 1000.")
-    return [example["key"] for example in all_data.items]
+def iter_sample_keys(db: storage.SampleStore, page_size: int = 1000) -> Iterator[str]:
+    # Follows the `last` cursor page by page, so only one page of keys is held in memory at a time.
+    backend = storage.as_backend(db)
+    last: Optional[str] = None
+    while True:
+        page = backend.fetch_keys(limit=page_size, last=last)
+        yield from page.keys
+        if page.last is None:
+            break
+        last = page.last
 
 
-def _sort_fields(sort_key: List[str], fields: Dict[str, Dict]) -> Dict[str, Dict]:
-    # Sort the fields in field_defs order (the fields in the DB are in random order).
-    sorted_fields: Dict[str, Any] = dict()
-    for key in sort_key:
-        sorted_fields[key] = fields[key]
-    return sorted_fields
+def fetch_sample_keys_page(
+    db: storage.SampleStore, page_size: int = 1000, last: Optional[str] = None
+) -> storage.FetchKeysResult:
+    return storage.as_backend(db).fetch_keys(limit=page_size, last=last)
 
 
-def _sort_fields_in_array(sort_key: List[str], array_of_fields: List[Dict[str, Dict]]) -> List[Dict[str, Dict]]:
-    sorted_array_of_fields: List[Dict[str, Dict]] = []
-    for fields in array_of_fields:
-        sorted_array_of_fields.append(_sort_fields(sort_key=sort_key, fields=fields))
-    return sorted_array_of_fields
+def get_all_sample_keys(db: storage.SampleStore, page_size: int = 1000) -> List[str]:
+    return list(iter_sample_keys(db, page_size=page_size))
 
 
-def get_sample(key: str, db: DetaBase, field_defs: "field_def.FieldDefsCollection") -> DataSample:
-    raw_data = cast(DataDefsCollectionDict, db.get(key))
+# Process-wide read-through cache of decoded samples, shared by all sessions. Entries are keyed by
+# `(backend namespace, sample key, sample version)`, the version is bumped by every write made through this module,
+# so that stale entries are never hit again (and age out of the LRU).
+# NOTE: Writes made by other processes are not seen, set a TTL with `configure_sample_cache` if that matters.
+SAMPLE_CACHE = cache.LRUCache(max_size=DEFAULTS.sample_cache_size, ttl=DEFAULTS.sample_cache_ttl)
 
-    static = _sort_fields(sort_key=list(field_defs.static.keys()), fields=raw_data["static"])
-    temporal = _sort_fields_in_array(sort_key=list(field_defs.temporal.keys()), array_of_fields=raw_data["temporal"])
-    event = _sort_fields_in_array(sort_key=list(field_defs.event.keys()), array_of_fields=raw_data["event"])
+_sample_versions: Dict[Tuple[str, str], int] = dict()
+_sample_versions_lock = threading.Lock()
 
-    static = field_def.process_db_to_input(field_defs=field_defs.static, data=static)
-    temporal = [field_def.process_db_to_input(field_defs=field_defs.temporal, data=x) for x in temporal]
-    event = [field_def.process_db_to_input(field_defs=field_defs.event, data=x) for x in event]
 
-    return DataSample(static=static, temporal=temporal, event=event)
+def configure_sample_cache(
+    max_size: int = DEFAULTS.sample_cache_size, ttl: Optional[float] = DEFAULTS.sample_cache_ttl
+) -> None:
+    SAMPLE_CACHE.configure(max_size=max_size, ttl=ttl)
 
 
-def add_empty_sample(db: DetaBase, key: str, field_defs: "field_def.FieldDefsCollection", current_timestep: Any):
+def get_sample_version(db: storage.SampleStore, key: str) -> int:
+    return _sample_versions.get((storage.as_backend(db).namespace, key), 0)
+
+
+def get_sample_version_key(db: storage.SampleStore, key: str) -> Tuple[str, str, int]:
+    """Identify the current version of the sample, e.g. to key the caches of what is made from it."""
+    backend = storage.as_backend(db)
+    return (backend.namespace, key, get_sample_version(backend, key))
+
+
+def invalidate_sample(db: storage.SampleStore, key: str) -> None:
+    version_key = (storage.as_backend(db).namespace, key)
+    with _sample_versions_lock:
+        _sample_versions[version_key] = _sample_versions.get(version_key, 0) + 1
+    predictions.invalidate_predictions(key)
+
+
+def _copy_sample(data_sample: DataSample) -> DataSample:
+    # The components modify the sample they are given in place, so the cached object must never be handed out.
+    copied = DataSample(
+        static=copy.deepcopy(data_sample.static),
+        temporal=copy.deepcopy(data_sample.temporal),
+        event=copy.deepcopy(data_sample.event),
+    )
+    # The time index of the cached sample is copied rather than built again.
+    time_index.attach_time_index(copied, time_index.get_time_index(data_sample).copy())
+    return copied
+
+
+def get_sample(
+    key: str,
+    db: storage.SampleStore,
+    field_defs: "field_def.FieldDefsCollection",
+    use_cache: bool = True,
+    modalities: Optional[Sequence[DataModality]] = None,
+    fields: Optional[Dict[DataModality, List[str]]] = None,
+    time_range: Optional[Tuple[Any, Any]] = None,
+) -> DataSample:
+    """Get the sample with the key.
+
+    Only a part of the sample can be asked for, e.g. for pages that show a summary of it: the ``modalities``, the
+    ``fields`` of some modalities, and the time-steps within ``time_range`` (inclusive bounds on the time index). The
+    rest of the sample is then left empty. The parts are read from the cached sample if it is cached. Else, if the
+    backend can read only these parts (see `storage.get_projected`), only they are read and decoded, and are not cached,
+    otherwise the whole sample is read, decoded and cached, and the parts are taken from it.
+    """
+    backend = storage.as_backend(db)
+    cache_key = get_sample_version_key(backend, key)
+    projected = modalities is not None or fields is not None or time_range is not None
+    if use_cache:
+        cached = SAMPLE_CACHE.get(cache_key)
+        if cached is not None:
+            if projected:
+                return _project_sample(cached, modalities=modalities, fields=fields, time_range=time_range)
+            return _copy_sample(cached)
+    if projected and hasattr(backend, "get_projected"):
+        return _get_sample_projected(
+            key=key, backend=backend, field_defs=field_defs, modalities=modalities, fields=fields, time_range=time_range
+        )
+
+    data_sample = _get_sample_uncached(key=key, backend=backend, field_defs=field_defs)
+    if projected:
+        # The whole item was read anyway, so the whole sample is cached for the next reads.
+        if use_cache:
+            SAMPLE_CACHE.put(cache_key, data_sample)
+        return _project_sample(data_sample, modalities=modalities, fields=fields, time_range=time_range)
+    if use_cache:
+        SAMPLE_CACHE.put(cache_key, data_sample)
+        return _copy_sample(data_sample)
+    return data_sample
+
+
+def _get_sample_uncached(
+    key: str, backend: storage.StorageBackend, field_defs: "field_def.FieldDefsCollection"
+) -> DataSample:
+    raw_data = cast(DataDefsCollectionDict, backend.get(key))
+    return decode_sample(raw_data=raw_data, field_defs=field_defs)
+
+
+def _project_sample(
+    data_sample: DataSample,
+    modalities: Optional[Sequence[DataModality]],
+    fields: Optional[Dict[DataModality, List[str]]],
+    time_range: Optional[Tuple[Any, Any]],
+) -> DataSample:
+    projection = storage.Projection(
+        modalities=tuple(modalities) if modalities is not None else storage.Projection().modalities,
+        fields=fields,
+        time_range=time_range,
+    )
+    item = storage.apply_projection(
+        dict(static=data_sample.static, temporal=data_sample.temporal, event=data_sample.event), projection
+    )
+    return DataSample(
+        static=copy.deepcopy(item.get("static", dict())),
+        temporal=copy.deepcopy(item.get("temporal", [])),
+        event=copy.deepcopy(item.get("event", [])),
+    )
+
+
+def _get_sample_projected(
+    key: str,
+    backend: storage.StorageBackend,
+    field_defs: "field_def.FieldDefsCollection",
+    modalities: Optional[Sequence[DataModality]],
+    fields: Optional[Dict[DataModality, List[str]]],
+    time_range: Optional[Tuple[Any, Any]],
+) -> DataSample:
+    if time_range is not None:
+        # The time range is filtered in the DB format.
+        time_index_def = field_defs.temporal[DEFAULTS.time_index_field]
+        time_range = (
+            time_index_def.process_input_to_db(time_range[0]),
+            time_index_def.process_input_to_db(time_range[1]),
+        )
+    projection = storage.Projection(
+        modalities=tuple(modalities) if modalities is not None else storage.Projection().modalities,
+        fields=fields,
+        time_range=time_range,
+    )
+    raw_data = storage.get_projected(backend, key, projection)
+    if raw_data is None:
+        raise KeyError(f"Sample not found: {key}")
+    codecs = field_def.get_codecs(field_defs)
+    decoded: Dict[str, Any] = dict()
+    for modality in projection.modalities:
+        codec = getattr(codecs, modality)
+        if fields is not None and modality in fields:
+            codec = codec.select(fields[modality])
+        if modality == "static":
+            decoded[modality] = codec.decode(raw_data.get(modality, dict()))
+        else:
+            decoded[modality] = codec.decode_many(raw_data.get(modality, []))
+    return DataSample(
+        static=decoded.get("static", dict()),
+        temporal=decoded.get("temporal", []),
+        event=decoded.get("event", []),
+    )
+
+
+def decode_sample(raw_data: DataDefsCollectionDict, field_defs: "field_def.FieldDefsCollection") -> DataSample:
+    # NOTE: The codecs output the fields in field defs order (the fields in the DB are in random order).
+    codecs = field_def.get_codecs(field_defs)
+    return DataSample(
+        static=codecs.static.decode(raw_data["static"]),
+        temporal=codecs.temporal.decode_many(raw_data["temporal"]),
+        event=codecs.event.decode_many(raw_data["event"]),
+    )
+
+
+def add_empty_sample(
+    db: storage.SampleStore, key: str, field_defs: "field_def.FieldDefsCollection", current_timestep: Any
+) -> Dict[str, Any]:
     # Get non-computed defaults.
     static = field_def.get_default(field_defs=field_defs.static, modality="static") if field_defs.static else dict()
     temporal_0 = (
@@ -139,20 +292,53 @@ def add_empty_sample(db: DetaBase, key: str, field_defs: "field_def.FieldDefsCol
     data_sample_for_db = dict(DataSample(static=static, temporal=temporal, event=event))
 
     logger.info(f"Adding new sample to db.\nkey: {key}\ndata:\n{data_sample_for_db}")
-    db.put(data_sample_for_db, key=key)
+    storage.as_backend(db).put(data_sample_for_db, key=key)
+    invalidate_sample(db, key)
+    return data_sample_for_db
 
 
-def delete_sample(db: DetaBase, key: str):
+def delete_sample(db: storage.SampleStore, key: str):
     logger.info(f"Deleting sample from db.\nkey: {key}")
-    db.delete(key=key)
+    storage.as_backend(db).delete(key=key)
+    invalidate_sample(db, key)
 
 
-def update_sample(db: DetaBase, key: str, data_sample: DataSample, field_defs: "field_def.FieldDefsCollection"):
-    static = field_def.process_input_to_db(field_defs=field_defs.static, data=data_sample.static)
-    temporal = [field_def.process_input_to_db(field_defs=field_defs.temporal, data=x) for x in data_sample.temporal]
-    event = [field_def.process_input_to_db(field_defs=field_defs.event, data=x) for x in data_sample.event]
+def encode_sample(data_sample: DataSample, field_defs: "field_def.FieldDefsCollection") -> Dict[str, Any]:
+    codecs = field_def.get_codecs(field_defs)
+    return dict(
+        static=codecs.static.encode(data_sample.static),
+        temporal=codecs.temporal.encode_many(data_sample.temporal),
+        event=codecs.event.encode_many(data_sample.event),
+    )
 
-    data_sample_processed = dict(DataSample(static=static, temporal=temporal, event=event))
+
+def update_sample(
+    db: storage.SampleStore, key: str, data_sample: DataSample, field_defs: "field_def.FieldDefsCollection"
+):
+    data_sample_processed = encode_sample(data_sample=data_sample, field_defs=field_defs)
 
     logger.info(f"Updating sample sample in db.\nkey: {key}\ndata:\n{data_sample_processed}")
-    db.put(dict(data_sample_processed), key=key)
+    storage.as_backend(db).put(dict(data_sample_processed), key=key)
+    invalidate_sample(db, key)
+
+
+def update_sample_partially(
+    db: storage.SampleStore,
+    key: str,
+    data_sample: DataSample,
+    field_defs: "field_def.FieldDefsCollection",
+    original: Dict[str, Any],
+) -> List[delta.Change]:
+    """Write only the parts of the sample that differ from ``original``, the sample as stored in the DB (as returned
+    by `encode_sample`). Nothing is written if there are no differences. Returns the changes written.
+    """
+    data_sample_processed = encode_sample(data_sample=data_sample, field_defs=field_defs)
+    changes = delta.diff_records(old=original, new=data_sample_processed)
+    if not changes:
+        logger.info(f"Sample unchanged, not updating in db.\nkey: {key}")
+        return changes
+
+    logger.info(f"Updating sample partially in db.\nkey: {key}\nchanges:\n{changes}")
+    storage.as_backend(db).update(key, changes=changes, data=data_sample_processed)
+    invalidate_sample(db, key)
+    return changes
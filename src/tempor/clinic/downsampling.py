@@ -0,0 +1,96 @@
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from .const import DEFAULTS
+
+METHODS = ("lttb", "min_max")
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """Select ``n_out`` points of the series with the Largest-Triangle-Three-Buckets algorithm, which keeps the shape
+    of the line (including its peaks). Returns the sorted indices of the points kept, the first and last included.
+
+    The ``x`` values must be sorted. The bucket averages are computed at once, only the choice of the point of each
+    bucket (which depends on the point chosen in the previous bucket) loops, once per bucket.
+    """
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    x = x.astype(float) - float(x[0])  # Shifted, for the precision of the sums (e.g. of nanosecond timestamps).
+    y = y.astype(float)
+    # The n - 2 middle points are split into n_out - 2 buckets, each of at least one point.
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    sum_x = np.concatenate(([0.0], np.cumsum(x)))
+    sum_y = np.concatenate(([0.0], np.cumsum(y)))
+    counts = np.diff(edges)
+    # The average point of each bucket, and the last point after the last bucket.
+    average_x = np.append((sum_x[edges[1:]] - sum_x[edges[:-1]]) / counts, x[-1])
+    average_y = np.append((sum_y[edges[1:]] - sum_y[edges[:-1]]) / counts, y[-1])
+
+    indices = np.empty(n_out, dtype=np.int64)
+    indices[0], indices[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        # Twice the area of the triangles of the previous point, each point of the bucket and the next average point.
+        areas = np.abs(
+            (x[a] - average_x[i + 1]) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (average_y[i + 1] - y[a])
+        )
+        a = start + int(np.argmax(areas))
+        indices[i + 1] = a
+    return indices
+
+
+def min_max_indices(y: np.ndarray, n_out: int) -> np.ndarray:
+    """Split the series into ``n_out // 2`` buckets of consecutive points, and keep the minimum and maximum of each
+    (and the first and last points). Returns the sorted indices of the points kept, at most ``n_out + 2``.
+    """
+    n = len(y)
+    if n_out >= n or n_out < 2:
+        return np.arange(n)
+    n_buckets = n_out // 2
+    buckets = (np.arange(n) * n_buckets) // n
+    # Sorted by bucket then value: the first and last points of each bucket are its minimum and maximum.
+    order = np.lexsort((y, buckets))
+    starts = np.searchsorted(buckets[order], np.arange(n_buckets))
+    ends = np.append(starts[1:], n) - 1
+    return np.unique(np.concatenate((order[starts], order[ends], [0, n - 1])))
+
+
+def _index_as_float(index: pd.Index) -> np.ndarray:
+    if pd.api.types.is_datetime64_any_dtype(index):
+        return index.asi8.astype(float)
+    try:
+        return np.asarray(index, dtype=float)
+    except (TypeError, ValueError):
+        # E.g. dates as objects, use the positions.
+        return np.arange(len(index), dtype=float)
+
+
+def downsample(
+    df: pd.DataFrame,
+    column: str,
+    max_points: Optional[int] = DEFAULTS.chart_max_points,
+    method: str = DEFAULTS.downsampling_method,
+) -> pd.DataFrame:
+    """Keep about ``max_points`` rows of the dataframe (indexed by time) for plotting ``column``, selected with
+    ``method`` (``"lttb"``, see `lttb_indices`, or ``"min_max"``, see `min_max_indices`).
+
+    The dataframe is returned as is if it has at most ``max_points`` rows, or ``max_points`` is `None`. The rows where
+    ``column`` is missing are dropped. Non-numeric columns are downsampled by taking evenly spaced rows.
+    """
+    if method not in METHODS:
+        raise ValueError(f"Unknown downsampling method '{method}', expected one of {METHODS}")
+    if max_points is None or len(df) <= max_points:
+        return df
+    if not (pd.api.types.is_numeric_dtype(df[column]) or pd.api.types.is_bool_dtype(df[column])):
+        return df.iloc[np.unique(np.linspace(0, len(df) - 1, max_points).astype(int))]
+    df = df[df[column].notna()]
+    y = df[column].to_numpy(dtype=float)
+    if method == "lttb":
+        indices = lttb_indices(_index_as_float(df.index), y, max_points)
+    else:
+        indices = min_max_indices(y, max_points)
+    return df.iloc[indices]
@@ -0,0 +1,213 @@
+import argparse
+import glob
+import json
+import os
+from typing import TYPE_CHECKING, Any, Dict, List, NamedTuple, Optional, Sequence, cast
+
+from loguru import logger
+
+from . import cli, deta_utils, field_def, storage
+from .const import DataDefsCollectionDict, DataModality, DataSample
+
+if TYPE_CHECKING:  # pragma: no cover
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+MODALITIES: Sequence[DataModality] = ("static", "temporal", "event")
+CURSOR_FILE = "_export_cursor.json"
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as ex:
+        raise ImportError(
+            "Exporting to Parquet requires `pyarrow`, install it with `pip install temporai-clinic[io]`"
+        ) from ex
+    return pa, pq
+
+
+def get_arrow_schema(field_defs: Dict[str, field_def.FieldDef], key_column: str = "key") -> "pa.Schema":
+    """Get the Arrow schema of the exported data of a modality: the sample key, followed by the fields."""
+    pa, _ = _import_pyarrow()
+    arrow_types = {
+        "int": pa.int64(),
+        "float": pa.float64(),
+        "categorical": pa.string(),
+        "binary": pa.bool_(),
+        "str": pa.string(),
+        "date": pa.date32(),
+    }
+    return pa.schema(
+        [pa.field(key_column, pa.string(), nullable=False)]
+        + [pa.field(name, arrow_types[fd.data_type]) for name, fd in field_defs.items()]
+    )
+
+
+class ExportResult(NamedTuple):
+    n_samples: int
+    last_key: Optional[str]
+
+
+class _ModalityWriter:
+    # Buffers the rows of one modality column-wise and writes them as row groups of part files in `directory`.
+
+    def __init__(self, directory: str, schema: "pa.Schema") -> None:
+        _, self.pq = _import_pyarrow()
+        self.directory = directory
+        self.schema = schema
+        self.columns: Dict[str, List[Any]] = {name: [] for name in schema.names}
+        self.n_buffered = 0
+        self.writer: Optional["pq.ParquetWriter"] = None
+        self.tmp_path = ""
+        os.makedirs(directory, exist_ok=True)
+        # Leftovers of an interrupted export are not valid Parquet files (no footer), and are rewritten on resume.
+        for path in glob.glob(os.path.join(directory, "*.tmp")):
+            os.remove(path)
+        self.next_part = len(glob.glob(os.path.join(directory, "part-*.parquet")))
+
+    def add(self, key: str, record: Dict[str, Any]) -> None:
+        for name, values in self.columns.items():
+            values.append(key if name == self.schema.names[0] else record[name])
+        self.n_buffered += 1
+
+    def flush_row_group(self) -> None:
+        pa, _ = _import_pyarrow()
+        if self.n_buffered == 0:
+            return
+        if self.writer is None:
+            self.tmp_path = os.path.join(self.directory, f"part-{self.next_part:05d}.parquet.tmp")
+            self.writer = self.pq.ParquetWriter(self.tmp_path, self.schema)
+        self.writer.write_table(pa.Table.from_pydict(self.columns, schema=self.schema))
+        self.columns = {name: [] for name in self.schema.names}
+        self.n_buffered = 0
+
+    def close_part(self) -> None:
+        self.flush_row_group()
+        if self.writer is not None:
+            self.writer.close()
+            os.replace(self.tmp_path, self.tmp_path[: -len(".tmp")])
+            self.writer = None
+            self.next_part += 1
+
+
+def _read_cursor(out_dir: str) -> Optional[str]:
+    path = os.path.join(out_dir, CURSOR_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)["last_key"]
+
+
+def _write_cursor(out_dir: str, last_key: Optional[str], completed: bool) -> None:
+    path = os.path.join(out_dir, CURSOR_FILE)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump({"last_key": last_key, "completed": completed}, f)
+    os.replace(path + ".tmp", path)
+
+
+def export_samples(
+    db: storage.SampleStore,
+    field_defs: field_def.FieldDefsCollection,
+    out_dir: str,
+    resume: bool = False,
+    page_size: int = 100,
+    row_group_size: int = 100_000,
+    row_groups_per_file: int = 10,
+    key_column: str = "key",
+) -> ExportResult:
+    """Export all samples to three Parquet datasets, ``<out_dir>/static``, ``<out_dir>/temporal`` and
+    ``<out_dir>/event`` (in long format, one row per time-step or event, with the sample key in ``key_column``).
+
+    The samples are fetched ``page_size`` at a time, and the rows are written out every ``row_group_size`` rows of
+    any modality, so memory use does not grow with the number of samples. Every ``row_groups_per_file`` row groups,
+    the part files are completed and the key of the last sample written is saved. With ``resume=True``, the export
+    continues after that key, adding new part files to the datasets. An export directory with part files but no saved
+    key cannot be resumed.
+
+    Returns:
+        ExportResult: The number of samples exported (in this run) and the key of the last one.
+    """
+    backend = storage.as_backend(db)
+    last_key = _read_cursor(out_dir) if resume else None
+    has_parts = bool(glob.glob(os.path.join(out_dir, "*", "part-*.parquet")))
+    if resume and last_key is not None:
+        logger.info(f"Resuming export after key: {last_key}")
+    elif has_parts and not resume:
+        raise FileExistsError(f"Export directory {out_dir} is not empty, pass `resume=True` to continue an export")
+    elif has_parts:
+        # NOTE: Without the cursor, the samples already exported are unknown, and would be exported again.
+        raise FileExistsError(f"Cannot resume the export in {out_dir}, it has part files but no `{CURSOR_FILE}`")
+
+    writers = {
+        modality: _ModalityWriter(
+            os.path.join(out_dir, modality), get_arrow_schema(getattr(field_defs, modality), key_column=key_column)
+        )
+        for modality in MODALITIES
+        if getattr(field_defs, modality)
+    }
+
+    def flush() -> None:
+        for writer in writers.values():
+            writer.flush_row_group()
+
+    def close_parts(completed: bool) -> None:
+        for writer in writers.values():
+            writer.close_part()
+        _write_cursor(out_dir, last_key=last_key, completed=completed)
+
+    n_samples = 0
+    n_row_groups = 0
+    cursor = last_key
+    while True:
+        page = backend.fetch(limit=page_size, last=cursor)
+        for item in page.items:
+            data_sample: DataSample = deta_utils.decode_sample(
+                raw_data=cast(DataDefsCollectionDict, item), field_defs=field_defs
+            )
+            for modality, writer in writers.items():
+                if modality == "static":
+                    writer.add(item["key"], data_sample.static)
+                else:
+                    for record in getattr(data_sample, modality):
+                        writer.add(item["key"], record)
+            last_key = item["key"]
+            n_samples += 1
+            if any(writer.n_buffered >= row_group_size for writer in writers.values()):
+                flush()
+                n_row_groups += 1
+                if n_row_groups % row_groups_per_file == 0:
+                    close_parts(completed=False)
+                    logger.info(f"Exported {n_samples} samples, up to key: {last_key}")
+        if page.last is None:
+            break
+        cursor = page.last
+
+    close_parts(completed=True)
+    logger.info(f"Export finished, {n_samples} samples exported")
+    return ExportResult(n_samples=n_samples, last_key=last_key)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Export all samples to Parquet datasets.")
+    cli.add_field_defs_argument(parser)
+    parser.add_argument("--out-dir", required=True, help="Directory to write the static/temporal/event datasets to")
+    parser.add_argument("--resume", action="store_true", help="Continue an interrupted export in --out-dir")
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--row-group-size", type=int, default=100_000)
+    cli.add_db_arguments(parser)
+    args = parser.parse_args(argv)
+
+    export_samples(
+        db=cli.db_from_args(args),
+        field_defs=cli.load_field_defs(args.field_defs),
+        out_dir=args.out_dir,
+        resume=args.resume,
+        page_size=args.page_size,
+        row_group_size=args.row_group_size,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,29 @@
 import abc
 import datetime
-from typing import Any, Callable, ClassVar, Dict, List, NamedTuple, Optional, Type, Union, cast
-
+import hashlib
+from typing import (
+    Any,
+    Callable,
+    ClassVar,
+    Dict,
+    FrozenSet,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+    Type,
+    Union,
+    cast,
+)
+
+import numpy as np
 import streamlit as st
 from loguru import logger
-from pydantic import BaseModel
+from pydantic import BaseModel, PrivateAttr
 from typing_extensions import Literal
 
+from tempor.clinic import cache, dependencies, predictions
 from tempor.clinic.const import DEFAULTS, STATE_KEYS, DataDefsCollectionDict, DataModality, DataSample
 
 DataType = Literal["int", "float", "categorical", "binary", "str", "date"]
@@ -352,13 +369,61 @@ class DateTimeIndexDef(DateDef, TimeIndexDef):
         return value + datetime.timedelta(days=1)
 
 
+_NOT_COMPUTED = object()
+
+# Process-wide memo of the results of the computed fields that set `memoize`, shared by all sessions and kept when the
+# field defs are parsed again. Keyed by `(definition, inputs)`, see `ComputedDef.definition_key` and
+# `ComputedDef.fingerprint`.
+_COMPUTED_MEMO = cache.LRUCache(max_size=DEFAULTS.computed_memo_size)
+
+
+def configure_computed_memo(max_size: int = DEFAULTS.computed_memo_size) -> None:
+    _COMPUTED_MEMO.configure(max_size=max_size)
+
+
+def get_memo_stats() -> cache.CacheStats:
+    """Get the hit/miss statistics of the memo of the computed fields."""
+    return _COMPUTED_MEMO.stats()
+
+
+def clear_memo() -> None:
+    _COMPUTED_MEMO.clear()
+
+
 class ComputedDef(FieldDef):
+    """A field whose value is computed by ``computation(data_sample, current_timestep)``.
+
+    For static fields, ``current_timestep`` is the time-step selected in the app. For temporal and event fields, it is
+    the index of the item (time-step or event) being computed. When an edit affects other items than the selected one
+    (e.g. a static field they depend on), those items are recomputed too, each with its own index, so a temporal or
+    event computation may be called for any item, not only the selected one.
+    """
+
     is_computed: ClassVar[bool] = True
 
     computation: Callable[[DataSample, TimeStep], Any]
+    # The fields the computation uses, as "modality.field" or "modality" (any field), e.g. ["static.age", "temporal"].
+    # If `None`, the field is recomputed whenever any data of the sample changes.
+    depends_on: Optional[List[str]] = None
+    # Temporal and event fields: set to `True` if the value of an item only depends on the same-modality fields of
+    # *that item* (e.g. `hr * weight` of the time-step), so that an edit of one item only recomputes that item. Leave it
+    # `False` if the computation reads other items (e.g. the previous time-step, or a running total), then any
+    # same-modality edit recomputes all the items.
+    item_local: bool = False
+
+    # Cache the results of the computation (in the process-wide memo, see `configure_computed_memo`), keyed by a
+    # fingerprint of its `depends_on` fields. Only done if `depends_on` is declared (hashing the whole sample for each
+    # item of a long history would cost more than most computations), and never for `impure` computations.
+    memoize: bool = False
+    impure: bool = False
 
     hide_computed_icon: bool = False
 
+    # The computed fields of each modality, left out of the inputs of whole-modality dependencies: they are derived from
+    # the other fields, and the stale value of the field itself would otherwise change its own inputs. Set by
+    # `parse_field_defs`.
+    _computed_fields: Dict[str, FrozenSet[str]] = PrivateAttr(default_factory=dict)
+
     def _render_widget(self, value: Any) -> Any:
         return st.markdown(
             f"{self.get_full_label()}:<br/>`Computed automatically"
@@ -380,7 +445,51 @@ class ComputedDef(FieldDef):
         Returns:
             Any: The resultant computed value.
         """
-        return self.computation(data_sample, current_timestep)
+        if not self.memoize or self.impure or self.depends_on is None:
+            return self.computation(data_sample, current_timestep)
+        memo_key = (self.definition_key(), self.fingerprint(data_sample, current_timestep))
+        value = _COMPUTED_MEMO.get(memo_key, _NOT_COMPUTED)
+        if value is _NOT_COMPUTED:
+            value = self.computation(data_sample, current_timestep)
+            _COMPUTED_MEMO.put(memo_key, value)
+        return value
+
+    def definition_key(self) -> Tuple[Any, ...]:
+        """Identify the definition of the computation, so that equal definitions (e.g. of field defs parsed again) share
+        their memoized results, see `predictions.callback_id` for how the computation itself is identified."""
+        return (
+            self.data_modality,
+            self.feature_name,
+            predictions.callback_id(self.computation),
+            tuple(self.depends_on) if self.depends_on is not None else None,
+            self.item_local,
+        )
+
+    def _get_inputs(self, data_sample: DataSample, current_timestep: TimeStep) -> Any:
+        if self.depends_on is None:
+            return (data_sample.static, data_sample.temporal, data_sample.event, current_timestep)
+        inputs: List[Any] = []
+        item_local = self.item_local and self.data_modality != "static"
+        for dependency in (dependencies.parse_dependency(ref) for ref in self.depends_on):
+            if dependency.modality == "static":
+                records = [data_sample.static]
+            elif item_local and dependency.modality == self.data_modality:
+                # The value only depends on the item being computed, not on its position.
+                records = [getattr(data_sample, dependency.modality)[current_timestep]]
+            else:
+                records = getattr(data_sample, dependency.modality)
+            if dependency.field is None:
+                excluded = self._computed_fields.get(dependency.modality, frozenset())
+                inputs.append([sorted(x for x in record.items() if x[0] not in excluded) for record in records])
+            else:
+                inputs.append([record.get(dependency.field) for record in records])
+        if not item_local:
+            inputs.append(current_timestep)
+        return inputs
+
+    def fingerprint(self, data_sample: DataSample, current_timestep: TimeStep) -> bytes:
+        """Get a hash of the inputs of the computation, the key of its memoized results."""
+        return hashlib.blake2b(repr(self._get_inputs(data_sample, current_timestep)).encode(), digest_size=16).digest()
 
     def get_full_label(self) -> str:
         label = self.readable_name
@@ -478,6 +587,198 @@ def _parse_field_defs_dict(field_defs: Dict[str, Dict], data_modality: DataModal
     return parsed
 
 
+def _decode_date(value: str) -> datetime.date:
+    # Same as `DateDef._default_transform_db_to_input`, with a fast path for the plain "YYYY-MM-DD" format.
+    if len(value) == 10:
+        return datetime.date.fromisoformat(value)
+    return datetime.datetime.fromisoformat(value).date()
+
+
+def _encode_date(value: datetime.date) -> str:
+    return value.strftime("%Y-%m-%d")
+
+
+# The default transforms of the built-in field defs, and equivalent plain functions to call instead.
+_FAST_DB_TO_INPUT: Dict[Callable, Callable] = {
+    IntDef._default_transform_db_to_input: int,
+    FloatDef._default_transform_db_to_input: float,
+    CategoricalDef._default_transform_db_to_input: str,
+    BinaryDef._default_transform_db_to_input: bool,
+    StrDef._default_transform_db_to_input: str,
+    DateDef._default_transform_db_to_input: _decode_date,
+}
+_FAST_INPUT_TO_DB: Dict[Callable, Callable] = {
+    IntDef._default_transform_input_to_db: int,
+    FloatDef._default_transform_input_to_db: float,
+    CategoricalDef._default_transform_input_to_db: str,
+    BinaryDef._default_transform_input_to_db: bool,
+    StrDef._default_transform_input_to_db: str,
+    DateDef._default_transform_input_to_db: _encode_date,
+}
+# Converters that can be applied to a whole column of numbers at once by a NumPy cast.
+_VECTORIZABLE: Dict[Callable, Any] = {int: np.int64, float: np.float64, bool: np.bool_}
+
+
+def _decode_date_column(values: List[Any]) -> Optional[List[Any]]:
+    array = np.array(values, dtype="datetime64[D]")
+    # NaT (e.g. from `None`) is left to the converter, which raises for it as for a single value.
+    return None if np.isnat(array).any() else array.tolist()
+
+
+_EPOCH_ORDINAL = datetime.date(1970, 1, 1).toordinal()
+
+
+def _encode_date_column(values: List[Any]) -> Optional[List[Any]]:
+    # NOTE: Going through the day ordinals is several times faster than NumPy's conversion of date objects.
+    ordinals = np.fromiter(map(datetime.date.toordinal, values), dtype=np.int64, count=len(values))
+    return np.datetime_as_string((ordinals - _EPOCH_ORDINAL).astype("datetime64[D]")).tolist()
+
+
+def _str_column(values: List[Any]) -> Optional[List[Any]]:
+    array = np.asarray(values)
+    # NOTE: Only a column of strings without NUL characters, which NumPy would strip from the end of the strings.
+    if array.dtype.kind == "U" and not np.char.endswith(array, "\x00").any():
+        return array.tolist()
+    return None
+
+
+# Converters that have a whole-column equivalent, which returns `None` for the columns it cannot convert.
+_COLUMN_CONVERTERS: Dict[Callable, Callable[[List[Any]], Optional[List[Any]]]] = {
+    _decode_date: _decode_date_column,
+    _encode_date: _encode_date_column,
+    str: _str_column,
+}
+
+
+def _compose(transform: Optional[Callable], converter: Callable) -> Callable:
+    if transform is None:
+        return converter
+    return lambda value: converter(transform(value))
+
+
+def _convert_column(converter: Callable, values: List[Any]) -> List[Any]:
+    if not values:
+        return []
+    dtype = _VECTORIZABLE.get(converter)
+    if dtype is not None:
+        array = np.asarray(values)
+        # Only cast numbers, anything else (e.g. strings or `None`) goes through the converter as usual.
+        if array.dtype.kind in "biuf":
+            return array.astype(dtype).tolist()
+    column_converter = _COLUMN_CONVERTERS.get(converter)
+    if column_converter is not None:
+        try:
+            converted = column_converter(values)
+        except (TypeError, ValueError):
+            converted = None
+        if converted is not None:
+            return converted
+    return list(map(converter, values))
+
+
+class RecordCodec:
+    """Converts the records of one modality between the DB and the input formats, like `process_db_to_input` and
+    `process_input_to_db`, but with the conversion function of each field resolved once, when the codec is compiled.
+
+    Lists of records (time-steps, events) are converted column by column, casting whole columns of numbers at once.
+
+    Args:
+        field_defs (Dict[str, FieldDef]): The field definitions of the modality.
+    """
+
+    def __init__(self, field_defs: Dict[str, FieldDef]) -> None:
+        self.field_names: Tuple[str, ...] = tuple(field_defs.keys())
+        self.decoders: Tuple[Callable, ...] = tuple(
+            _compose(
+                fd.transform_db_to_input,
+                _FAST_DB_TO_INPUT.get(type(fd)._default_transform_db_to_input, fd._default_transform_db_to_input),
+            )
+            for fd in field_defs.values()
+        )
+        self.encoders: Tuple[Callable, ...] = tuple(
+            _compose(
+                fd.transform_input_to_db,
+                _FAST_INPUT_TO_DB.get(type(fd)._default_transform_input_to_db, fd._default_transform_input_to_db),
+            )
+            for fd in field_defs.values()
+        )
+
+    def select(self, field_names: Sequence[str]) -> "RecordCodec":
+        """A codec of only the given fields (in the order of this codec)."""
+        selected = [i for i, name in enumerate(self.field_names) if name in field_names]
+        codec = RecordCodec.__new__(RecordCodec)
+        codec.field_names = tuple(self.field_names[i] for i in selected)
+        codec.decoders = tuple(self.decoders[i] for i in selected)
+        codec.encoders = tuple(self.encoders[i] for i in selected)
+        return codec
+
+    @staticmethod
+    def _convert(field_names: Tuple[str, ...], converters: Tuple[Callable, ...], record: Dict) -> Dict:
+        return {name: converter(record[name]) for name, converter in zip(field_names, converters)}
+
+    @staticmethod
+    def _convert_many(
+        field_names: Tuple[str, ...], converters: Tuple[Callable, ...], records: List[Dict]
+    ) -> List[Dict]:
+        if not field_names:
+            return [dict() for _ in records]
+        columns = [
+            _convert_column(converter, [record[name] for record in records])
+            for name, converter in zip(field_names, converters)
+        ]
+        return [dict(zip(field_names, row)) for row in zip(*columns)]
+
+    def decode(self, record: Dict) -> Dict:
+        return self._convert(self.field_names, self.decoders, record)
+
+    def encode(self, record: Dict) -> Dict:
+        return self._convert(self.field_names, self.encoders, record)
+
+    def decode_many(self, records: List[Dict]) -> List[Dict]:
+        return self._convert_many(self.field_names, self.decoders, records)
+
+    def encode_many(self, records: List[Dict]) -> List[Dict]:
+        return self._convert_many(self.field_names, self.encoders, records)
+
+
+class CodecsCollection(NamedTuple):
+    static: RecordCodec
+    temporal: RecordCodec
+    event: RecordCodec
+
+
+def compile_codecs(field_defs: FieldDefsCollection) -> CodecsCollection:
+    return CodecsCollection(
+        static=RecordCodec(field_defs.static),
+        temporal=RecordCodec(field_defs.temporal),
+        event=RecordCodec(field_defs.event),
+    )
+
+
+# What is compiled from the field defs collections (their codecs and dependency graph), by kind and collection. The collection is kept
+# in the entry, so that another collection that gets the same `id` later does not hit it.
+_COMPILED_CACHE = cache.LRUCache(max_size=32)
+
+
+def _get_compiled(field_defs: FieldDefsCollection, kind: str, compile_fn: Callable[[FieldDefsCollection], Any]) -> Any:
+    cache_key = (kind, id(field_defs))
+    entry = _COMPILED_CACHE.get(cache_key)
+    if entry is None or entry[0] is not field_defs:
+        entry = (field_defs, compile_fn(field_defs))
+        _COMPILED_CACHE.put(cache_key, entry)
+    return entry[1]
+
+
+def get_codecs(field_defs: FieldDefsCollection) -> CodecsCollection:
+    """Get the codecs of the collection, compiled once per collection."""
+    return _get_compiled(field_defs, "codecs", compile_codecs)
+
+
+def get_dependency_graph(field_defs: FieldDefsCollection) -> dependencies.DependencyGraph:
+    """Get the dependency graph of the computed fields of the collection, built once per collection."""
+    return _get_compiled(field_defs, "dependency_graph", dependencies.DependencyGraph)
+
+
 def parse_field_defs(field_defs_raw: DataDefsCollectionDict) -> FieldDefsCollection:
     if "temporal" in field_defs_raw:
         if DEFAULTS.time_index_field not in field_defs_raw["temporal"]:
@@ -487,7 +788,7 @@ def parse_field_defs(field_defs_raw: DataDefsCollectionDict) -> FieldDefsCollect
             or field_defs_raw["temporal"][DEFAULTS.time_index_field]["is_time_index"] is False
         ):
             raise ValueError("'time_index' field def must have 'is_time_index' set to True")
-    return FieldDefsCollection(
+    field_defs = FieldDefsCollection(
         static=(
             _parse_field_defs_dict(field_defs=field_defs_raw["static"], data_modality="static")
             if "static" in field_defs_raw
@@ -504,6 +805,18 @@ def parse_field_defs(field_defs_raw: DataDefsCollectionDict) -> FieldDefsCollect
             else dict()
         ),
     )
+    computed_fields = {
+        modality: frozenset(name for name, fd in getattr(field_defs, modality).items() if fd.is_computed)
+        for modality in ("static", "temporal", "event")
+    }
+    for modality in ("static", "temporal", "event"):
+        for fd in getattr(field_defs, modality).values():
+            if isinstance(fd, ComputedDef):
+                fd._computed_fields = computed_fields  # pylint: disable=protected-access
+    # Compiled ahead of the first use.
+    get_codecs(field_defs)
+    get_dependency_graph(field_defs)
+    return field_defs
 
 
 def get_default(
@@ -558,25 +871,43 @@ def update(
     data_sample: DataSample,
     current_timestep: TimeStep,
     computed_only: bool = False,
+    skip_computed: bool = False,
+    write: bool = True,
 ) -> Dict[str, Dict]:
+    # NOTE: With `skip_computed`, the computed fields keep their current values, for them to be recomputed
+    # incrementally afterwards, see `dependencies.DependencyGraph.recompute`. With `write=False` (only with
+    # `skip_computed`), the new values are returned without being written to `data_sample`, e.g. to validate them first.
     data_fields = dict()
 
     if computed_only is False:
-        # Update non-computed fields:
-        for field_name, field_def in field_defs.items():
-            key = get_widget_st_key(field_def)
-            if not field_def.is_computed:
-                data_fields[field_name] = session_state[key]
-
         if modality == "static":
-            data_sample.static = data_fields
+            previous = data_sample.static
         elif modality == "temporal":
-            data_sample.temporal[current_timestep] = data_fields  # pyright: ignore
+            previous = data_sample.temporal[current_timestep]  # pyright: ignore
         elif modality == "event":
             # TODO: This is to be revised.
-            data_sample.event[current_timestep] = data_fields  # pyright: ignore
+            previous = data_sample.event[current_timestep]  # pyright: ignore
         else:
             raise ValueError(f"Unknown modality encountered: {modality}")
+
+        # Update non-computed fields:
+        for field_name, field_def in field_defs.items():
+            key = get_widget_st_key(field_def)
+            if not field_def.is_computed:
+                data_fields[field_name] = session_state[key]
+            elif skip_computed:
+                data_fields[field_name] = previous.get(field_name)
+
+        if write:
+            if modality == "static":
+                data_sample.static = data_fields
+            elif modality == "temporal":
+                data_sample.temporal[current_timestep] = data_fields  # pyright: ignore
+            elif modality == "event":
+                # TODO: This is to be revised.
+                data_sample.event[current_timestep] = data_fields  # pyright: ignore
+            else:
+                raise ValueError(f"Unknown modality encountered: {modality}")
     else:
         if modality == "static":
             data_fields = data_sample.static
@@ -588,6 +919,9 @@ def update(
         else:
             raise ValueError(f"Unknown modality encountered: {modality}")
 
+    if skip_computed:
+        return data_fields
+
     # Update computed fields:
     for field_name, field_def in field_defs.items():
         if field_def.is_computed:
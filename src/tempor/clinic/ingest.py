@@ -0,0 +1,284 @@
+import argparse
+import concurrent.futures
+import itertools
+import os
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Set, Tuple
+
+import pandas as pd
+from loguru import logger
+
+from . import cli, deta_utils, field_def, storage
+from .const import DEFAULTS, DataModality, DataSample
+
+TRUE_STRINGS = ("true", "1", "yes", "y")
+FALSE_STRINGS = ("false", "0", "no", "n")
+
+
+def read_table(path: str) -> pd.DataFrame:
+    """Read a CSV or Parquet file into a dataframe, depending on its extension."""
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".csv":
+        return pd.read_csv(path)
+    elif extension in (".parquet", ".pq"):
+        # NOTE: Requires `pyarrow` (or `fastparquet`), see the `io` extra.
+        return pd.read_parquet(path)
+    else:
+        raise ValueError(f"Unsupported table file extension: '{extension}', expected .csv, .parquet or .pq")
+
+
+def _cast_column(values: pd.Series, fd: field_def.FieldDef) -> List[Any]:
+    # Convert a whole column to the input format of the field at once, then validate it.
+    n_missing = int(values.isna().sum())
+    if n_missing:
+        raise ValueError(f"Column '{fd.feature_name}' has {n_missing} missing values")
+    try:
+        if fd.data_type == "int":
+            converted = pd.to_numeric(values, errors="raise")
+            if (converted % 1 != 0).any():
+                raise ValueError("non-integer values found")
+            converted = converted.astype("int64")
+        elif fd.data_type == "float":
+            converted = pd.to_numeric(values, errors="raise").astype("float64")
+        elif fd.data_type == "binary":
+            if pd.api.types.is_bool_dtype(values):
+                converted = values
+            elif pd.api.types.is_numeric_dtype(values):
+                unknown = ~values.isin((0, 1))
+                if unknown.any():
+                    raise ValueError(f"unknown boolean values (expected 0 or 1): {sorted(set(values[unknown]))}")
+                converted = values.astype(bool)
+            else:
+                lowered = values.astype(str).str.strip().str.lower()
+                unknown = ~lowered.isin(TRUE_STRINGS + FALSE_STRINGS)
+                if unknown.any():
+                    raise ValueError(f"unknown boolean values: {sorted(set(values[unknown]))}")
+                converted = lowered.isin(TRUE_STRINGS)
+        elif fd.data_type in ("categorical", "str"):
+            converted = values.astype(str)
+        elif fd.data_type == "date":
+            converted = pd.to_datetime(values).dt.date
+        else:
+            raise ValueError(f"unknown data type: {fd.data_type}")
+    except (ValueError, TypeError) as ex:
+        raise ValueError(f"Column '{fd.feature_name}' could not be converted to {fd.data_type}: {ex}") from ex
+
+    min_value = getattr(fd, "min_value", None)
+    max_value = getattr(fd, "max_value", None)
+    if min_value is not None and (converted < min_value).any():
+        raise ValueError(f"Column '{fd.feature_name}' has values less than the minimum value `{min_value}`")
+    if max_value is not None and (converted > max_value).any():
+        raise ValueError(f"Column '{fd.feature_name}' has values greater than the maximum value `{max_value}`")
+    if isinstance(fd, field_def.CategoricalDef):
+        unknown = ~converted.isin(fd.options)
+        if unknown.any():
+            raise ValueError(
+                f"Column '{fd.feature_name}' has values that are not one of the options {fd.options}: "
+                f"{sorted(set(converted[unknown]))}"
+            )
+
+    return converted.tolist()
+
+
+def _convert_table(
+    df: pd.DataFrame, field_defs: Dict[str, field_def.FieldDef], modality: DataModality, key_column: str
+) -> Tuple[List[str], List[Dict[str, Any]]]:
+    # Returns the sample keys and the records (in field defs order, without computed fields) of the rows of `df`.
+    if key_column not in df.columns:
+        raise ValueError(f"The {modality} table has no key column '{key_column}'")
+    keys = df[key_column].astype(str).tolist()
+    columns: Dict[str, List[Any]] = dict()
+    for field_name, fd in field_defs.items():
+        if fd.is_computed:
+            continue
+        if field_name in df.columns:
+            columns[field_name] = _cast_column(df[field_name], fd)
+        else:
+            logger.info(f"Column '{field_name}' not found in the {modality} table, using the default value")
+            columns[field_name] = [fd.get_default_value(modality=modality, data_sample="first_step")] * len(df)
+    records = [dict(zip(columns.keys(), values)) for values in zip(*columns.values())]
+    if not columns:
+        records = [dict() for _ in range(len(df))]
+    return keys, records
+
+
+def _group_by_key(
+    keys: List[str], records: List[Dict[str, Any]], sort_field: Optional[str] = None
+) -> Dict[str, List[Dict[str, Any]]]:
+    if sort_field is not None:
+        order = sorted(range(len(keys)), key=lambda i: (keys[i], records[i][sort_field]))
+    else:
+        order = sorted(range(len(keys)), key=lambda i: keys[i])
+    return {key: [records[i] for i in group] for key, group in itertools.groupby(order, key=lambda i: keys[i])}
+
+
+def _compute_fields(field_defs: field_def.FieldDefsCollection, data_sample: DataSample) -> DataSample:
+    # The computation cascades from static data, to time series data, to event data.
+    if any(fd.is_computed for fd in field_defs.static.values()):
+        data_sample.static = field_def.update(
+            field_defs=field_defs.static,
+            session_state=None,
+            modality="static",
+            data_sample=data_sample,
+            current_timestep=max(len(data_sample.temporal) - 1, 0),
+            computed_only=True,
+        )
+    for modality in ("temporal", "event"):
+        defs: Dict[str, field_def.FieldDef] = getattr(field_defs, modality)
+        if any(fd.is_computed for fd in defs.values()):
+            items: List[Dict[str, Any]] = getattr(data_sample, modality)
+            for idx in range(len(items)):
+                items[idx] = field_def.update(
+                    field_defs=defs,
+                    session_state=None,
+                    modality=modality,  # type: ignore [arg-type]
+                    data_sample=data_sample,
+                    current_timestep=idx,
+                    computed_only=True,
+                )
+    return data_sample
+
+
+def prepare_samples(
+    field_defs: field_def.FieldDefsCollection,
+    static: Optional[pd.DataFrame] = None,
+    temporal: Optional[pd.DataFrame] = None,
+    event: Optional[pd.DataFrame] = None,
+    key_column: str = "key",
+) -> Iterator[Tuple[str, DataSample]]:
+    """Convert the tables to samples, with the computed fields computed.
+
+    Args:
+        field_defs (field_def.FieldDefsCollection): The field definitions.
+        static (Optional[pd.DataFrame], optional): Static data, one row per sample. Defaults to `None`.
+        temporal (Optional[pd.DataFrame], optional): Temporal data in long format, one row per sample time-step.
+            Defaults to `None`.
+        event (Optional[pd.DataFrame], optional): Event data in long format, one row per sample event.
+            Defaults to `None`.
+        key_column (str, optional): The column holding the sample key in all tables. Defaults to ``"key"``.
+
+    Returns:
+        Iterator[Tuple[str, DataSample]]: Sample keys and samples, in key order.
+    """
+    static_records: Dict[str, Dict[str, Any]] = dict()
+    if static is not None:
+        keys, records = _convert_table(static, field_defs.static, "static", key_column)
+        static_records = dict(zip(keys, records))
+        if len(static_records) != len(keys):
+            raise ValueError("The static table has duplicate sample keys")
+    temporal_records: Dict[str, List[Dict[str, Any]]] = dict()
+    if temporal is not None:
+        keys, records = _convert_table(temporal, field_defs.temporal, "temporal", key_column)
+        temporal_records = _group_by_key(keys, records, sort_field=DEFAULTS.time_index_field)
+        for key, items in temporal_records.items():
+            time_indexes = [item[DEFAULTS.time_index_field] for item in items]
+            if len(set(time_indexes)) != len(time_indexes):
+                raise ValueError(f"The temporal table has duplicate time indexes for sample '{key}'")
+    event_records: Dict[str, List[Dict[str, Any]]] = dict()
+    if event is not None:
+        keys, records = _convert_table(event, field_defs.event, "event", key_column)
+        event_records = _group_by_key(keys, records)
+
+    sample_keys: Set[str] = set(static_records)
+    if static is not None:
+        unknown_keys = (set(temporal_records) | set(event_records)) - sample_keys
+        if unknown_keys:
+            raise ValueError(f"Temporal or event rows found for keys not in the static table: {sorted(unknown_keys)}")
+    else:
+        sample_keys = set(temporal_records) | set(event_records)
+
+    for key in sorted(sample_keys):
+        static_record = static_records.get(key)
+        if static_record is None:
+            static_record = field_def.get_default(field_defs=field_defs.static, modality="static")
+        temporal_items = temporal_records.get(key)
+        if temporal_items is None:
+            # Samples always have at least one time-step, see `deta_utils.add_empty_sample`.
+            temporal_items = (
+                [field_def.get_default(field_defs=field_defs.temporal, modality="temporal", data_sample="first_step")]
+                if field_defs.temporal
+                else []
+            )
+        data_sample = DataSample(static=static_record, temporal=temporal_items, event=event_records.get(key, []))
+        yield key, _compute_fields(field_defs=field_defs, data_sample=data_sample)
+
+
+def import_samples(
+    db: storage.SampleStore,
+    field_defs: field_def.FieldDefsCollection,
+    static: Optional[pd.DataFrame] = None,
+    temporal: Optional[pd.DataFrame] = None,
+    event: Optional[pd.DataFrame] = None,
+    key_column: str = "key",
+    batch_size: int = storage.DETA_MAX_PUT_MANY,
+    max_workers: int = 4,
+) -> int:
+    """Import samples from static, temporal and event tables (see `prepare_samples`) into the sample store.
+
+    Samples are written in batches of ``batch_size`` with ``put_many``, with at most ``max_workers`` batches in
+    flight at a time. Existing samples with the same keys are overwritten. Returns the number of samples imported.
+    The connections of the store are closed when done, see `storage.close`.
+    """
+    backend = storage.as_backend(db)
+    samples = prepare_samples(
+        field_defs=field_defs, static=static, temporal=temporal, event=event, key_column=key_column
+    )
+
+    def write_batch(batch: List[Tuple[str, DataSample]]) -> int:
+        items = [
+            dict(deta_utils.encode_sample(data_sample=data_sample, field_defs=field_defs), key=key)
+            for key, data_sample in batch
+        ]
+        backend.put_many(items)
+        for key, _ in batch:
+            deta_utils.invalidate_sample(backend, key)
+        return len(batch)
+
+    n_imported = 0
+    pending: Set[concurrent.futures.Future] = set()
+    try:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+            while True:
+                batch = list(itertools.islice(samples, batch_size))
+                if batch:
+                    pending.add(executor.submit(write_batch, batch))
+                # Bound the number of batches held in memory.
+                if len(pending) >= max_workers or (not batch and pending):
+                    done, pending = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+                    for future in done:
+                        n_imported += future.result()
+                    logger.info(f"Imported {n_imported} samples")
+                if not batch and not pending:
+                    break
+    finally:
+        # The worker threads have exited, close the connections they opened.
+        storage.close(backend)
+    return n_imported
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Bulk import samples from CSV or Parquet tables.")
+    cli.add_field_defs_argument(parser)
+    parser.add_argument("--static", help="Static data table, one row per sample")
+    parser.add_argument("--temporal", help="Temporal data table in long format, one row per time-step")
+    parser.add_argument("--event", help="Event data table in long format, one row per event")
+    parser.add_argument("--key-column", default="key", help="Column holding the sample key in all tables")
+    cli.add_db_arguments(parser)
+    parser.add_argument("--batch-size", type=int, default=storage.DETA_MAX_PUT_MANY)
+    parser.add_argument("--max-workers", type=int, default=4)
+    args = parser.parse_args(argv)
+
+    n_imported = import_samples(
+        db=cli.db_from_args(args),
+        field_defs=cli.load_field_defs(args.field_defs),
+        static=read_table(args.static) if args.static else None,
+        temporal=read_table(args.temporal) if args.temporal else None,
+        event=read_table(args.event) if args.event else None,
+        key_column=args.key_column,
+        batch_size=args.batch_size,
+        max_workers=args.max_workers,
+    )
+    logger.info(f"Import finished, {n_imported} samples imported")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+import datetime
+import random
+import secrets
+import string
+import threading
+import time
+from typing import Iterator, Optional
+
+from typing_extensions import Literal
+
+from . import storage
+from .const import DEFAULTS
+
+KeyStrategy = Literal["random", "sortable"]
+
+# Crockford's base 32, lowercase, in ASCII order, so that the sortable keys sort like the numbers they encode.
+CROCKFORD_ALPHABET = "0123456789abcdefghjkmnpqrstvwxyz"
+_TIME_LENGTH = 10  # 48 bits of milliseconds.
+_RANDOM_LENGTH = 16  # 80 random bits.
+
+
+def random_key(length: int = 12) -> str:
+    characters = string.ascii_lowercase + string.digits
+    return "".join(random.choice(characters) for _ in range(length))  # nosec: B311
+
+
+def _encode(value: int, length: int) -> str:
+    chars = []
+    for _ in range(length):
+        value, remainder = divmod(value, 32)
+        chars.append(CROCKFORD_ALPHABET[remainder])
+    return "".join(reversed(chars))
+
+
+def _decode(text: str) -> int:
+    value = 0
+    for char in text:
+        value = value * 32 + CROCKFORD_ALPHABET.index(char)
+    return value
+
+
+_last_sortable = (0, 0)  # The time and random parts of the last sortable key made by this process.
+_sortable_lock = threading.Lock()
+
+
+def sortable_key(timestamp_ms: Optional[int] = None) -> str:
+    """Make a ULID-style key: 10 characters of the creation time in milliseconds then 16 random characters, so that the
+    keys sort by creation time. Keys made by this process in the same millisecond are incremented from the previous
+    one rather than drawn at random, so they also sort in creation order.
+    """
+    global _last_sortable
+    if timestamp_ms is None:
+        timestamp_ms = time.time_ns() // 1_000_000
+    with _sortable_lock:
+        last_timestamp_ms, last_random = _last_sortable
+        if timestamp_ms == last_timestamp_ms and last_random < 2**80 - 1:
+            random_part = last_random + 1
+        else:
+            random_part = secrets.randbits(80)
+        _last_sortable = (timestamp_ms, random_part)
+    return _encode(timestamp_ms, _TIME_LENGTH) + _encode(random_part, _RANDOM_LENGTH)
+
+
+def key_timestamp(key: str) -> datetime.datetime:
+    """The creation time (UTC) of a `sortable_key`."""
+    return datetime.datetime.fromtimestamp(_decode(key[:_TIME_LENGTH]) / 1000, tz=datetime.timezone.utc)
+
+
+_strategy: KeyStrategy = DEFAULTS.sample_key_strategy
+
+
+def configure_sample_keys(strategy: KeyStrategy = DEFAULTS.sample_key_strategy) -> None:
+    """Set how new sample keys are made: ``"random"`` (12 random characters) or ``"sortable"`` (see `sortable_key`)."""
+    global _strategy
+    if strategy not in ("random", "sortable"):
+        raise ValueError(f"Unknown sample key strategy '{strategy}', expected 'random' or 'sortable'")
+    _strategy = strategy
+
+
+def new_sample_key(db: storage.SampleStore, strategy: Optional[KeyStrategy] = None, max_attempts: int = 10) -> str:
+    """Make a key for a new sample (with the configured strategy if ``strategy`` is `None`) that is not used in the
+    store yet, trying up to ``max_attempts`` keys."""
+    backend = storage.as_backend(db)
+    strategy = strategy if strategy is not None else _strategy
+    for _ in range(max_attempts):
+        key = sortable_key() if strategy == "sortable" else random_key()
+        if backend.get(key) is None:
+            return key
+    raise RuntimeError(f"Could not make an unused sample key in {max_attempts} attempts")
+
+
+def iter_keys_since(db: storage.SampleStore, since: datetime.datetime, page_size: int = 1000) -> Iterator[str]:
+    """Iterate, in creation order, over the keys of the samples created at or after ``since`` (a timezone-aware
+    datetime), by a range scan of the store. Only meaningful for `sortable_key` keys.
+    """
+    backend = storage.as_backend(db)
+    # Every key of that millisecond or later sorts after its time prefix alone.
+    last: Optional[str] = _encode(int(since.timestamp() * 1000), _TIME_LENGTH)
+    while True:
+        page = backend.fetch_keys(limit=page_size, last=last)
+        yield from page.keys
+        if page.last is None:
+            return
+        last = page.last
@@ -0,0 +1,290 @@
+import concurrent.futures
+import hashlib
+import inspect
+import itertools
+import threading
+from typing import Any, Callable, Dict, Hashable, List, Optional, TypeVar, cast
+
+import pandas as pd
+
+from . import cache
+from .const import DEFAULTS, DataSample
+
+# Process-wide cache of risk predictions, shared by all sessions. Entries are keyed by
+# `(sample key, sample version, callback, time_max, time_resolution, kwargs)`. The version is the one of the stored
+# sample if given (see `deta_utils.get_sample_version_key`), else a hash of the sample data (see `sample_fingerprint`),
+# so a modified sample never hits the predictions of its previous version. The entries of a sample key are also
+# dropped when the sample is written, see `deta_utils.invalidate_sample`.
+PREDICTION_CACHE = cache.LRUCache(max_size=DEFAULTS.prediction_cache_size, ttl=DEFAULTS.prediction_cache_ttl)
+
+
+def configure_prediction_cache(
+    max_size: int = DEFAULTS.prediction_cache_size, ttl: Optional[float] = DEFAULTS.prediction_cache_ttl
+) -> None:
+    PREDICTION_CACHE.configure(max_size=max_size, ttl=ttl)
+
+
+def sample_fingerprint(data_sample: DataSample) -> str:
+    """Get a hash of the data of the sample, to identify a sample that has no stored version."""
+    data = repr((data_sample.static, data_sample.temporal, data_sample.event))
+    return hashlib.blake2b(data.encode(), digest_size=16).hexdigest()
+
+
+def invalidate_predictions(key: str) -> int:
+    """Drop the cached predictions of the sample with the key, return the number of entries dropped."""
+    return PREDICTION_CACHE.discard_where(lambda cache_key: cache_key[0] == key)  # type: ignore [index]
+
+
+CallbackT = TypeVar("CallbackT", bound=Callable)
+
+
+def prefix_consistent(callback: CallbackT) -> CallbackT:
+    """Declare that the risk predictions of the callback up to any ``time_max`` are the first rows of its predictions
+    up to a larger ``time_max`` (as for survival models), so that they can be sliced from those, see `predict_risk`.
+
+    Can be used as a decorator. Sets the ``prefix_consistent`` attribute of the callback, which can also be set directly
+    (e.g. as a class attribute of a callable class).
+    """
+    callback.prefix_consistent = True  # type: ignore [attr-defined]
+    return callback
+
+
+def is_prefix_consistent(callback: Callable) -> bool:
+    return bool(getattr(callback, "prefix_consistent", False))
+
+
+def with_cache_key(cache_key: str) -> Callable[[CallbackT], CallbackT]:
+    """Set the key that identifies the callback in the prediction cache (see `callback_id`), for callbacks that are made
+    again on every rerun (e.g. closures, lambdas or instances of a callable class) to share their cache entries. Two
+    callbacks must only have the same key if they make the same predictions.
+
+    Can be used as a decorator. Sets the ``cache_key`` attribute of the callback, which can also be set directly.
+    """
+
+    def decorator(callback: CallbackT) -> CallbackT:
+        callback.cache_key = cache_key  # type: ignore [attr-defined]
+        return callback
+
+    return decorator
+
+
+_identity_counter = itertools.count()
+
+
+def _identity(obj: Any) -> str:
+    # NOTE: Not `id(obj)`, which can be reused by another object once this one is freed.
+    try:
+        return obj.__dict__.setdefault("_prediction_cache_identity", f"#{next(_identity_counter)}")
+    except AttributeError:
+        return f"id{id(obj)}"
+
+
+def callback_id(callback: Callable) -> str:
+    """Identify the callback in the prediction cache keys: by its ``cache_key`` attribute if set (see
+    `with_cache_key`), else by its qualified name for a function or a class defined at the top level of a module, else
+    (lambdas, closures, methods and instances, whose name is shared by all of them) by the identity of the object.
+    """
+    cache_key = getattr(callback, "cache_key", None)
+    if isinstance(cache_key, str):
+        return f"key:{cache_key}"
+    qualname = getattr(callback, "__qualname__", None)
+    if (
+        qualname is not None
+        and "<" not in qualname  # "<lambda>", "<locals>"
+        and (inspect.isfunction(callback) or inspect.isclass(callback))
+    ):
+        return f"{callback.__module__}.{qualname}"
+    if inspect.ismethod(callback):
+        return f"{type(callback.__self__).__qualname__}.{callback.__name__}@{_identity(callback.__self__)}"
+    return f"{type(callback).__qualname__}@{_identity(callback)}"
+
+
+def predict_risk(
+    risk_prediction_callback: Callable[..., pd.DataFrame],
+    data_sample: DataSample,
+    time_max: Any,
+    time_resolution: Any,
+    sample_key: Optional[str] = None,
+    use_cache: bool = True,
+    time_max_horizon: Any = None,
+    sample_version: Hashable = None,
+    **kwargs,
+) -> pd.DataFrame:
+    """Call ``risk_prediction_callback``, or get its result from `PREDICTION_CACHE` if it was already called with the
+    same sample data and arguments.
+
+    Args:
+        risk_prediction_callback (Callable[..., pd.DataFrame]): The callback, see `components.RiskPredictionCallback`.
+        data_sample (DataSample): The sample.
+        time_max (Any): The prediction time limit.
+        time_resolution (Any): The prediction time resolution.
+        sample_key (Optional[str], optional): The key of the sample, for its predictions to be dropped when it is
+            written. Defaults to `None`.
+        use_cache (bool, optional): Whether to use the cache. Defaults to `True`.
+        time_max_horizon (Any, optional): The largest ``time_max`` that will be asked for (e.g. the maximum of the time
+            limit slider). If given and the callback is `prefix_consistent`, the predictions are made (once, with the
+            cache) up to this horizon (or up to ``time_max``, if larger), and the rows up to ``time_max`` (by index)
+            are returned. Defaults to `None`.
+        sample_version (Hashable, optional): The version of the stored sample, e.g. from
+            `deta_utils.get_sample_version_key`, for ``data_sample`` as read from the DB. Identifies the sample in the
+            cache instead of a hash of its data, which would be computed on every call. Defaults to `None`.
+        **kwargs: Passed on to the callback, and part of the cache key.
+
+    Returns:
+        pd.DataFrame: The risk predictions.
+    """
+    return submit_prediction(
+        risk_prediction_callback,
+        data_sample,
+        time_max=time_max,
+        time_resolution=time_resolution,
+        sample_key=sample_key,
+        use_cache=use_cache,
+        time_max_horizon=time_max_horizon,
+        sample_version=sample_version,
+        background=False,
+        **kwargs,
+    ).result()
+
+
+_executor: Optional[concurrent.futures.Executor] = None
+_executor_lock = threading.Lock()
+
+
+def configure_prediction_executor(
+    max_workers: int = DEFAULTS.prediction_workers, executor: Optional[concurrent.futures.Executor] = None
+) -> None:
+    """Set the executor of the background predictions, by default a thread pool of ``max_workers`` threads.
+
+    A process pool (e.g. ``concurrent.futures.ProcessPoolExecutor``) can be given for CPU-bound models that hold the
+    GIL, the callbacks (and their arguments) must then be picklable. The cache is always used in this process.
+    """
+    global _executor
+    with _executor_lock:
+        previous = _executor
+        _executor = (
+            executor
+            if executor is not None
+            else concurrent.futures.ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="risk_prediction")
+        )
+    if previous is not None:
+        previous.shutdown(wait=False)
+
+
+def _get_executor() -> concurrent.futures.Executor:
+    if _executor is None:
+        configure_prediction_executor()
+    return cast(concurrent.futures.Executor, _executor)
+
+
+# The background predictions in progress, by cache key, with the number of `PendingPrediction`s waiting for each, so
+# that the sessions asking for the same prediction share one model call.
+_in_flight: Dict[Hashable, List[Any]] = dict()
+_in_flight_lock = threading.Lock()
+
+
+class PendingPrediction:
+    """A risk prediction that may still be running, see `submit_prediction`."""
+
+    def __init__(
+        self,
+        future: "concurrent.futures.Future[pd.DataFrame]",
+        time_max: Any,
+        sliced: bool,
+        in_flight_key: Optional[Hashable] = None,
+    ) -> None:
+        self.future = future
+        self.time_max = time_max
+        self.sliced = sliced
+        self.in_flight_key = in_flight_key
+        self.cancelled = False
+
+    def done(self) -> bool:
+        return self.future.done()
+
+    def cancel(self) -> None:
+        """Discard the prediction. The model call is cancelled if it has not started and no other pending prediction
+        waits for it, a running call completes (and is cached)."""
+        if self.cancelled:
+            return
+        self.cancelled = True
+        with _in_flight_lock:
+            entry = _in_flight.get(self.in_flight_key)
+            if entry is None or entry[0] is not self.future:
+                return
+            entry[1] -= 1
+            if entry[1] > 0:
+                return
+            del _in_flight[self.in_flight_key]
+        self.future.cancel()
+
+    def result(self, timeout: Optional[float] = None) -> pd.DataFrame:
+        risk_predictions = self.future.result(timeout=timeout)
+        if self.sliced:
+            risk_predictions = risk_predictions.loc[risk_predictions.index <= self.time_max]
+        # The cached dataframe must never be handed out, as it could be modified.
+        return risk_predictions.copy()
+
+
+def submit_prediction(
+    risk_prediction_callback: Callable[..., pd.DataFrame],
+    data_sample: DataSample,
+    time_max: Any,
+    time_resolution: Any,
+    sample_key: Optional[str] = None,
+    use_cache: bool = True,
+    time_max_horizon: Any = None,
+    sample_version: Hashable = None,
+    background: bool = True,
+    **kwargs,
+) -> PendingPrediction:
+    """Like `predict_risk`, but the callback is run on the background executor (see `configure_prediction_executor`)
+    and a `PendingPrediction` is returned straight away. A cached prediction is returned already done.
+
+    With ``background=False``, the callback is run in the calling thread instead.
+    """
+    sliced = time_max_horizon is not None and is_prefix_consistent(risk_prediction_callback)
+    # NOTE: A `time_max` beyond the horizon extends it, the predictions must not stop short of `time_max`.
+    call_time_max = max(time_max, time_max_horizon) if sliced else time_max
+    cache_key = (
+        sample_key,
+        sample_version if sample_version is not None else sample_fingerprint(data_sample),
+        callback_id(risk_prediction_callback),
+        repr(call_time_max),
+        repr(time_resolution),
+        repr(sorted(kwargs.items())),
+    )
+    future: "concurrent.futures.Future[pd.DataFrame]" = concurrent.futures.Future()
+    risk_predictions = PREDICTION_CACHE.get(cache_key) if use_cache else None
+    if risk_predictions is not None:
+        future.set_result(risk_predictions)
+        return PendingPrediction(future, time_max=time_max, sliced=sliced)
+    if not background:
+        risk_predictions = risk_prediction_callback(
+            data_sample, time_max=call_time_max, time_resolution=time_resolution, **kwargs
+        )
+        if use_cache:
+            PREDICTION_CACHE.put(cache_key, risk_predictions)
+        future.set_result(risk_predictions)
+        return PendingPrediction(future, time_max=time_max, sliced=sliced)
+
+    with _in_flight_lock:
+        entry = _in_flight.get(cache_key)
+        if entry is not None:
+            entry[1] += 1
+            return PendingPrediction(entry[0], time_max=time_max, sliced=sliced, in_flight_key=cache_key)
+        future = _get_executor().submit(
+            risk_prediction_callback, data_sample, time_max=call_time_max, time_resolution=time_resolution, **kwargs
+        )
+        _in_flight[cache_key] = [future, 1]
+
+    def on_done(done: "concurrent.futures.Future[pd.DataFrame]") -> None:
+        with _in_flight_lock:
+            entry = _in_flight.get(cache_key)
+            if entry is not None and entry[0] is done:
+                del _in_flight[cache_key]
+        if use_cache and not done.cancelled() and done.exception() is None:
+            PREDICTION_CACHE.put(cache_key, done.result())
+
+    future.add_done_callback(on_done)
+    return PendingPrediction(future, time_max=time_max, sliced=sliced, in_flight_key=cache_key)
@@ -0,0 +1,220 @@
+import bisect
+import collections
+import math
+import threading
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Set, Tuple
+
+from . import storage
+from .const import DEFAULTS
+
+
+class SearchResults(NamedTuple):
+    keys: List[str]  # The keys of the page.
+    n_matches: int
+    page: int
+    n_pages: int
+
+
+class SampleKeyIndex:
+    """An in-memory index of the sample keys of a store, and optionally of the values of some static fields, to find
+    samples without listing all the keys.
+
+    The keys are kept sorted, so that a prefix search of the keys is a binary search, and a substring search of the keys
+    scans them at C speed, joined in one string. The field values are scanned one by one. The index is built once, by
+    fetching all the keys (and the items, if there are ``search_fields``), then updated in place with `add`, `remove`
+    and `update` as the samples are modified.
+
+    Args:
+        db (storage.SampleStore): The sample store.
+        search_fields (Sequence[str], optional): The static fields whose values can also be searched.
+    """
+
+    def __init__(self, db: storage.SampleStore, search_fields: Sequence[str] = ()) -> None:
+        self.backend = storage.as_backend(db)
+        self.search_fields = tuple(search_fields)
+        self._keys: List[str] = []
+        self._key_set: Set[str] = set()
+        self._values: Dict[str, Dict[str, str]] = {field: dict() for field in self.search_fields}
+        self._joined: Optional[Tuple[str, List[int]]] = None  # The keys joined in one string, with their offsets.
+        self._lock = threading.Lock()
+        self.refresh()
+
+    def refresh(self) -> None:
+        """Build the index again from the store, e.g. after the samples were modified by another process."""
+        keys: List[str] = []
+        values: Dict[str, Dict[str, str]] = {field: dict() for field in self.search_fields}
+        last = None
+        while True:
+            if self.search_fields:
+                page = self.backend.fetch(last=last)
+                for item in page.items:
+                    keys.append(item["key"])
+                    for field in self.search_fields:
+                        values[field][item["key"]] = _normalize(item.get("static", dict()).get(field))
+                last = page.last
+            else:
+                keys_page = self.backend.fetch_keys(last=last)
+                keys.extend(keys_page.keys)
+                last = keys_page.last
+            if last is None:
+                break
+        with self._lock:
+            self._keys = sorted(keys)
+            self._key_set = set(keys)
+            self._values = values
+            self._joined = None
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._key_set
+
+    def add(self, key: str, static: Optional[Dict[str, Any]] = None) -> None:
+        with self._lock:
+            if key not in self._key_set:
+                bisect.insort(self._keys, key)
+                self._key_set.add(key)
+                self._joined = None
+            self._update_values(key, static)
+
+    def update(self, key: str, static: Dict[str, Any]) -> None:
+        with self._lock:
+            if key in self._key_set:
+                self._update_values(key, static)
+
+    def remove(self, key: str) -> None:
+        with self._lock:
+            if key not in self._key_set:
+                return
+            del self._keys[bisect.bisect_left(self._keys, key)]
+            self._key_set.discard(key)
+            for values in self._values.values():
+                values.pop(key, None)
+            self._joined = None
+
+    def _update_values(self, key: str, static: Optional[Dict[str, Any]]) -> None:
+        for field, values in self._values.items():
+            values[key] = _normalize((static or dict()).get(field))
+
+    def _match_prefix(self, query: str) -> List[str]:
+        start = bisect.bisect_left(self._keys, query)
+        end = start
+        while end < len(self._keys) and self._keys[end].startswith(query):
+            end += 1
+        return self._keys[start:end]
+
+    def _match_substring(self, query: str) -> List[str]:
+        if self._joined is None:
+            offsets = []
+            offset = 0
+            for key in self._keys:
+                offsets.append(offset)
+                offset += len(key) + 1
+            self._joined = ("\n".join(self._keys), offsets)
+        joined, offsets = self._joined
+        matches: List[str] = []
+        position = joined.find(query)
+        while position != -1:
+            i = bisect.bisect_right(offsets, position) - 1
+            matches.append(self._keys[i])
+            # Continue after the end of the matched key, so each key is listed once.
+            position = joined.find(query, offsets[i] + len(self._keys[i]) + 1)
+        return matches
+
+    def search(
+        self,
+        query: str = "",
+        field: Optional[str] = None,
+        mode: str = "prefix",
+        page: int = 0,
+        page_size: int = DEFAULTS.sample_search_page_size,
+    ) -> SearchResults:
+        """Find the samples whose key (or the value of the static ``field``, which must be one of the
+        ``search_fields``) starts with (``mode="prefix"``) or contains (``mode="substring"``) ``query``, case
+        insensitively for the field values. Returns the ``page``-th page of ``page_size`` keys, sorted.
+        """
+        if mode not in ("prefix", "substring"):
+            raise ValueError(f"Unknown search mode '{mode}', expected 'prefix' or 'substring'")
+        with self._lock:
+            if field is not None:
+                if field not in self._values:
+                    raise ValueError(f"Field '{field}' is not indexed, the indexed fields are: {self.search_fields}")
+                query = query.lower()
+                values = self._values[field]
+                if mode == "prefix":
+                    matches = [key for key in self._keys if values.get(key, "").startswith(query)]
+                else:
+                    matches = [key for key in self._keys if query in values.get(key, "")]
+            elif not query:
+                matches = self._keys
+            elif mode == "prefix":
+                matches = self._match_prefix(query)
+            else:
+                matches = self._match_substring(query)
+            n_pages = max(math.ceil(len(matches) / page_size), 1)
+            page = min(max(page, 0), n_pages - 1)
+            return SearchResults(
+                keys=matches[page * page_size : (page + 1) * page_size],
+                n_matches=len(matches),
+                page=page,
+                n_pages=n_pages,
+            )
+
+
+def _normalize(value: Any) -> str:
+    return "" if value is None else str(value).lower()
+
+
+# The indexes in use, by store and search fields, shared by all sessions, least recently used first.
+_indexes: "collections.OrderedDict[Tuple[str, Tuple[str, ...]], SampleKeyIndex]" = collections.OrderedDict()
+_indexes_lock = threading.Lock()
+_max_count = DEFAULTS.sample_index_max_count
+
+
+def configure_sample_indexes(max_count: int = DEFAULTS.sample_index_max_count) -> None:
+    """Set how many indexes are kept, the least recently used ones are dropped (and built again if used again)."""
+    global _max_count
+    if max_count < 1:
+        raise ValueError("`max_count` must be at least 1")
+    with _indexes_lock:
+        _max_count = max_count
+        _evict()
+
+
+def _evict() -> None:
+    while len(_indexes) > _max_count:
+        _indexes.popitem(last=False)
+
+
+def get_sample_index(db: storage.SampleStore, search_fields: Sequence[str] = ()) -> SampleKeyIndex:
+    """Get the index of the store with the search fields, built on first use."""
+    index_key = (storage.as_backend(db).namespace, tuple(search_fields))
+    with _indexes_lock:
+        if index_key in _indexes:
+            _indexes.move_to_end(index_key)
+        else:
+            _indexes[index_key] = SampleKeyIndex(db, search_fields=search_fields)
+            _evict()
+        return _indexes[index_key]
+
+
+def _indexes_of(db: storage.SampleStore) -> List[SampleKeyIndex]:
+    namespace = storage.as_backend(db).namespace
+    with _indexes_lock:
+        return [index for (index_namespace, _), index in _indexes.items() if index_namespace == namespace]
+
+
+def on_sample_added(db: storage.SampleStore, key: str, static: Optional[Dict[str, Any]] = None) -> None:
+    for index in _indexes_of(db):
+        index.add(key, static)
+
+
+def on_sample_updated(db: storage.SampleStore, key: str, static: Dict[str, Any]) -> None:
+    for index in _indexes_of(db):
+        index.update(key, static)
+
+
+def on_sample_deleted(db: storage.SampleStore, key: str) -> None:
+    for index in _indexes_of(db):
+        index.remove(key)
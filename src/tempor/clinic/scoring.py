@@ -0,0 +1,299 @@
+import argparse
+import concurrent.futures
+import hashlib
+import json
+import math
+import threading
+import time
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence, Set, Tuple, cast
+
+import pandas as pd
+from loguru import logger
+
+from . import cli, deta_utils, field_def, predictions, storage
+from .const import DEFAULTS, DataDefsCollectionDict
+
+
+class ScoreEntry(NamedTuple):
+    key: str
+    score: float
+    fingerprint: str  # Of the sample data and the scoring settings the score was computed from.
+
+
+class RankedPage(NamedTuple):
+    entries: List[ScoreEntry]  # The entries of the page, highest score first.
+    n_entries: int
+    page: int
+    n_pages: int
+
+
+class ScoringRun(NamedTuple):
+    started_at: float  # Seconds since the epoch.
+    settings: str
+
+
+class ScoringResult(NamedTuple):
+    n_scored: int
+    n_unchanged: int
+    n_failed: int
+    n_removed: int
+
+
+def last_risk(risk_predictions: pd.DataFrame) -> float:
+    """The default score: the predicted risk at the time limit (the last row)."""
+    return float(risk_predictions["risk_prediction"].iloc[-1])
+
+
+_LAST_RUN_KEY = "~last_run"
+
+
+class ScoreIndex:
+    """The latest risk score of each sample, materialized in a store of its own (e.g. another table of the SQLite
+    database), so that the whole cohort can be listed by risk without calling the model.
+
+    The entries are read all at once and kept in memory for ``ttl`` seconds, writes made through the index refresh
+    them. The store also keeps the last complete `score_samples` run, under a key of its own.
+
+    Args:
+        db (storage.SampleStore): The store of the scores.
+        ttl (Optional[float], optional): Seconds to keep the entries in memory, `None` to keep them until written.
+    """
+
+    def __init__(self, db: storage.SampleStore, ttl: Optional[float] = DEFAULTS.score_index_ttl) -> None:
+        self.backend = storage.as_backend(db)
+        self.ttl = ttl
+        self._entries: Optional[Dict[str, ScoreEntry]] = None
+        self._ranked: Optional[List[ScoreEntry]] = None  # Sorted on first use, dropped when the entries change.
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+
+    def entries(self) -> Dict[str, ScoreEntry]:
+        with self._lock:
+            if self._entries is None or (self.ttl is not None and time.monotonic() - self._loaded_at >= self.ttl):
+                entries: Dict[str, ScoreEntry] = dict()
+                last = None
+                while True:
+                    page = self.backend.fetch(last=last)
+                    for item in page.items:
+                        if item["key"] == _LAST_RUN_KEY:
+                            continue
+                        entries[item["key"]] = ScoreEntry(item["key"], item["score"], item["fingerprint"])
+                    if page.last is None:
+                        break
+                    last = page.last
+                self._entries = entries
+                self._ranked = None
+                self._loaded_at = time.monotonic()
+            return self._entries
+
+    def get(self, key: str) -> Optional[ScoreEntry]:
+        return self.entries().get(key)
+
+    def _ranked_descending(self) -> List[ScoreEntry]:
+        entries = self.entries()
+        with self._lock:
+            if self._ranked is None:
+                self._ranked = sorted(entries.values(), key=lambda entry: entry.score, reverse=True)
+            return self._ranked
+
+    def ranked(self, descending: bool = True) -> List[ScoreEntry]:
+        ranked = self._ranked_descending()
+        return list(ranked) if descending else ranked[::-1]
+
+    def ranked_page(self, page: int = 0, page_size: int = DEFAULTS.sample_keys_page_size) -> RankedPage:
+        """Get the ``page``-th page of ``page_size`` entries, highest score first."""
+        ranked = self._ranked_descending()
+        n_pages = max(math.ceil(len(ranked) / page_size), 1)
+        page = min(max(page, 0), n_pages - 1)
+        return RankedPage(
+            entries=ranked[page * page_size : (page + 1) * page_size],
+            n_entries=len(ranked),
+            page=page,
+            n_pages=n_pages,
+        )
+
+    def last_run(self) -> Optional[ScoringRun]:
+        item = self.backend.get(_LAST_RUN_KEY)
+        return ScoringRun(item["started_at"], item["settings"]) if item is not None else None
+
+    def set_last_run(self, run: ScoringRun) -> None:
+        self.backend.put(run._asdict(), key=_LAST_RUN_KEY)
+
+    def put_many(self, entries: Sequence[ScoreEntry]) -> None:
+        self.backend.put_many([entry._asdict() for entry in entries])
+        with self._lock:
+            if self._entries is not None:
+                self._entries.update((entry.key, entry) for entry in entries)
+            self._ranked = None
+
+    def delete(self, key: str) -> None:
+        self.backend.delete(key)
+        with self._lock:
+            if self._entries is not None:
+                self._entries.pop(key, None)
+            self._ranked = None
+
+
+def _fingerprint(item: Dict[str, Any], settings: str) -> str:
+    data = settings + json.dumps(item, sort_keys=True, default=str)
+    return hashlib.blake2b(data.encode(), digest_size=16).hexdigest()
+
+
+def _all_keys(backend: storage.StorageBackend, page_size: int) -> Set[str]:
+    keys: Set[str] = set()
+    last = None
+    while True:
+        page = backend.fetch_keys(limit=page_size, last=last)
+        keys.update(page.keys)
+        if page.last is None:
+            return keys
+        last = page.last
+
+
+def score_samples(
+    db: storage.SampleStore,
+    field_defs: field_def.FieldDefsCollection,
+    risk_prediction_callback: Callable[..., pd.DataFrame],
+    score_index: ScoreIndex,
+    time_max: Any,
+    time_resolution: Any,
+    score_fn: Callable[[pd.DataFrame], float] = last_risk,
+    page_size: int = 100,
+    chunk_size: int = storage.DETA_MAX_PUT_MANY,
+    max_workers: int = 4,
+    **kwargs,
+) -> ScoringResult:
+    """Score all the samples with the risk prediction callback, and store the scores in the ``score_index``.
+
+    The index is refreshed incrementally: if the store records when each sample was written (see
+    `storage.fetch_written_since`, e.g. `storage.SQLiteBackend`), only the samples written since the start of the last
+    run with the same settings are read, new samples included. Otherwise every sample is read. Either way, a sample
+    whose data (and the scoring settings) has not changed since it was last scored is not scored again, by comparing
+    fingerprints. The callback is part of the settings, see `predictions.callback_id`. A run in which some samples
+    failed is not recorded, so that the next run reads them again.
+
+    The scores of samples that no longer exist are removed (found by listing the keys only, in incremental runs). The
+    samples are scored in chunks of ``chunk_size``, with at most ``max_workers`` chunks in flight at a time. The
+    connections of the sample and score stores are closed when done, see `storage.close`.
+
+    Returns:
+        ScoringResult: The numbers of samples scored, unchanged and failed, and of scores removed.
+    """
+    backend = storage.as_backend(db)
+    settings = repr(
+        (predictions.callback_id(risk_prediction_callback), time_max, time_resolution, sorted(kwargs.items()))
+    )
+    run = ScoringRun(started_at=time.time(), settings=settings)
+    last_run = score_index.last_run()
+    since = (
+        last_run.started_at
+        if last_run is not None and last_run.settings == settings and storage.supports_fetch_written_since(backend)
+        else None
+    )
+    existing = dict(score_index.entries())
+    seen: Set[str] = set()
+    n_scored = n_unchanged = n_failed = 0
+
+    def fetch(last: Optional[str]) -> storage.FetchResult:
+        if since is None:
+            return backend.fetch(limit=page_size, last=last)
+        return cast(storage.FetchResult, storage.fetch_written_since(backend, since=since, limit=page_size, last=last))
+
+    def score_chunk(chunk: List[Tuple[Dict[str, Any], str]]) -> Tuple[List[ScoreEntry], int]:
+        entries: List[ScoreEntry] = []
+        n_chunk_failed = 0
+        for item, fingerprint in chunk:
+            try:
+                data_sample = deta_utils.decode_sample(
+                    raw_data=cast(DataDefsCollectionDict, item), field_defs=field_defs
+                )
+                risk_predictions = risk_prediction_callback(
+                    data_sample, time_max=time_max, time_resolution=time_resolution, **kwargs
+                )
+                entries.append(ScoreEntry(item["key"], score_fn(risk_predictions), fingerprint))
+            except Exception as ex:  # pylint: disable=broad-except
+                logger.warning(f"Scoring sample {item['key']} failed: {ex!r}")
+                n_chunk_failed += 1
+        if entries:
+            score_index.put_many(entries)
+        return entries, n_chunk_failed
+
+    def collect(done: Set[concurrent.futures.Future]) -> None:
+        nonlocal n_scored, n_failed
+        for future in done:
+            entries, n_chunk_failed = future.result()
+            n_scored += len(entries)
+            n_failed += n_chunk_failed
+
+    pending: Set[concurrent.futures.Future] = set()
+    chunk: List[Tuple[Dict[str, Any], str]] = []
+    last = None
+    try:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+            while True:
+                page = fetch(last)
+                for item in page.items:
+                    seen.add(item["key"])
+                    fingerprint = _fingerprint(item, settings)
+                    previous = existing.get(item["key"])
+                    if previous is not None and previous.fingerprint == fingerprint:
+                        n_unchanged += 1
+                        continue
+                    chunk.append((item, fingerprint))
+                    if len(chunk) >= chunk_size:
+                        pending.add(executor.submit(score_chunk, chunk))
+                        chunk = []
+                    # Bound the number of chunks held in memory.
+                    if len(pending) >= max_workers:
+                        done, pending = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+                        collect(done)
+                if page.last is None:
+                    break
+                last = page.last
+            if chunk:
+                pending.add(executor.submit(score_chunk, chunk))
+            collect(concurrent.futures.wait(pending).done)
+
+        if since is not None:
+            # The samples not read were not written since the last run, so their scores are up to date.
+            read, seen = seen, _all_keys(backend, page_size=page_size)
+            n_unchanged += len([key for key in existing if key in seen and key not in read])
+        removed = [key for key in existing if key not in seen]
+        for key in removed:
+            score_index.delete(key)
+        if n_failed == 0:
+            score_index.set_last_run(run)
+    finally:
+        # The worker threads have exited, close the connections they opened.
+        storage.close(backend)
+        storage.close(score_index.backend)
+    logger.info(f"Scored {n_scored} samples ({n_unchanged} unchanged, {n_failed} failed, {len(removed)} removed)")
+    return ScoringResult(n_scored=n_scored, n_unchanged=n_unchanged, n_failed=n_failed, n_removed=len(removed))
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Score all samples and update the risk score index.")
+    cli.add_field_defs_argument(parser)
+    parser.add_argument(
+        "--callback", required=True, help="Risk prediction callback, as 'module:attribute', e.g. app:predict_risk"
+    )
+    parser.add_argument("--scores-sqlite", required=True, help="Path of the SQLite database of the score index")
+    parser.add_argument("--time-max", type=float, required=True)
+    parser.add_argument("--time-resolution", type=float, required=True)
+    parser.add_argument("--max-workers", type=int, default=4)
+    cli.add_db_arguments(parser)
+    args = parser.parse_args(argv)
+
+    score_samples(
+        db=cli.db_from_args(args),
+        field_defs=cli.load_field_defs(args.field_defs),
+        risk_prediction_callback=cli.load_object(args.callback),
+        score_index=ScoreIndex(storage.SQLiteBackend(path=args.scores_sqlite, table="risk_scores")),
+        time_max=args.time_max,
+        time_resolution=args.time_resolution,
+        max_workers=args.max_workers,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,605 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple, Union
+
+from deta import _Base as DetaBase
+from loguru import logger
+from typing_extensions import Protocol
+
+from . import delta
+from .const import DEFAULTS, DataModality
+
+DETA_MAX_PUT_MANY = 25  # Deta Base accepts at most 25 items per `put_many` call.
+
+
+class FetchResult(NamedTuple):
+    items: List[Dict[str, Any]]
+    last: Optional[str]
+
+
+class FetchKeysResult(NamedTuple):
+    keys: List[str]
+    last: Optional[str]
+
+
+class Projection(NamedTuple):
+    """The parts of a sample item to read, see `get_projected`."""
+
+    modalities: Tuple[DataModality, ...] = ("static", "temporal", "event")
+    # The fields to keep, by modality (all the fields of the modalities not in it).
+    fields: Optional[Dict[DataModality, List[str]]] = None
+    # The time-steps to keep, by time index (inclusive bounds, in the DB format).
+    time_range: Optional[Tuple[Any, Any]] = None
+    time_index_field: str = DEFAULTS.time_index_field
+
+
+def apply_projection(item: Dict[str, Any], projection: Projection) -> Dict[str, Any]:
+    projected: Dict[str, Any] = dict(key=item["key"]) if "key" in item else dict()
+    for modality in projection.modalities:
+        data = item.get(modality, dict() if modality == "static" else [])
+        if modality == "temporal" and projection.time_range is not None:
+            low, high = projection.time_range
+            data = [x for x in data if low <= x[projection.time_index_field] <= high]
+        fields = projection.fields.get(modality) if projection.fields is not None else None
+        if fields is not None:
+            if modality == "static":
+                data = {name: data[name] for name in fields if name in data}
+            else:
+                data = [{name: x[name] for name in fields if name in x} for x in data]
+        projected[modality] = data
+    return projected
+
+
+class StorageBackend(Protocol):
+    """The interface a sample store must provide. Items are JSON-serializable dictionaries identified by a string key,
+    mirroring the subset of the Deta Base API used by `deta_utils`.
+
+    ``namespace`` identifies the underlying store, it is used to tell apart the entries of process-wide caches.
+    """
+
+    namespace: str
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        ...
+
+    def put(self, data: Dict[str, Any], key: str) -> None:
+        ...
+
+    def put_many(self, items: List[Dict[str, Any]]) -> None:
+        """Put several items at once, each item must have its key under ``"key"``."""
+        ...
+
+    def delete(self, key: str) -> None:
+        ...
+
+    def fetch(self, limit: int = 1000, last: Optional[str] = None) -> FetchResult:
+        ...
+
+    def fetch_keys(self, limit: int = 1000, last: Optional[str] = None) -> FetchKeysResult:
+        ...
+
+    def update(self, key: str, changes: List[delta.Change], data: Dict[str, Any]) -> None:
+        """Apply ``changes`` to the stored item. ``data`` is the full new item, for the changes the backend cannot
+        express natively.
+        """
+        ...
+
+
+SampleStore = Union[StorageBackend, DetaBase]
+
+
+class DetaBackend:
+    def __init__(self, base: DetaBase) -> None:
+        self.base = base
+        # NOTE: A new Base object is made for each session (and rerun), so the namespace is made from the project and
+        # the name of the Base, for all the sessions to share the cache entries (and their invalidation).
+        base_path = getattr(base, "base_path", None)  # "/v1/<project id>/<base name>"
+        if base_path is None and getattr(base, "project_id", None) is not None:
+            base_path = f"/v1/{base.project_id}/{getattr(base, 'name', '')}"
+        if base_path is None:
+            raise ValueError("Cannot identify the Deta Base, it has no `base_path` or `project_id`")
+        self.namespace = f"deta:{base_path}"
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        return self.base.get(key)
+
+    def put(self, data: Dict[str, Any], key: str) -> None:
+        self.base.put(data, key=key)
+
+    def put_many(self, items: List[Dict[str, Any]]) -> None:
+        for start in range(0, len(items), DETA_MAX_PUT_MANY):
+            self.base.put_many(items[start : start + DETA_MAX_PUT_MANY])
+
+    def delete(self, key: str) -> None:
+        self.base.delete(key)
+
+    def fetch(self, limit: int = 1000, last: Optional[str] = None) -> FetchResult:
+        response = self.base.fetch(limit=limit, last=last)
+        return FetchResult(items=response.items, last=response.last)
+
+    def fetch_keys(self, limit: int = 1000, last: Optional[str] = None) -> FetchKeysResult:
+        # NOTE: Deta Base has no field projection, so the full items are still transferred here.
+        response = self.fetch(limit=limit, last=last)
+        return FetchKeysResult(keys=[item["key"] for item in response.items], last=response.last)
+
+    def update(self, key: str, changes: List[delta.Change], data: Dict[str, Any]) -> None:
+        # NOTE: Deta Base field paths cannot address list items, so any item-level change sends the whole list.
+        full_lists = {c.modality for c in changes if isinstance(c, delta.ReplaceModality)}
+        full_lists |= {
+            modality
+            for modality in delta.LIST_MODALITIES
+            if any(isinstance(c, delta.SetValue) and len(c.path) > 1 and c.path[0] == modality for c in changes)
+        }
+        updates: Dict[str, Any] = {modality: data[modality] for modality in full_lists}
+        for change in changes:
+            if isinstance(change, delta.SetValue) and change.path[0] not in full_lists:
+                updates[".".join(str(part) for part in change.path)] = change.value
+            elif isinstance(change, delta.AppendItems) and change.modality not in full_lists:
+                updates[change.modality] = self.base.util.append(change.items)
+        self.base.update(updates, key=key)
+
+
+class SQLiteBackend:
+    """A sample store kept in a local SQLite database file.
+
+    The database is opened in WAL mode, so that readers do not block the writer. Each thread gets its own connection,
+    which is opened on first use and then reused (Streamlit runs each session's script in its own thread). The backend
+    keeps track of all the connections it opened, for `close` to close them all.
+
+    Each row also records when it was last written (``written_at``, seconds since the epoch), so that the samples
+    written since a point in time can be read without a full scan, see `fetch_written_since`.
+
+    Args:
+        path (str): Path to the database file, created if it does not exist.
+        table (str, optional): Name of the table to store the samples in. Defaults to ``"samples"``.
+        timeout (float, optional): Seconds to wait for a lock held by another connection. Defaults to ``30.0``.
+    """
+
+    def __init__(self, path: str, table: str = "samples", timeout: float = 30.0) -> None:
+        if not table.isidentifier():
+            raise ValueError(f"Invalid SQLite table name: {table}")
+        self.path = path
+        self.table = table
+        self.timeout = timeout
+        # NOTE: SQLite limits the number of arguments a function takes (127 by default), so large diffs are split
+        # over several statements within one transaction.
+        self.max_changes_per_statement = 60
+        self.namespace = f"sqlite:{os.path.realpath(path)}:{table}"
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
+        self._generation = 0  # Incremented by `close`, the connections of earlier generations are closed.
+        conn = self._connection()
+        conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {self.table} (key TEXT PRIMARY KEY, data TEXT NOT NULL, written_at REAL)"
+        )
+        if "written_at" not in {row[1] for row in conn.execute(f"PRAGMA table_info({self.table})")}:
+            # A table created before the write times were recorded, its rows have none until next written.
+            conn.execute(f"ALTER TABLE {self.table} ADD COLUMN written_at REAL")
+        conn.execute(f"CREATE INDEX IF NOT EXISTS {self.table}_written_at ON {self.table} (written_at)")
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.generation != self._generation:
+            logger.debug(f"Opening SQLite connection to {self.path} in thread {threading.get_ident()}")
+            # NOTE: `isolation_level=None` puts the connection in autocommit mode, each statement is its own
+            # transaction unless an explicit transaction is started. The connection is only used by this thread, but
+            # may be closed by another one, see `close`.
+            conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            with self._connections_lock:
+                self._connections.append(conn)
+                self._local.generation = self._generation
+            self._local.conn = conn
+        return conn
+
+    def close(self) -> None:
+        """Close all the connections opened by the backend, in any thread (e.g. the threads of a pool that has been
+        shut down). Must not be called while other threads use the backend. The backend can still be used afterwards,
+        each thread opens a new connection on its next use.
+        """
+        with self._connections_lock:
+            connections, self._connections = self._connections, []
+            self._generation += 1
+        for conn in connections:
+            conn.close()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        row = self._connection().execute(f"SELECT data FROM {self.table} WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        return dict(json.loads(row[0]), key=key)
+
+    def get_projected(self, key: str, projection: Projection) -> Optional[Dict[str, Any]]:
+        # The modalities not asked for are not read from the JSON, and the time range is filtered in SQLite.
+        columns: List[str] = []
+        params: List[Any] = []
+        for modality in projection.modalities:
+            if modality == "temporal" and projection.time_range is not None:
+                columns.append(
+                    "(SELECT json_group_array(json(value)) FROM (SELECT value FROM json_each(data, '$.temporal') "
+                    "WHERE json_extract(value, ?) BETWEEN ? AND ? ORDER BY key))"
+                )
+                params.extend([_json_path((projection.time_index_field,)), *projection.time_range])
+            else:
+                columns.append("json_extract(data, ?)")
+                params.append(_json_path((modality,)))
+        row = (
+            self._connection()
+            .execute(f"SELECT {', '.join(columns) or 'NULL'} FROM {self.table} WHERE key = ?", params + [key])
+            .fetchone()
+        )
+        if row is None:
+            return None
+        item: Dict[str, Any] = dict(key=key)
+        for modality, value in zip(projection.modalities, row):
+            if value is not None:
+                item[modality] = json.loads(value)
+        # The time range is already applied.
+        return apply_projection(item, projection._replace(time_range=None))
+
+    def put(self, data: Dict[str, Any], key: str) -> None:
+        data = {k: v for k, v in data.items() if k != "key"}
+        self._connection().execute(
+            f"INSERT OR REPLACE INTO {self.table} (key, data, written_at) VALUES (?, ?, ?)",
+            (key, json.dumps(data), time.time()),
+        )
+
+    def put_many(self, items: List[Dict[str, Any]]) -> None:
+        written_at = time.time()
+        rows = [(item["key"], json.dumps({k: v for k, v in item.items() if k != "key"}), written_at) for item in items]
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany(f"INSERT OR REPLACE INTO {self.table} (key, data, written_at) VALUES (?, ?, ?)", rows)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def delete(self, key: str) -> None:
+        self._connection().execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+
+    def fetch(self, limit: int = 1000, last: Optional[str] = None) -> FetchResult:
+        # Fetch one extra row to find out whether there is a next page.
+        rows = (
+            self._connection()
+            .execute(
+                f"SELECT key, data FROM {self.table} WHERE key > ? ORDER BY key LIMIT ?",
+                (last if last is not None else "", limit + 1),
+            )
+            .fetchall()
+        )
+        items = [dict(json.loads(data), key=key) for key, data in rows[:limit]]
+        return FetchResult(items=items, last=items[-1]["key"] if len(rows) > limit else None)
+
+    def fetch_written_since(self, since: float, limit: int = 1000, last: Optional[str] = None) -> FetchResult:
+        rows = (
+            self._connection()
+            .execute(
+                f"SELECT key, data FROM {self.table} WHERE written_at >= ? AND key > ? ORDER BY key LIMIT ?",
+                (since, last if last is not None else "", limit + 1),
+            )
+            .fetchall()
+        )
+        items = [dict(json.loads(data), key=key) for key, data in rows[:limit]]
+        return FetchResult(items=items, last=items[-1]["key"] if len(rows) > limit else None)
+
+    def fetch_keys(self, limit: int = 1000, last: Optional[str] = None) -> FetchKeysResult:
+        rows = (
+            self._connection()
+            .execute(
+                f"SELECT key FROM {self.table} WHERE key > ? ORDER BY key LIMIT ?",
+                (last if last is not None else "", limit + 1),
+            )
+            .fetchall()
+        )
+        keys = [key for (key,) in rows[:limit]]
+        return FetchKeysResult(keys=keys, last=keys[-1] if len(rows) > limit else None)
+
+    def update(self, key: str, changes: List[delta.Change], data: Dict[str, Any]) -> None:
+        # The changes are applied in order, within one transaction. Each change becomes `path, value` argument pairs of
+        # `json_set`, which applies them from left to right. Runs of `SetValue` changes share a statement, each append
+        # or replacement gets statements of its own, so that an append sees the list as left by the changes before it.
+        statements: List[List[Tuple[Optional[DataModality], str, str]]] = []  # (modality appended to, path, value)
+        in_set_run = False  # Whether the last statement is a run of `SetValue` changes.
+        for change in changes:
+            if isinstance(change, delta.SetValue):
+                if not in_set_run:
+                    statements.append([])
+                statements[-1].append((None, _json_path(change.path), json.dumps(change.value)))
+                in_set_run = True
+                continue
+            path = _json_path((change.modality,))
+            if isinstance(change, delta.AppendItems):
+                statements.append([(change.modality, path, json.dumps(item)) for item in change.items])
+            else:
+                statements.append([(None, path, json.dumps(change.items))])
+            in_set_run = False
+
+        written_at = time.time()
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for pairs in statements:
+                for start in range(0, len(pairs), self.max_changes_per_statement):
+                    self._execute_json_set(conn, key, pairs[start : start + self.max_changes_per_statement], written_at)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _execute_json_set(
+        self,
+        conn: sqlite3.Connection,
+        key: str,
+        pairs: List[Tuple[Optional[DataModality], str, str]],
+        written_at: float,
+    ) -> None:
+        if not pairs:
+            return
+        sql: List[str] = []
+        params: List[Any] = []
+        n_appended: Dict[DataModality, int] = dict()
+        for append_to, path, value in pairs:
+            if append_to is None:
+                sql.append("?, json(?)")
+                params.extend([path, value])
+            else:
+                # Appended items are addressed past the end of the list, as the list was at the start of the statement.
+                sql.append("? || '[' || (json_array_length(data, ?) + ?) || ']', json(?)")
+                params.extend([path, path, n_appended.get(append_to, 0), value])
+                n_appended[append_to] = n_appended.get(append_to, 0) + 1
+        cursor = conn.execute(
+            f"UPDATE {self.table} SET data = json_set(data, {', '.join(sql)}), written_at = ? WHERE key = ?",
+            params + [written_at, key],
+        )
+        if cursor.rowcount == 0:
+            raise KeyError(f"Key not found: {key}")
+
+
+class ChunkedBackend:
+    """Stores the temporal and event items of each sample in chunks of ``chunk_size`` items, as separate items of
+    ``chunks_backend``, so that no stored item grows with the length of the history (Deta Base caps the size of an
+    item). The main item, in ``backend``, keeps the static data and a manifest of the chunks (their keys, sizes, and
+    the time index ranges of the temporal chunks).
+
+    Reads of a time range (`get_projected`) only get the temporal chunks that overlap it, and appending items
+    (`update`) only writes the last chunk and the new ones. Samples stored without chunks are read as they are, and
+    chunked when next written.
+
+    Args:
+        backend (StorageBackend): The store of the main items.
+        chunks_backend (StorageBackend): The store of the chunks, e.g. another table or Deta Base.
+        chunk_size (int, optional): The number of items per chunk.
+    """
+
+    def __init__(
+        self,
+        backend: SampleStore,
+        chunks_backend: SampleStore,
+        chunk_size: int = DEFAULTS.chunk_size,
+        time_index_field: str = DEFAULTS.time_index_field,
+    ) -> None:
+        self.backend = as_backend(backend)
+        self.chunks_backend = as_backend(chunks_backend)
+        self.chunk_size = chunk_size
+        self.time_index_field = time_index_field
+        self.namespace = f"chunked:{self.backend.namespace}"
+
+    @staticmethod
+    def _chunk_key(key: str, modality: str, index: int) -> str:
+        return f"{key}.{modality}.{index:06d}"
+
+    def _chunk_entry(self, key: str, modality: str, index: int, items: List[Dict[str, Any]]) -> Dict[str, Any]:
+        entry: Dict[str, Any] = dict(key=self._chunk_key(key, modality, index), n=len(items))
+        if modality == "temporal" and items:
+            entry["start"] = items[0][self.time_index_field]
+            entry["end"] = items[-1][self.time_index_field]
+        return entry
+
+    def _write_chunks(
+        self, key: str, modality: str, items: List[Dict[str, Any]], first_index: int = 0
+    ) -> List[Dict[str, Any]]:
+        # Write `items` as the chunks from `first_index` on, return their manifest entries.
+        entries: List[Dict[str, Any]] = []
+        chunks: List[Dict[str, Any]] = []
+        for i, start in enumerate(range(0, len(items), self.chunk_size)):
+            chunk_items = items[start : start + self.chunk_size]
+            entry = self._chunk_entry(key, modality, first_index + i, chunk_items)
+            entries.append(entry)
+            chunks.append(dict(key=entry["key"], items=chunk_items))
+        if chunks:
+            self.chunks_backend.put_many(chunks)
+        return entries
+
+    def _read_chunks(self, entries: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        items: List[Dict[str, Any]] = []
+        for entry in entries:
+            chunk = self.chunks_backend.get(entry["key"])
+            if chunk is None:
+                raise KeyError(f"Chunk not found: {entry['key']}")
+            items.extend(chunk["items"])
+        return items
+
+    def _assemble(
+        self, main: Dict[str, Any], time_range: Optional[Tuple[Any, Any]] = None, modalities: Tuple[str, ...] = ()
+    ) -> Dict[str, Any]:
+        if "chunks" not in main:
+            return main
+        item = {k: v for k, v in main.items() if k != "chunks"}
+        for modality, entries in main["chunks"].items():
+            if modalities and modality not in modalities:
+                continue
+            if modality == "temporal" and time_range is not None:
+                entries = [e for e in entries if e["n"] and e["start"] <= time_range[1] and e["end"] >= time_range[0]]
+            item[modality] = self._read_chunks(entries)
+        return item
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        main = self.backend.get(key)
+        return self._assemble(main) if main is not None else None
+
+    def get_projected(self, key: str, projection: Projection) -> Optional[Dict[str, Any]]:
+        main = self.backend.get(key)
+        if main is None:
+            return None
+        item = self._assemble(main, time_range=projection.time_range, modalities=projection.modalities)
+        return apply_projection(item, projection)
+
+    def put(self, data: Dict[str, Any], key: str) -> None:
+        previous = self.backend.get(key)
+        main: Dict[str, Any] = {k: v for k, v in data.items() if k not in delta.LIST_MODALITIES and k != "key"}
+        main["chunks"] = {
+            modality: self._write_chunks(key, modality, data.get(modality, [])) for modality in delta.LIST_MODALITIES
+        }
+        # NOTE: The chunks are written before the manifest, so the main item never refers to missing chunks.
+        self.backend.put(main, key=key)
+        if previous is not None:
+            self._delete_stale_chunks(previous, main)
+
+    def _delete_stale_chunks(self, previous: Dict[str, Any], main: Dict[str, Any]) -> None:
+        kept = {entry["key"] for entries in main.get("chunks", dict()).values() for entry in entries}
+        for entries in previous.get("chunks", dict()).values():
+            for entry in entries:
+                if entry["key"] not in kept:
+                    self.chunks_backend.delete(entry["key"])
+
+    def put_many(self, items: List[Dict[str, Any]]) -> None:
+        for item in items:
+            self.put(item, key=item["key"])
+
+    def delete(self, key: str) -> None:
+        main = self.backend.get(key)
+        self.backend.delete(key)
+        if main is not None:
+            self._delete_stale_chunks(main, dict())
+
+    def fetch(self, limit: int = 1000, last: Optional[str] = None) -> FetchResult:
+        page = self.backend.fetch(limit=limit, last=last)
+        return FetchResult(items=[self._assemble(item) for item in page.items], last=page.last)
+
+    def close(self) -> None:
+        """Close the connections of both stores, see `close`."""
+        close(self.backend)
+        close(self.chunks_backend)
+
+    def fetch_written_since(self, since: float, limit: int = 1000, last: Optional[str] = None) -> FetchResult:
+        # NOTE: Every write of a sample rewrites its main item, so the write times of the main items are enough.
+        page = fetch_written_since(self.backend, since=since, limit=limit, last=last)
+        if page is None:
+            raise NotImplementedError(f"Write times are not recorded by {type(self.backend).__name__}")
+        return FetchResult(items=[self._assemble(item) for item in page.items], last=page.last)
+
+    def fetch_keys(self, limit: int = 1000, last: Optional[str] = None) -> FetchKeysResult:
+        return self.backend.fetch_keys(limit=limit, last=last)
+
+    def update(self, key: str, changes: List[delta.Change], data: Dict[str, Any]) -> None:
+        main = self.backend.get(key)
+        if main is None:
+            raise KeyError(f"Key not found: {key}")
+        if "chunks" not in main:
+            # Not chunked yet.
+            self.put(data, key=key)
+            return
+        previous = dict(main, chunks={modality: list(entries) for modality, entries in main["chunks"].items()})
+        chunks = main["chunks"]
+        changed_chunks: Dict[str, Dict[str, Any]] = dict()  # Chunk key to chunk, the chunks to write.
+
+        def get_chunk(modality: str, position: int) -> Dict[str, Any]:
+            chunk_key = chunks[modality][position]["key"]
+            if chunk_key not in changed_chunks:
+                chunk = self.chunks_backend.get(chunk_key)
+                if chunk is None:
+                    raise KeyError(f"Chunk not found: {chunk_key}")
+                changed_chunks[chunk_key] = chunk
+            return changed_chunks[chunk_key]
+
+        for change in changes:
+            if isinstance(change, delta.SetValue) and change.path[0] == "static":
+                main["static"] = data["static"]
+            elif isinstance(change, delta.SetValue):
+                modality, index = str(change.path[0]), int(change.path[1])
+                position, offset = index // self.chunk_size, index % self.chunk_size
+                chunk = get_chunk(modality, position)
+                if len(change.path) == 2:
+                    chunk["items"][offset] = change.value
+                else:
+                    chunk["items"][offset][change.path[2]] = change.value
+                chunks[modality][position] = self._chunk_entry(key, modality, position, chunk["items"])
+            elif isinstance(change, delta.AppendItems):
+                entries = chunks.setdefault(change.modality, [])
+                items = list(change.items)
+                if entries and entries[-1]["n"] < self.chunk_size:
+                    # Fill the last chunk first.
+                    chunk = get_chunk(change.modality, len(entries) - 1)
+                    n_free = self.chunk_size - len(chunk["items"])
+                    chunk["items"].extend(items[:n_free])
+                    entries[-1] = self._chunk_entry(key, change.modality, len(entries) - 1, chunk["items"])
+                    items = items[n_free:]
+                entries.extend(self._write_chunks(key, change.modality, items, first_index=len(entries)))
+            else:
+                changed_chunks = {
+                    k: v for k, v in changed_chunks.items() if not k.startswith(f"{key}.{change.modality}.")
+                }
+                chunks[change.modality] = self._write_chunks(key, change.modality, change.items)
+
+        if changed_chunks:
+            self.chunks_backend.put_many(list(changed_chunks.values()))
+        self.backend.put(main, key=key)
+        self._delete_stale_chunks(previous, main)
+
+
+def _json_path(path: delta.RecordPath) -> str:
+    return "$" + "".join(f"[{part}]" if isinstance(part, int) else f'."{part}"' for part in path)
+
+
+def get_projected(db: SampleStore, key: str, projection: Projection) -> Optional[Dict[str, Any]]:
+    """Get the parts of the item in ``projection``. Backends that can read only these parts provide a
+    ``get_projected`` method, for the others the whole item is read and the parts are taken from it.
+    """
+    backend = as_backend(db)
+    get_projected_ = getattr(backend, "get_projected", None)
+    if get_projected_ is not None:
+        return get_projected_(key, projection)
+    item = backend.get(key)
+    return apply_projection(item, projection) if item is not None else None
+
+
+def close(db: SampleStore) -> None:
+    """Close the connections held by the backend, for backends that hold any (those with a ``close`` method, e.g.
+    `SQLiteBackend`). Call it once the backend is no longer used by other threads."""
+    close_ = getattr(as_backend(db), "close", None)
+    if close_ is not None:
+        close_()
+
+
+def supports_fetch_written_since(db: SampleStore) -> bool:
+    backend = as_backend(db)
+    if isinstance(backend, ChunkedBackend):
+        return supports_fetch_written_since(backend.backend)
+    return hasattr(backend, "fetch_written_since")
+
+
+def fetch_written_since(
+    db: SampleStore, since: float, limit: int = 1000, last: Optional[str] = None
+) -> Optional[FetchResult]:
+    """Fetch a page of the items written at or after ``since`` (seconds since the epoch), in key order. Backends that
+    record when each item was written provide a ``fetch_written_since`` method, for the others `None` is returned
+    (e.g. Deta Base, whose items carry no write time).
+    """
+    backend = as_backend(db)
+    if not supports_fetch_written_since(backend):
+        return None
+    return backend.fetch_written_since(since=since, limit=limit, last=last)  # type: ignore[attr-defined]
+
+
+def as_backend(db: SampleStore) -> StorageBackend:
+    """Wrap a Deta Base in a `DetaBackend`, pass any other storage backend through as is."""
+    if isinstance(db, DetaBase):
+        return DetaBackend(db)
+    return db
@@ -0,0 +1,133 @@
+import bisect
+from typing import Any, Iterable, List, Set
+
+from .const import DEFAULTS, DataSample
+
+
+class SortedTimeIndex:
+    """The time indexes of the time-steps of a sample, kept sorted as they are inserted, moved and removed.
+
+    Membership is a set lookup, the position of a time index a binary search and the maximum the last element, so that
+    the time-step callbacks do not rebuild, copy or sort the list of all time indexes.
+
+    Args:
+        time_indexes (Iterable): The time indexes, need not be sorted.
+    """
+
+    def __init__(self, time_indexes: Iterable) -> None:
+        self._values: List[Any] = list(time_indexes)
+        if any(a > b for a, b in zip(self._values, self._values[1:])):
+            self._values.sort()
+        self._set: Set[Any] = set(self._values)
+
+    @classmethod
+    def from_temporal(
+        cls, temporal: List[dict], time_index_field: str = DEFAULTS.time_index_field
+    ) -> "SortedTimeIndex":
+        return cls(x[time_index_field] for x in temporal)
+
+    def copy(self) -> "SortedTimeIndex":
+        copied = SortedTimeIndex.__new__(SortedTimeIndex)
+        copied._values = list(self._values)
+        copied._set = set(self._set)
+        return copied
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def __contains__(self, time_index: Any) -> bool:
+        return time_index in self._set
+
+    def __getitem__(self, position: int) -> Any:
+        return self._values[position]
+
+    def to_list(self) -> List[Any]:
+        return list(self._values)
+
+    def window(self, start: int, end: int) -> List[Any]:
+        """The time indexes at the positions from ``start`` to ``end`` (exclusive)."""
+        return self._values[start:end]
+
+    def max(self) -> Any:
+        return self._values[-1]
+
+    def position(self, time_index: Any) -> int:
+        if time_index not in self._set:
+            raise ValueError(f"Time index {time_index} not found")
+        return bisect.bisect_left(self._values, time_index)
+
+    def search(self, time_index: Any) -> int:
+        """The position of the first time index at or after ``time_index``, or of the last one if there is none."""
+        return min(bisect.bisect_left(self._values, time_index), len(self._values) - 1)
+
+    def insert(self, time_index: Any) -> int:
+        """Insert the time index, return its position."""
+        if time_index in self._set:
+            raise ValueError(f"Time index {time_index} already exists")
+        position = bisect.bisect_left(self._values, time_index)
+        self._values.insert(position, time_index)
+        self._set.add(time_index)
+        return position
+
+    def pop(self, position: int) -> Any:
+        time_index = self._values.pop(position)
+        self._set.discard(time_index)
+        return time_index
+
+    def move(self, position: int, time_index: Any) -> int:
+        """Replace the time index at ``position`` with ``time_index``, return the position of the latter."""
+        if self._values[position] == time_index:
+            return position
+        self.pop(position)
+        return self.insert(time_index)
+
+
+def get_time_index(data_sample: DataSample) -> SortedTimeIndex:
+    """Get the sorted time index of the temporal data of the sample, attached to the sample (and built if needed).
+
+    The positions in the index are those of the time-steps, so if the time-steps are not in time order when the index is
+    built, they are sorted (in place).
+
+    NOTE: The index is only kept in sync by the functions of this module (`insert_timestep`, `delete_timestep`,
+    `move_timestep`), it is rebuilt if the temporal list was replaced or its length changed.
+    """
+    attached = data_sample._time_index  # pylint: disable=protected-access
+    if attached is not None and attached[0] is data_sample.temporal and len(attached[1]) == len(data_sample.temporal):
+        return attached[1]
+    time_indexes = [x[DEFAULTS.time_index_field] for x in data_sample.temporal]
+    if any(a > b for a, b in zip(time_indexes, time_indexes[1:])):
+        data_sample.temporal.sort(key=lambda x: x[DEFAULTS.time_index_field])
+    index = SortedTimeIndex(time_indexes)
+    attach_time_index(data_sample, index)
+    return index
+
+
+def attach_time_index(data_sample: DataSample, index: SortedTimeIndex) -> None:
+    data_sample._time_index = (data_sample.temporal, index)  # pylint: disable=protected-access
+
+
+def insert_timestep(data_sample: DataSample, timestep: dict) -> int:
+    """Insert the time-step in time order, return its position."""
+    index = get_time_index(data_sample)
+    position = index.insert(timestep[DEFAULTS.time_index_field])
+    data_sample.temporal.insert(position, timestep)
+    return position
+
+
+def delete_timestep(data_sample: DataSample, position: int) -> None:
+    index = get_time_index(data_sample)
+    index.pop(position)
+    del data_sample.temporal[position]
+
+
+def move_timestep(data_sample: DataSample, position: int, timestep: dict) -> int:
+    """Replace the time-step at ``position`` (whose time index may have changed), keeping the time order, return its
+    new position."""
+    index = get_time_index(data_sample)
+    new_position = index.move(position, timestep[DEFAULTS.time_index_field])
+    if new_position == position:
+        data_sample.temporal[position] = timestep
+    else:
+        del data_sample.temporal[position]
+        data_sample.temporal.insert(new_position, timestep)
+    return new_position
@@ -0,0 +1,88 @@
+import copy
+from types import TracebackType
+from typing import Optional, Set, Type
+
+from loguru import logger
+
+from . import dependencies, deta_utils, field_def, storage
+from .const import DataModality, DataSample
+
+
+class SampleTransaction:
+    """A unit of work for the modifications made to a `DataSample` within one user action.
+
+    The modifications are made directly to ``transaction.data_sample`` and flagged with `mark_modified`. On `commit`,
+    only the computed fields (and time-steps/events) that depend on the modified data are recomputed, see
+    `dependencies.DependencyGraph`, and the sample is written to the DB exactly once. Only the fields that differ from
+    the sample as it was when the transaction started are written, nothing is written if there are none. Used as a
+    context manager, the transaction commits on exiting the block, unless an exception was raised or `rollback` was
+    called.
+
+    Args:
+        db (storage.SampleStore): The sample store.
+        key (str): The key of the sample.
+        data_sample (DataSample): The sample to modify.
+        field_defs (field_def.FieldDefsCollection): The field definitions.
+        current_timestep (field_def.TimeStep): The currently selected time step, passed on to the computations.
+    """
+
+    def __init__(
+        self,
+        db: storage.SampleStore,
+        key: str,
+        data_sample: DataSample,
+        field_defs: field_def.FieldDefsCollection,
+        current_timestep: field_def.TimeStep,
+    ) -> None:
+        self.db = db
+        self.key = key
+        self.data_sample = data_sample
+        self.field_defs = field_defs
+        self.current_timestep = current_timestep
+        self.modified: Set[DataModality] = set()
+        self.finished = False
+        self.original = copy.deepcopy(data_sample)
+
+    def mark_modified(self, modality: DataModality) -> None:
+        self.modified.add(modality)
+
+    def _recompute(self) -> None:
+        edits = dependencies.diff_samples(old=self.original, new=self.data_sample, modalities=self.modified)
+        field_def.get_dependency_graph(self.field_defs).recompute(
+            data_sample=self.data_sample, edits=edits, current_timestep=self.current_timestep
+        )
+
+    def commit(self) -> None:
+        if self.finished:
+            raise RuntimeError("The transaction has already been committed or rolled back")
+        self.finished = True
+        if not self.modified:
+            logger.info(f"Sample {self.key} was not modified, skipping the write")
+            return
+        self._recompute()
+        deta_utils.update_sample_partially(
+            db=self.db,
+            key=self.key,
+            data_sample=self.data_sample,
+            field_defs=self.field_defs,
+            original=deta_utils.encode_sample(data_sample=self.original, field_defs=self.field_defs),
+        )
+
+    def rollback(self) -> None:
+        self.finished = True
+
+    def __enter__(self) -> "SampleTransaction":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        if self.finished:
+            return
+        if exc_type is None:
+            self.commit()
+        else:
+            self.rollback()
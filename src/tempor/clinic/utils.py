@@ -1,18 +1,26 @@
-from typing import TYPE_CHECKING, Any, Dict, List
+from typing import TYPE_CHECKING, Any, Dict, List, Union
 
 import pandas as pd
 
+from . import columnar
 from .const import DEFAULTS
 
 if TYPE_CHECKING:
     from . import field_def
 
 
-def get_temporal_data_time_indexes(data_sample_temporal: List[Dict[str, Any]]) -> List:
+TemporalData = Union[List[Dict[str, Any]], columnar.TemporalColumns]
+
+
+def get_temporal_data_time_indexes(data_sample_temporal: TemporalData) -> List:
+    if isinstance(data_sample_temporal, columnar.TemporalColumns):
+        return data_sample_temporal.time_index.tolist()
     return [x[DEFAULTS.time_index_field] for x in data_sample_temporal]
 
 
-def get_temporal_data_as_df(data_sample_temporal: List[Dict[str, Any]]) -> pd.DataFrame:
+def get_temporal_data_as_df(data_sample_temporal: TemporalData) -> pd.DataFrame:
+    if isinstance(data_sample_temporal, columnar.TemporalColumns):
+        return data_sample_temporal.to_df()
     df_dict = dict()
     if len(data_sample_temporal) < 1:
         raise ValueError("Temporal data list must contain at least one element")
@@ -0,0 +1,263 @@
+import multiprocessing
+import queue
+import threading
+from multiprocessing.connection import Connection
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+from loguru import logger
+
+from . import columnar, field_def, predictions
+from .const import DEFAULTS, DataSample
+
+try:
+    from multiprocessing import shared_memory
+except ImportError:  # pragma: no cover
+    # NOTE: Python 3.7 has no `multiprocessing.shared_memory`, the samples are then pickled whole to the workers.
+    shared_memory = None  # type: ignore [assignment]
+
+
+class SharedColumn(NamedTuple):
+    name: str
+    dtype: str
+    length: int
+    offset: int
+
+
+class SharedSample(NamedTuple):
+    """A `DataSample` whose temporal columns of numbers and dates are in a shared memory block, only this small
+    description of it is pickled."""
+
+    shm_name: Optional[str]
+    feature_names: List[str]
+    columns: List[SharedColumn]
+    object_columns: Dict[str, List[Any]]  # The temporal columns that are not fixed-size (e.g. strings) or have `None`s.
+    static: Dict[str, Any]
+    event: List[Dict[str, Any]]
+
+
+def to_shared_memory(
+    data_sample: DataSample, field_defs: Optional[field_def.FieldDefsCollection] = None
+) -> Tuple[SharedSample, Optional["shared_memory.SharedMemory"]]:
+    """Copy the temporal data of the sample to a new shared memory block, column by column. The caller owns the block
+    (`None` if the sample has no temporal data) and must close and unlink it when the sample has been read.
+
+    The columns with missing values are not copied to the block (they would read back as NaN, NaT or `False` rather
+    than `None`), but pickled as they are, like the columns that are not numbers or dates.
+    """
+    if not data_sample.temporal:
+        return SharedSample(None, [], [], dict(), data_sample.static, data_sample.event), None
+    feature_names = list(field_defs.temporal.keys() if field_defs is not None else data_sample.temporal[0].keys())
+    arrays: Dict[str, np.ndarray] = dict()
+    object_columns: Dict[str, List[Any]] = dict()
+    for name in feature_names:
+        column = [record[name] for record in data_sample.temporal]
+        if all(value is not None for value in column):
+            dtype = columnar.NUMPY_DTYPES.get(field_defs.temporal[name].data_type) if field_defs is not None else None
+            array = np.array(column, dtype=dtype)
+            if array.dtype.kind in "biufM":
+                arrays[name] = array
+                continue
+        object_columns[name] = column
+    shm = shared_memory.SharedMemory(create=True, size=max(sum(values.nbytes for values in arrays.values()), 1))
+    columns: List[SharedColumn] = []
+    offset = 0
+    for name, values in arrays.items():
+        target: np.ndarray = np.ndarray(values.shape, dtype=values.dtype, buffer=shm.buf, offset=offset)
+        target[:] = values
+        del target
+        columns.append(SharedColumn(name=name, dtype=values.dtype.str, length=len(values), offset=offset))
+        offset += values.nbytes
+    shared = SharedSample(shm.name, feature_names, columns, object_columns, data_sample.static, data_sample.event)
+    return shared, shm
+
+
+def from_shared_memory(shared: SharedSample) -> DataSample:
+    if shared.shm_name is None:
+        return DataSample(static=shared.static, temporal=[], event=shared.event)
+    shm = shared_memory.SharedMemory(name=shared.shm_name)
+    try:
+        views = {
+            column.name: np.ndarray((column.length,), dtype=column.dtype, buffer=shm.buf, offset=column.offset)
+            for column in shared.columns
+        }
+        python_columns = {name: values.tolist() for name, values in views.items()}
+        del views  # The views must be released before the block is closed.
+    finally:
+        shm.close()
+    python_columns.update(shared.object_columns)
+    temporal = [
+        dict(zip(shared.feature_names, row)) for row in zip(*(python_columns[name] for name in shared.feature_names))
+    ]
+    return DataSample(static=shared.static, temporal=temporal, event=shared.event)
+
+
+def _worker_main(conn: Connection, model_factory: Callable[[], Any]) -> None:
+    model = model_factory()
+    while True:
+        try:
+            message = conn.recv()
+        except EOFError:
+            return
+        if message is None:
+            return
+        if message[0] == "ping":
+            conn.send(("pong", None))
+            continue
+        _, sample, time_max, time_resolution, kwargs = message
+        try:
+            data_sample = from_shared_memory(sample) if isinstance(sample, SharedSample) else sample
+            result = model(data_sample, time_max=time_max, time_resolution=time_resolution, **kwargs)
+            conn.send(("ok", result))
+        except Exception as ex:  # pylint: disable=broad-except
+            conn.send(("error", f"{type(ex).__name__}: {ex}"))
+
+
+class _Worker:
+    def __init__(self, context: Any, model_factory: Callable[[], Any], index: int) -> None:
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(
+            target=_worker_main, args=(child_conn, model_factory), name=f"model_worker_{index}", daemon=True
+        )
+        self.process.start()
+        child_conn.close()
+
+    def request(self, message: Any, timeout: Optional[float]) -> Any:
+        self.conn.send(message)
+        if not self.conn.poll(timeout):
+            raise TimeoutError(f"Model worker did not reply within {timeout} s")
+        status, payload = self.conn.recv()
+        if status == "error":
+            raise RuntimeError(f"Model worker error: {payload}")
+        return payload
+
+    def stop(self) -> None:
+        try:
+            self.conn.send(None)
+        except (BrokenPipeError, OSError):
+            pass
+        self.process.join(timeout=1)
+        if self.process.is_alive():
+            self.process.kill()
+        self.conn.close()
+
+
+class ModelWorkerPool:
+    """Runs a risk model in ``n_workers`` subprocesses, so that inference does not hold the GIL of the app process.
+
+    Each worker calls ``model_factory`` once, to load the model (a `components.RiskPredictionCallback`). The pool is
+    itself a `components.RiskPredictionCallback` and can be passed to `components.risk_prediction_chart` as is, and is
+    `predictions.prefix_consistent` (or has a ``cache_key``) if the model factory is. The temporal data of the samples
+    is passed to the workers through shared memory, see `to_shared_memory` (pickled whole on Python 3.7).
+
+    A worker that crashes or times out is restarted. With ``health_check_interval``, the idle workers are also pinged
+    regularly by a background thread, and restarted if they do not reply.
+
+    Args:
+        model_factory (Callable[[], Any]): Loads the model. Must be picklable (e.g. a module-level function), as the
+            workers are started with the ``"spawn"`` method.
+        n_workers (int, optional): The number of worker processes.
+        field_defs (Optional[field_def.FieldDefsCollection], optional): Used to type the shared temporal columns.
+        timeout (Optional[float], optional): Seconds to wait for a prediction, `None` to wait indefinitely.
+        health_check_interval (Optional[float], optional): Seconds between health checks, `None` to disable them.
+    """
+
+    def __init__(
+        self,
+        model_factory: Callable[[], Any],
+        n_workers: int = DEFAULTS.model_workers,
+        field_defs: Optional[field_def.FieldDefsCollection] = None,
+        timeout: Optional[float] = DEFAULTS.model_worker_timeout,
+        health_check_interval: Optional[float] = DEFAULTS.model_worker_health_check_interval,
+    ) -> None:
+        self.__name__ = getattr(model_factory, "__name__", type(self).__name__)
+        self.__doc__ = getattr(model_factory, "__doc__", None)
+        self.prefix_consistent = predictions.is_prefix_consistent(model_factory)
+        cache_key = getattr(model_factory, "cache_key", None)
+        if isinstance(cache_key, str):
+            self.cache_key = cache_key
+        self.model_factory = model_factory
+        self.n_workers = n_workers
+        self.field_defs = field_defs
+        self.timeout = timeout
+        self._context = multiprocessing.get_context("spawn")
+        self._idle: "queue.Queue[_Worker]" = queue.Queue()
+        self._n_started = 0
+        self._closed = threading.Event()
+        for _ in range(n_workers):
+            self._idle.put(self._start_worker())
+        self._health_thread: Optional[threading.Thread] = None
+        if health_check_interval is not None:
+            self._health_thread = threading.Thread(
+                target=self._health_loop, args=(health_check_interval,), name="model_worker_health", daemon=True
+            )
+            self._health_thread.start()
+
+    def _start_worker(self) -> _Worker:
+        self._n_started += 1
+        return _Worker(self._context, self.model_factory, index=self._n_started)
+
+    def _restart(self, worker: _Worker, reason: str) -> _Worker:
+        logger.warning(f"Restarting model worker {worker.process.name}: {reason}")
+        worker.stop()
+        return self._start_worker()
+
+    def __call__(self, data_sample: DataSample, time_max: Any, time_resolution: Any, **kwargs) -> pd.DataFrame:
+        if self._closed.is_set():
+            raise RuntimeError("The model worker pool is closed")
+        sample: Union[SharedSample, DataSample]
+        if shared_memory is not None:
+            sample, shm = to_shared_memory(data_sample, field_defs=self.field_defs)
+        else:  # pragma: no cover
+            sample, shm = data_sample, None
+        message = ("predict", sample, time_max, time_resolution, kwargs)
+        try:
+            for _ in range(2):
+                worker = self._idle.get()
+                try:
+                    return worker.request(message, timeout=self.timeout)
+                except (EOFError, BrokenPipeError, ConnectionResetError) as ex:
+                    # The worker crashed, restart it and retry once.
+                    worker = self._restart(worker, reason=repr(ex))
+                    error: Exception = ex
+                except TimeoutError as ex:
+                    worker = self._restart(worker, reason=repr(ex))
+                    raise
+                finally:
+                    self._idle.put(worker)
+            raise RuntimeError(f"Model worker crashed: {error!r}") from error
+        finally:
+            if shm is not None:
+                shm.close()
+                shm.unlink()
+
+    def check_health(self, timeout: float = 5.0) -> int:
+        """Ping the idle workers, restart those that are dead or do not reply. Returns the number restarted."""
+        n_restarted = 0
+        workers: List[_Worker] = []
+        while True:
+            try:
+                workers.append(self._idle.get_nowait())
+            except queue.Empty:
+                break
+        for worker in workers:
+            try:
+                if not worker.process.is_alive():
+                    raise EOFError("process exited")
+                worker.request(("ping",), timeout=timeout)
+            except (EOFError, BrokenPipeError, ConnectionResetError, TimeoutError) as ex:
+                worker = self._restart(worker, reason=repr(ex))
+                n_restarted += 1
+            self._idle.put(worker)
+        return n_restarted
+
+    def _health_loop(self, interval: float) -> None:
+        while not self._closed.wait(interval):
+            self.check_health()
+
+    def close(self) -> None:
+        """Stop the workers, once they are done with the predictions in progress."""
+        self._closed.set()
+        for _ in range(self.n_workers):
+            self._idle.get().stop()
@@ -7,4 +7,49 @@
     - https://docs.pytest.org/en/stable/writing_plugins.html
 """
 
-# import pytest
+import pytest
+
+
+@pytest.fixture
+def field_defs_raw():
+    return {
+        "static": {
+            "age": {"data_type": "int", "readable_name": "Age", "default_value": 50, "min_value": 0},
+            "sex": {"data_type": "categorical", "readable_name": "Sex", "options": ["female", "male"]},
+            "n_visits": {
+                "data_type": "int",
+                "readable_name": "Number of visits",
+                "is_computed": True,
+                "computation": lambda data_sample, current_timestep: len(data_sample.temporal),
+            },
+        },
+        "temporal": {
+            "time_index": {"data_type": "int", "readable_name": "Day", "is_time_index": True},
+            "hr": {"data_type": "float", "readable_name": "Heart rate", "default_value": 70.0},
+            "smoker": {"data_type": "binary", "readable_name": "Smoker", "timestep_default_mode": "take_previous"},
+            "hr_x_age": {
+                "data_type": "float",
+                "readable_name": "Heart rate times age",
+                "is_computed": True,
+                "computation": lambda data_sample, current_timestep: (
+                    data_sample.temporal[current_timestep]["hr"] * data_sample.static["age"]
+                ),
+            },
+        },
+    }
+
+
+@pytest.fixture
+def field_defs(field_defs_raw):
+    from tempor.clinic import field_def
+
+    return field_def.parse_field_defs(field_defs_raw)
+
+
+@pytest.fixture
+def backend(tmp_path):
+    from tempor.clinic import storage
+
+    db = storage.SQLiteBackend(path=str(tmp_path / "samples.db"))
+    yield db
+    db.close()
@@ -0,0 +1,44 @@
+import concurrent.futures
+from unittest.mock import Mock
+
+import pandas as pd
+import pytest
+
+from tempor.clinic import predictions
+from tempor.clinic.batching import MicroBatchScheduler
+from tempor.clinic.const import DataSample
+
+
+def test_micro_batch_scheduler():
+    def batch_callback(data_samples, time_max, time_resolution):
+        return [pd.DataFrame({"risk_prediction": [x.static["id"] / 100]}) for x in data_samples]
+
+    batch_callback = Mock(wraps=batch_callback, __name__="survival", prefix_consistent=True)
+    scheduler = MicroBatchScheduler(batch_callback, max_batch_size=4, max_wait_ms=200)
+    assert scheduler.__name__ == "survival"
+    assert predictions.is_prefix_consistent(scheduler)
+
+    samples = [DataSample(static={"id": i}, temporal=[], event=[]) for i in range(6)]
+    with concurrent.futures.ThreadPoolExecutor(max_workers=6) as executor:
+        results = list(executor.map(lambda x: scheduler(x, time_max=5, time_resolution=1), samples))
+    scheduler.close()
+
+    # Each caller gets its own result back, from a batch of 4 (full) and a batch of 2 (after the wait).
+    assert [x["risk_prediction"][0] for x in results] == [i / 100 for i in range(6)]
+    assert sorted(len(call[0][0]) for call in batch_callback.call_args_list) == [2, 4]
+    with pytest.raises(RuntimeError):
+        scheduler(samples[0], time_max=5, time_resolution=1)
+
+
+@pytest.mark.filterwarnings("ignore::pytest.PytestUnhandledThreadExceptionWarning")
+def test_micro_batch_scheduler_stopped():
+    class Stop(BaseException):
+        pass
+
+    def batch_callback(data_samples, time_max, time_resolution):
+        raise Stop()
+
+    scheduler = MicroBatchScheduler(batch_callback, max_wait_ms=0, timeout=5)
+    with pytest.raises(RuntimeError, match="stopped"):
+        scheduler(DataSample(static={}, temporal=[], event=[]), time_max=5, time_resolution=1)
+    scheduler._thread.join(timeout=5)  # pylint: disable=protected-access
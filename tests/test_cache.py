@@ -0,0 +1,41 @@
+import time
+
+from tempor.clinic import cache, deta_utils
+
+
+def test_lru_cache_evicts_least_recently_used():
+    lru = cache.LRUCache(max_size=2)
+    lru.put("a", 1)
+    lru.put("b", 2)
+    assert lru.get("a") == 1  # "b" is now the least recently used.
+    lru.put("c", 3)
+
+    assert "b" not in lru
+    assert lru.get("a") == 1
+    assert lru.get("c") == 3
+    assert lru.stats() == cache.CacheStats(hits=3, misses=0, size=2, max_size=2)
+
+
+def test_lru_cache_ttl():
+    lru = cache.LRUCache(max_size=2, ttl=0.01)
+    lru.put("a", 1)
+    time.sleep(0.02)
+
+    assert lru.get("a", default="missing") == "missing"
+    assert lru.stats().misses == 1
+    assert len(lru) == 0
+
+
+def test_get_sample_read_through(backend, field_defs):
+    deta_utils.SAMPLE_CACHE.clear()
+    deta_utils.add_empty_sample(db=backend, key="abc", field_defs=field_defs, current_timestep=0)
+
+    sample = deta_utils.get_sample(key="abc", db=backend, field_defs=field_defs)
+    sample.static["age"] = 99  # Modifying the returned sample must not affect the cache.
+    assert deta_utils.get_sample(key="abc", db=backend, field_defs=field_defs).static["age"] == 50
+    assert deta_utils.SAMPLE_CACHE.stats().hits == 1
+    assert deta_utils.SAMPLE_CACHE.stats().misses == 1
+
+    deta_utils.update_sample(db=backend, key="abc", data_sample=sample, field_defs=field_defs)
+    assert deta_utils.get_sample(key="abc", db=backend, field_defs=field_defs).static["age"] == 99
+    assert deta_utils.SAMPLE_CACHE.stats().misses == 2
@@ -0,0 +1,37 @@
+from tempor.clinic import charts
+
+
+def test_temporal_feature_figure_cached(field_defs):
+    charts.FIGURE_CACHE.clear()
+    temporal = [{"time_index": i, "hr": 70.0 + i, "smoker": False, "hr_x_age": 1.0} for i in range(5)]
+    version = ("db", "a", 0)
+
+    fig = charts.temporal_feature_figure(temporal, field_defs.temporal, feature_key="hr", sample_version=version)
+    assert list(fig.data[0].y) == [70.0, 71.0, 72.0, 73.0, 74.0]
+    assert fig.data[0].type == "scatter"
+    assert (
+        charts.temporal_feature_figure(temporal, field_defs.temporal, feature_key="hr", sample_version=version) is fig
+    )
+
+    temporal[0]["hr"] = 60.0  # Written, so the version is bumped.
+    fig = charts.temporal_feature_figure(temporal, field_defs.temporal, feature_key="hr", sample_version=("db", "a", 1))
+    assert fig.data[0].y[0] == 60.0
+    fig = charts.temporal_feature_figure(
+        temporal, field_defs.temporal, feature_key="hr", sample_version=("db", "a", 1), webgl_threshold=3
+    )
+    assert fig.data[0].type == "scattergl"
+
+
+def test_temporal_feature_figure_downsampled(field_defs):
+    temporal = [{"time_index": i, "hr": float(i % 7), "smoker": False, "hr_x_age": 1.0} for i in range(100)]
+    version = ("db", "b", 0)
+
+    fig = charts.temporal_feature_figure(
+        temporal, field_defs.temporal, feature_key="hr", sample_version=version, max_points=20
+    )
+    assert len(fig.data[0].y) == 20
+
+    fig = charts.temporal_feature_figure(
+        temporal, field_defs.temporal, feature_key="hr", sample_version=version, max_points=20, time_range=(10, 19)
+    )
+    assert list(fig.data[0].x) == list(range(10, 20))
@@ -0,0 +1,54 @@
+import datetime
+
+import pytest
+
+from tempor.clinic import field_def
+
+
+def test_record_codec_matches_per_field_conversion(field_defs_raw):
+    field_defs_raw["temporal"]["visit_date"] = {
+        "data_type": "date",
+        "readable_name": "Visit date",
+        "transform_db_to_input": lambda value: value.replace("/", "-"),
+    }
+    field_defs = field_def.parse_field_defs(field_defs_raw)
+    codec = field_def.get_codecs(field_defs).temporal
+    raw = [
+        {"visit_date": f"2020/01/0{i + 1}", "hr_x_age": 1, "smoker": i % 2, "hr": 70 + i, "time_index": i}
+        for i in range(3)
+    ]
+
+    decoded = codec.decode_many(raw)
+    expected = [field_def.process_db_to_input(field_defs=field_defs.temporal, data=x) for x in raw]
+    assert decoded == expected
+    assert list(decoded[0].keys()) == list(field_defs.temporal.keys())
+    assert decoded[0]["visit_date"] == datetime.date(2020, 1, 1)
+    assert type(decoded[0]["hr"]) is float and type(decoded[0]["time_index"]) is int
+
+    assert codec.encode_many(decoded) == [
+        field_def.process_input_to_db(field_defs=field_defs.temporal, data=x) for x in decoded
+    ]
+    assert codec.decode(raw[0]) == expected[0]
+
+
+def test_codecs_compiled_once_per_collection(field_defs):
+    assert field_def.get_codecs(field_defs) is field_def.get_codecs(field_defs)
+    assert field_def.get_codecs(field_defs._replace(static=dict())).static.field_names == ()
+
+    static, temporal, event = field_defs  # The collection is only the three modalities.
+    assert field_def.get_dependency_graph(field_defs) is field_def.get_dependency_graph(field_defs)
+
+
+def test_column_conversion_matches_per_value_conversion():
+    dates = [datetime.date(2020, 1, 31), datetime.datetime(2021, 6, 1, 12, 30)]
+    columns = [
+        (field_def._decode_date, ["2020-01-31", "2021-06-01T12:30:00"]),
+        (field_def._encode_date, dates),
+        (str, ["a", "", "b\x00"]),
+        (bool, [1, 0, 1]),
+    ]
+    for converter, values in columns:
+        assert field_def._convert_column(converter, values) == [converter(value) for value in values]
+    # Values the per-value converter rejects are still rejected.
+    with pytest.raises(TypeError):
+        field_def._convert_column(field_def._decode_date, ["2020-01-31", None])
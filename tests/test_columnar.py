@@ -0,0 +1,50 @@
+import datetime
+
+import numpy as np
+
+from tempor.clinic import columnar, field_def, utils
+
+
+def test_temporal_columns(field_defs):
+    records = [
+        {"time_index": 1, "hr": 72.0, "smoker": True, "hr_x_age": 1.0},
+        {"time_index": 0, "hr": 70.0, "smoker": False, "hr_x_age": 2.0},
+    ]
+    columns = columnar.TemporalColumns.from_records(records, field_defs=field_defs.temporal)
+
+    assert columns.column("hr").dtype == np.float64
+    assert columns.column("smoker").dtype == np.bool_
+    assert len(columns) == 2
+    assert columns[0] == records[1]  # Sorted by time index.
+    assert columns.to_records() == [records[1], records[0]]
+    assert utils.get_temporal_data_time_indexes(columns) == [0, 1]
+
+    df = utils.get_temporal_data_as_df(columns)
+    assert df.equals(utils.get_temporal_data_as_df([records[1], records[0]]))
+    assert np.shares_memory(df["hr"].to_numpy(), columns.column("hr"))
+
+
+def test_temporal_columns_dates():
+    field_defs = field_def.parse_field_defs(
+        {"temporal": {"time_index": {"data_type": "date", "readable_name": "Date", "is_time_index": True}}}
+    )
+    records = [{"time_index": datetime.date(2020, 1, 2)}, {"time_index": datetime.date(2020, 1, 1)}]
+    columns = columnar.TemporalColumns.from_records(records, field_defs=field_defs.temporal)
+
+    assert columns.time_index.dtype == np.dtype("datetime64[D]")
+    assert list(columns) == [records[1], records[0]]
+
+
+def test_temporal_columns_missing_values(field_defs_raw):
+    field_defs_raw["temporal"]["n_pills"] = {"data_type": "int", "readable_name": "Pills"}
+    field_defs = field_def.parse_field_defs(field_defs_raw)
+    records = [
+        {"time_index": 0, "hr": 70.0, "smoker": None, "hr_x_age": 1.0, "n_pills": 2},
+        {"time_index": 1, "hr": None, "smoker": True, "hr_x_age": 2.0, "n_pills": None},
+    ]
+    columns = columnar.TemporalColumns.from_records(records, field_defs=field_defs.temporal)
+
+    assert columns.column("n_pills").dtype == np.float64
+    assert columns.column("n_pills")[0] == 2 and np.isnan(columns.column("n_pills")[1])
+    assert np.isnan(columns.column("hr")[1])
+    assert columns.column("smoker").tolist() == [None, True]
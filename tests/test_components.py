@@ -0,0 +1,137 @@
+from unittest.mock import MagicMock
+
+import pytest
+import streamlit as st
+
+from tempor.clinic import components, deta_utils, field_def, sample_index
+from tempor.clinic.app_state import AppState
+from tempor.clinic.const import DEFAULTS, DataSample
+
+
+@pytest.fixture
+def session_state(monkeypatch):
+    state = dict()
+    monkeypatch.setattr(st, "session_state", state)
+    return state
+
+
+@pytest.fixture
+def app_state(session_state):
+    return AppState()
+
+
+def _set_widgets(session_state, field_defs, values):
+    # What the edit form widgets would put in the session state.
+    for name, value in values.items():
+        session_state[field_def.get_widget_st_key(field_defs[name])] = value
+
+
+def test_static_edit_in_transaction(session_state, app_state, backend, field_defs):
+    index = sample_index.get_sample_index(backend, search_fields=["sex"])
+    components._add_new_sample(app_state=app_state, db=backend, key="abc", field_defs=field_defs)
+    assert app_state.current_sample == "abc"
+    assert index.search().keys == ["abc"]  # `on_sample_added`.
+
+    data_sample = deta_utils.get_sample(key="abc", db=backend, field_defs=field_defs)
+    _set_widgets(session_state, field_defs.static, {"age": 10, "sex": "female"})
+    components._update_sample_static_data(
+        app_state=app_state, db=backend, field_defs=field_defs, data_sample=data_sample
+    )
+
+    stored = deta_utils.get_sample(key="abc", db=backend, field_defs=field_defs)
+    assert stored.static == {"age": 10, "sex": "female", "n_visits": 1}
+    # The temporal computed fields were recomputed on commit.
+    assert stored.temporal[0]["hr_x_age"] == 700.0
+    assert index.search("fem", field="sex").keys == ["abc"]  # `on_sample_updated`.
+
+
+def test_time_index_insert_move_delete(session_state, app_state, backend, field_defs):
+    components._add_new_sample(app_state=app_state, db=backend, key="abc", field_defs=field_defs)
+
+    def sample():
+        return deta_utils.get_sample(key="abc", db=backend, field_defs=field_defs)
+
+    def stored_time_indexes():
+        return [x["time_index"] for x in sample().temporal]
+
+    for new_time_index in (5, 2):
+        components._add_sample_temporal_data(
+            app_state=app_state, db=backend, field_defs=field_defs, data_sample=sample(), new_time_index=new_time_index
+        )
+    assert stored_time_indexes() == [0, 2, 5]
+    assert app_state.current_timestep == 1
+
+    # Move the time-step at 2 past the last one.
+    _set_widgets(session_state, field_defs.temporal, {"time_index": 7, "hr": 90.0, "smoker": True})
+    components._update_sample_temporal_data(
+        app_state=app_state,
+        db=backend,
+        field_defs=field_defs,
+        data_sample=sample(),
+        validation_error_container=MagicMock(),
+    )
+    assert stored_time_indexes() == [0, 5, 7]
+    assert app_state.current_timestep == 2
+    assert sample().temporal[2]["hr_x_age"] == 90.0 * 50
+
+    # A time index that already exists is rejected, the sample is left as it was.
+    data_sample = sample()
+    _set_widgets(session_state, field_defs.temporal, {"time_index": 0, "hr": 60.0, "smoker": False})
+    components._update_sample_temporal_data(
+        app_state=app_state,
+        db=backend,
+        field_defs=field_defs,
+        data_sample=data_sample,
+        validation_error_container=MagicMock(),
+    )
+    assert [x["time_index"] for x in data_sample.temporal] == [0, 5, 7]
+    assert stored_time_indexes() == [0, 5, 7]
+    assert app_state.current_timestep == 2
+
+    components._delete_sample_temporal_data(
+        app_state=app_state, db=backend, field_defs=field_defs, data_sample=sample()
+    )
+    assert stored_time_indexes() == [0, 5]
+    assert app_state.current_timestep == 1
+    assert sample().static["n_visits"] == 2
+
+
+def test_timestep_window_navigation_and_jump(session_state, app_state, field_defs):
+    assert components._timestep_window(current_timestep=120, n_timesteps=250, window_size=50) == (100, 150)
+    assert components._timestep_window(current_timestep=240, n_timesteps=250, window_size=50) == (200, 250)
+
+    app_state.current_timestep = 120
+    components._navigate_timestep_window(app_state, n_timesteps=250, window_size=50, direction=1)
+    assert app_state.current_timestep == 150
+    components._navigate_timestep_window(app_state, n_timesteps=250, window_size=50, direction=-1)
+    assert app_state.current_timestep == 100
+    app_state.current_timestep = 240
+    components._navigate_timestep_window(app_state, n_timesteps=250, window_size=50, direction=1)
+    assert app_state.current_timestep == 249  # Clamped to the last time-step.
+
+    data_sample = DataSample(static=dict(), temporal=[{"time_index": t} for t in range(0, 500, 2)], event=[])
+    for query, expected in ((5, 3), (6, 3), (10_000, 249)):
+        session_state[DEFAULTS.key_timestep_search] = query
+        components._jump_to_time_index(app_state, data_sample, timestep_search_key=DEFAULTS.key_timestep_search)
+        assert app_state.current_timestep == expected
+
+
+def test_sample_finder_and_hooks(session_state, app_state, backend, field_defs, monkeypatch):
+    for key in ("a1", "a2", "b1"):
+        components._add_new_sample(app_state=app_state, db=backend, key=key, field_defs=field_defs)
+    app_state.current_sample = None
+    monkeypatch.setattr(st, "text_input", lambda label, key: session_state.get(key, ""))
+    session_state[DEFAULTS.key_sample_search] = "a"
+    app_settings = components.AppSettings(name="Test", example_name="patient")
+
+    data_sample = components.sample_finder(app_settings, app_state, backend, field_defs)
+    assert app_state.current_sample == "a1"  # The first match.
+    assert data_sample == deta_utils.get_sample(key="a1", db=backend, field_defs=field_defs)
+    assert session_state[DEFAULTS.key_sample_search_page] == 1
+
+    components._delete_current_example(app_state=app_state, db=backend)
+    assert app_state.current_sample is None
+    index = sample_index.get_sample_index(backend)
+    assert index.search("a").keys == ["a2"]  # `on_sample_deleted`.
+    components.sample_finder(app_settings, app_state, backend, field_defs)
+    assert app_state.current_sample == "a2"
@@ -0,0 +1,36 @@
+from tempor.clinic import delta
+
+
+def test_diff_records():
+    old = {
+        "static": {"age": 50, "sex": "female"},
+        "temporal": [{"time_index": 0, "hr": 70.0}, {"time_index": 1, "hr": 72.0}, {"time_index": 2, "hr": 71.0}],
+        "event": [],
+    }
+    new = {
+        "static": {"age": 51, "sex": "female"},
+        "temporal": [
+            {"time_index": 0, "hr": 70.0},
+            {"time_index": 1, "hr": 80.0},
+            {"time_index": 2, "hr": 71.0},
+            {"time_index": 3, "hr": 75.0},
+        ],
+        "event": [],
+    }
+
+    assert delta.diff_records(old, old) == []
+    assert delta.diff_records(old, new) == [
+        delta.SetValue(path=("static", "age"), value=51),
+        delta.SetValue(path=("temporal", 1, "hr"), value=80.0),
+        delta.AppendItems(modality="temporal", items=[{"time_index": 3, "hr": 75.0}]),
+    ]
+
+
+def test_diff_records_replaces_list():
+    old = {"static": {}, "temporal": [{"time_index": 0}, {"time_index": 1}], "event": []}
+
+    removed = {"static": {}, "temporal": [{"time_index": 1}], "event": []}
+    assert delta.diff_records(old, removed) == [delta.ReplaceModality(modality="temporal", items=removed["temporal"])]
+
+    resorted = {"static": {}, "temporal": [{"time_index": 1}, {"time_index": 0}], "event": []}
+    assert delta.diff_records(old, resorted) == [delta.ReplaceModality(modality="temporal", items=resorted["temporal"])]
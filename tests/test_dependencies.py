@@ -0,0 +1,107 @@
+from unittest.mock import Mock
+
+import pytest
+
+from tempor.clinic import deta_utils, field_def
+from tempor.clinic.const import DataSample
+from tempor.clinic.dependencies import Edit, diff_samples
+from tempor.clinic.transaction import SampleTransaction
+
+
+def test_recompute_only_affected(field_defs_raw):
+    hr_x_age = Mock(side_effect=lambda data_sample, idx: data_sample.temporal[idx]["hr"] * data_sample.static["age"])
+    sum_hr_x_age_fn = Mock(side_effect=lambda data_sample, _: sum(x["hr_x_age"] for x in data_sample.temporal))
+    field_defs_raw["static"]["n_visits"]["depends_on"] = ["temporal"]
+    field_defs_raw["static"]["sum_hr_x_age"] = {
+        "data_type": "float",
+        "readable_name": "Sum",
+        "is_computed": True,
+        "computation": sum_hr_x_age_fn,
+        "depends_on": ["temporal.hr_x_age"],
+    }
+    field_defs_raw["temporal"]["hr_x_age"].update(
+        computation=hr_x_age, depends_on=["static.age", "temporal.hr"], item_local=True
+    )
+    field_defs = field_def.parse_field_defs(field_defs_raw)
+    graph = field_def.get_dependency_graph(field_defs)
+    # The static sum waits for the temporal field it depends on.
+    assert graph.order.index(("temporal", "hr_x_age")) < graph.order.index(("static", "sum_hr_x_age"))
+
+    old = DataSample(
+        static={"age": 2, "sex": "male", "n_visits": 3, "sum_hr_x_age": 6.0},
+        temporal=[{"time_index": i, "hr": 1.0, "smoker": False, "hr_x_age": 2.0} for i in range(3)],
+        event=[],
+    )
+    new = old.copy(deep=True)
+    new.static["sex"] = "female"
+    assert graph.recompute(new, diff_samples(old, new), current_timestep=0) == []
+    assert hr_x_age.call_count == 0 and sum_hr_x_age_fn.call_count == 0
+
+    new.temporal[1]["hr"] = 2.0
+    assert diff_samples(old, new, modalities=["temporal"]) == [Edit("temporal", "hr", 1)]
+    graph.recompute(new, diff_samples(old, new), current_timestep=0)
+    assert hr_x_age.call_args_list[0][0][1] == 1 and hr_x_age.call_count == 1  # Only the edited time-step.
+    assert new.static["sum_hr_x_age"] == 8.0
+
+    old, new = new, new.copy(deep=True)
+    new.static["age"] = 3
+    graph.recompute(new, diff_samples(old, new), current_timestep=0)
+    assert [x["hr_x_age"] for x in new.temporal] == [3.0, 6.0, 3.0]  # All time-steps.
+    assert new.static["sum_hr_x_age"] == 12.0
+
+
+def test_recompute_items_with_their_own_index(field_defs_raw):
+    # Reads the previous time-step, so it is not item-local (the default).
+    hr_change = Mock(
+        side_effect=lambda data_sample, idx: data_sample.temporal[idx]["hr"] - data_sample.temporal[idx - 1]["hr"]
+        if idx > 0
+        else 0.0
+    )
+    field_defs_raw["temporal"]["hr_change"] = {
+        "data_type": "float",
+        "readable_name": "Heart rate change",
+        "is_computed": True,
+        "computation": hr_change,
+        "depends_on": ["temporal.hr"],
+    }
+    graph = field_def.get_dependency_graph(field_def.parse_field_defs(field_defs_raw))
+
+    old = DataSample(
+        static={"age": 2, "sex": "male", "n_visits": 3},
+        temporal=[{"time_index": i, "hr": 1.0, "smoker": False, "hr_x_age": 2.0, "hr_change": 0.0} for i in range(3)],
+        event=[],
+    )
+    new = old.copy(deep=True)
+    new.temporal[0]["hr"] = 3.0
+    # The edit of the first time-step changes the value of the second one, each item is computed with its own index
+    # (not the selected time-step).
+    graph.recompute(new, diff_samples(old, new, modalities=["temporal"]), current_timestep=2)
+    assert [call[0][1] for call in hr_change.call_args_list] == [0, 1, 2]
+    assert [x["hr_change"] for x in new.temporal] == [0.0, -2.0, 0.0]
+
+
+def test_dependency_errors(field_defs_raw):
+    field_defs_raw["temporal"]["hr_x_age"]["depends_on"] = ["temporal.unknown"]
+    with pytest.raises(ValueError, match="unknown field"):
+        field_def.parse_field_defs(field_defs_raw)
+    field_defs_raw["temporal"]["hr_x_age"]["depends_on"] = ["static.n_visits"]
+    field_defs_raw["static"]["n_visits"]["depends_on"] = ["temporal.hr_x_age"]
+    with pytest.raises(ValueError, match="circular"):
+        field_def.parse_field_defs(field_defs_raw)
+
+
+def test_static_edit_refreshes_temporal_computed_fields(backend, field_defs):
+    deta_utils.add_empty_sample(db=backend, key="abc", field_defs=field_defs, current_timestep=0)
+    sample = deta_utils.get_sample(key="abc", db=backend, field_defs=field_defs)
+    sample.temporal.append(dict(sample.temporal[0], time_index=1, hr=80.0))
+
+    with SampleTransaction(
+        db=backend, key="abc", data_sample=sample, field_defs=field_defs, current_timestep=0
+    ) as transaction:
+        sample.static["age"] = 10
+        transaction.mark_modified("static")
+        transaction.mark_modified("temporal")
+
+    stored = deta_utils.get_sample(key="abc", db=backend, field_defs=field_defs)
+    assert [x["hr_x_age"] for x in stored.temporal] == [700.0, 800.0]
+    assert stored.static["n_visits"] == 2
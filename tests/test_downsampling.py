@@ -0,0 +1,26 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from tempor.clinic import downsampling
+
+
+@pytest.mark.parametrize("method", downsampling.METHODS)
+def test_downsample_keeps_peaks(method):
+    y = np.sin(np.linspace(0, 20, 10_000))
+    y[1234] = 10.0
+    y[8765] = -10.0
+    df = pd.DataFrame({"hr": y}, index=pd.Index(np.arange(10_000) * 2, name="time_index"))
+
+    downsampled = downsampling.downsample(df, "hr", max_points=500, method=method)
+
+    assert len(downsampled) <= 502
+    assert downsampled.index.is_monotonic_increasing
+    assert downsampled.index[0] == 0 and downsampled.index[-1] == 19_998
+    assert downsampled["hr"].max() == 10.0 and downsampled["hr"].min() == -10.0
+
+
+def test_downsample_short_series_unchanged():
+    df = pd.DataFrame({"hr": [1.0, 2.0, 3.0]})
+    assert downsampling.downsample(df, "hr", max_points=2000) is df
+    assert downsampling.downsample(pd.concat([df] * 1000), "hr", max_points=None).shape == (3000, 1)
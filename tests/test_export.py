@@ -0,0 +1,54 @@
+import pandas as pd
+import pytest
+
+from tempor.clinic import export, ingest
+
+pq = pytest.importorskip("pyarrow.parquet")
+
+
+@pytest.fixture
+def imported(backend, field_defs):
+    static = pd.DataFrame({"key": [f"p{i}" for i in range(5)], "age": range(30, 35), "sex": "male"})
+    temporal = pd.DataFrame(
+        {"key": [f"p{i}" for i in range(5) for _ in range(3)], "time_index": [0, 1, 2] * 5, "hr": 70.0}
+    )
+    ingest.import_samples(db=backend, field_defs=field_defs, static=static, temporal=temporal)
+
+
+def test_export_samples(backend, field_defs, imported, tmp_path):
+    result = export.export_samples(
+        db=backend, field_defs=field_defs, out_dir=str(tmp_path), page_size=2, row_group_size=4, row_groups_per_file=2
+    )
+    assert result == export.ExportResult(n_samples=5, last_key="p4")
+
+    static = pq.read_table(tmp_path / "static")
+    assert static.schema == export.get_arrow_schema(field_defs.static)
+    assert static.column("key").to_pylist() == [f"p{i}" for i in range(5)]
+    assert static.column("n_visits").to_pylist() == [3] * 5
+
+    temporal = pq.read_table(tmp_path / "temporal")
+    assert temporal.num_rows == 15
+    assert len(list((tmp_path / "temporal").glob("part-*.parquet"))) == 2
+    assert not (tmp_path / "event").exists()
+
+
+def test_export_samples_resume(backend, field_defs, imported, tmp_path):
+    export.export_samples(db=backend, field_defs=field_defs, out_dir=str(tmp_path))
+    with pytest.raises(FileExistsError):
+        export.export_samples(db=backend, field_defs=field_defs, out_dir=str(tmp_path))
+
+    static = pd.DataFrame({"key": ["p5"], "age": [50], "sex": "female"})
+    ingest.import_samples(db=backend, field_defs=field_defs, static=static)
+    result = export.export_samples(db=backend, field_defs=field_defs, out_dir=str(tmp_path), resume=True)
+    assert result == export.ExportResult(n_samples=1, last_key="p5")
+
+    temporal = pq.read_table(tmp_path / "temporal").to_pandas()
+    assert len(temporal) == 16
+    assert temporal["time_index"].dtype == "int64"
+
+
+def test_export_samples_resume_without_cursor(backend, field_defs, imported, tmp_path):
+    export.export_samples(db=backend, field_defs=field_defs, out_dir=str(tmp_path))
+    (tmp_path / export.CURSOR_FILE).unlink()
+    with pytest.raises(FileExistsError):
+        export.export_samples(db=backend, field_defs=field_defs, out_dir=str(tmp_path), resume=True)
@@ -0,0 +1,59 @@
+from unittest.mock import patch
+
+import pandas as pd
+import pytest
+
+from tempor.clinic import deta_utils, ingest
+
+
+@pytest.fixture
+def static_df():
+    return pd.DataFrame({"key": ["p1", "p2", "p3"], "age": [30, 40, 50], "sex": ["male", "female", "male"]})
+
+
+@pytest.fixture
+def temporal_df():
+    return pd.DataFrame(
+        {
+            "key": ["p1", "p1", "p2", "p1"],
+            "time_index": [2, 0, 0, 1],
+            "hr": [72.0, 70.0, 65.0, 71.0],
+            "smoker": ["no", "yes", "No", "yes"],
+        }
+    )
+
+
+def test_import_samples(backend, field_defs, static_df, temporal_df):
+    with patch.object(backend, "put_many", wraps=backend.put_many) as put_many, patch.object(
+        backend, "close", wraps=backend.close
+    ) as close:
+        n_imported = ingest.import_samples(
+            db=backend, field_defs=field_defs, static=static_df, temporal=temporal_df, batch_size=2, max_workers=2
+        )
+    assert n_imported == 3
+    assert put_many.call_count == 2
+    assert close.call_count == 1
+    assert backend._connections == []  # Including the connections of the worker threads.
+    assert deta_utils.get_all_sample_keys(backend) == ["p1", "p2", "p3"]
+
+    p1 = deta_utils.get_sample(key="p1", db=backend, field_defs=field_defs)
+    assert p1.static == {"age": 30, "sex": "male", "n_visits": 3}
+    assert [x["time_index"] for x in p1.temporal] == [0, 1, 2]
+    assert [x["smoker"] for x in p1.temporal] == [True, True, False]
+    assert [x["hr_x_age"] for x in p1.temporal] == [2100.0, 2130.0, 2160.0]
+
+    p3 = deta_utils.get_sample(key="p3", db=backend, field_defs=field_defs)
+    assert len(p3.temporal) == 1  # Default first time-step.
+
+
+def test_import_samples_validation(backend, field_defs, static_df, temporal_df):
+    with pytest.raises(ValueError, match="not one of the options"):
+        ingest.import_samples(db=backend, field_defs=field_defs, static=static_df.assign(sex="other"))
+    with pytest.raises(ValueError, match="less than the minimum"):
+        ingest.import_samples(db=backend, field_defs=field_defs, static=static_df.assign(age=-1))
+    with pytest.raises(ValueError, match="unknown boolean values"):
+        ingest.import_samples(db=backend, field_defs=field_defs, temporal=temporal_df.assign(smoker=2))
+    with pytest.raises(ValueError, match="duplicate time indexes"):
+        ingest.import_samples(db=backend, field_defs=field_defs, temporal=temporal_df.assign(time_index=0))
+    with pytest.raises(ValueError, match="not in the static table"):
+        ingest.import_samples(db=backend, field_defs=field_defs, static=static_df[1:], temporal=temporal_df)
@@ -0,0 +1,33 @@
+import datetime
+
+import pytest
+
+from tempor.clinic import keygen
+
+
+def test_sortable_key():
+    keys = [keygen.sortable_key(timestamp_ms=1_700_000_000_000) for _ in range(3)]
+    keys.append(keygen.sortable_key(timestamp_ms=1_700_000_000_001))
+    assert keys == sorted(keys) and len(set(keys)) == 4
+    assert all(len(key) == 26 for key in keys)
+    assert keygen.key_timestamp(keys[-1]) == datetime.datetime(2023, 11, 14, 22, 13, 20, 1000, datetime.timezone.utc)
+
+
+def test_new_sample_key_avoids_collisions(backend, monkeypatch):
+    backend.put({"static": {}}, key="taken")
+    candidates = iter(["taken", "free"])
+    monkeypatch.setattr(keygen, "random_key", lambda: next(candidates))
+    assert keygen.new_sample_key(backend, strategy="random") == "free"
+
+    monkeypatch.setattr(keygen, "random_key", lambda: "taken")
+    with pytest.raises(RuntimeError):
+        keygen.new_sample_key(backend, strategy="random", max_attempts=3)
+
+
+def test_iter_keys_since(backend):
+    old = keygen.sortable_key(timestamp_ms=1_600_000_000_000)
+    new = [keygen.sortable_key(timestamp_ms=1_700_000_000_000 + i) for i in range(3)]
+    for key in [old] + new:
+        backend.put({"static": {}}, key=key)
+    since = datetime.datetime.fromtimestamp(1_700_000_000, tz=datetime.timezone.utc)
+    assert list(keygen.iter_keys_since(backend, since, page_size=2)) == new
@@ -0,0 +1,53 @@
+from unittest.mock import Mock
+
+from tempor.clinic import field_def
+from tempor.clinic.const import DataSample
+
+
+def test_memoized_computation(field_defs_raw):
+    field_def.clear_memo()
+    computation = Mock(side_effect=lambda data_sample, idx: data_sample.temporal[idx]["hr"] * data_sample.static["age"])
+    field_defs_raw["temporal"]["hr_x_age"].update(
+        computation=computation, depends_on=["static.age", "temporal.hr"], item_local=True, memoize=True
+    )
+    field_defs_raw["static"]["n_visits"]["memoize"] = True  # But no `depends_on`.
+    field_defs = field_def.parse_field_defs(field_defs_raw)
+    fd = field_defs.temporal["hr_x_age"]
+    sample = DataSample(
+        static={"age": 2, "sex": "male", "n_visits": 3},
+        temporal=[{"time_index": i, "hr": 1.0, "smoker": i == 1, "hr_x_age": None} for i in range(3)],
+        event=[],
+    )
+
+    # The time-steps have the same inputs (`smoker` is not one of them), so only the first one is computed.
+    assert [fd.compute(sample, idx) for idx in range(3)] == [2.0, 2.0, 2.0]
+    assert computation.call_count == 1
+    sample.static["age"] = 3
+    assert fd.compute(sample, 0) == 3.0
+    assert computation.call_count == 2
+    # The memo is kept when the field defs are parsed again.
+    assert field_def.parse_field_defs(field_defs_raw).temporal["hr_x_age"].compute(sample, 0) == 3.0
+    assert computation.call_count == 2
+
+    field_defs.static["n_visits"].compute(sample, 0)
+    field_defs.static["n_visits"].depends_on = ["temporal"]
+    field_defs.static["n_visits"].impure = True
+    field_defs.static["n_visits"].compute(sample, 0)
+    stats = field_def.get_memo_stats()
+    # Impure computations, and computations without `depends_on`, are never cached.
+    assert (stats.hits, stats.misses, stats.size) == (3, 2, 2)
+
+
+def test_whole_modality_inputs_leave_out_computed_fields(field_defs_raw):
+    field_defs_raw["static"]["n_visits"].update(depends_on=["temporal"], memoize=True)
+    fd = field_def.parse_field_defs(field_defs_raw).static["n_visits"]
+    sample = DataSample(
+        static={"age": 2, "sex": "male", "n_visits": 3},
+        temporal=[{"time_index": 0, "hr": 1.0, "smoker": False, "hr_x_age": 2.0}],
+        event=[],
+    )
+    fingerprint = fd.fingerprint(sample, 0)
+    sample.temporal[0]["hr_x_age"] = 5.0
+    assert fd.fingerprint(sample, 0) == fingerprint
+    sample.temporal[0]["hr"] = 2.0
+    assert fd.fingerprint(sample, 0) != fingerprint
@@ -0,0 +1,123 @@
+import threading
+import time
+from unittest.mock import Mock, patch
+
+import pandas as pd
+
+from tempor.clinic import deta_utils, predictions
+from tempor.clinic.const import DataSample
+
+
+def test_predict_risk_cached(backend, field_defs):
+    predictions.PREDICTION_CACHE.clear()
+    deta_utils.add_empty_sample(db=backend, key="abc", field_defs=field_defs, current_timestep=0)
+    sample = deta_utils.get_sample(key="abc", db=backend, field_defs=field_defs)
+    callback = Mock(return_value=pd.DataFrame({"risk_prediction": [0.1, 0.2]}))
+
+    def predict(**kwargs):
+        return predictions.predict_risk(callback, sample, time_max=5, time_resolution=1, sample_key="abc", **kwargs)
+
+    predict()
+    result = predict()
+    result["risk_prediction"] = 1.0  # The cached result is not modified.
+    assert predict()["risk_prediction"].tolist() == [0.1, 0.2]
+    assert callback.call_count == 1
+
+    predict(model="other")  # Different kwargs.
+    assert callback.call_count == 2
+    sample.static["age"] += 1  # Different sample data.
+    predict()
+    assert callback.call_count == 3
+
+    deta_utils.update_sample(db=backend, key="abc", data_sample=sample, field_defs=field_defs)
+    assert len(predictions.PREDICTION_CACHE) == 0
+
+
+def test_predict_risk_keyed_on_sample_version(backend, field_defs):
+    predictions.PREDICTION_CACHE.clear()
+    deta_utils.add_empty_sample(db=backend, key="abc", field_defs=field_defs, current_timestep=0)
+    sample = deta_utils.get_sample(key="abc", db=backend, field_defs=field_defs)
+    callback = Mock(return_value=pd.DataFrame({"risk_prediction": [0.1, 0.2]}))
+
+    def predict():
+        version = deta_utils.get_sample_version_key(backend, "abc")
+        return predictions.predict_risk(
+            callback, sample, time_max=5, time_resolution=1, sample_key="abc", sample_version=version
+        )
+
+    # The sample data is not hashed.
+    with patch.object(predictions, "sample_fingerprint", side_effect=AssertionError("hashed")):
+        predict()
+        predict()
+        assert callback.call_count == 1
+        sample.static["age"] += 1
+        deta_utils.update_sample(db=backend, key="abc", data_sample=sample, field_defs=field_defs)
+        predict()
+        assert callback.call_count == 2
+
+
+def test_predict_risk_prefix_consistent():
+    predictions.PREDICTION_CACHE.clear()
+    sample = DataSample(static={"age": 1}, temporal=[], event=[])
+
+    @predictions.prefix_consistent
+    def callback(data_sample, time_max, time_resolution):
+        index = list(range(0, time_max + 1, time_resolution))
+        return pd.DataFrame({"risk_prediction": [t / 10 for t in index]}, index=index)
+
+    callback = Mock(wraps=callback, prefix_consistent=True)
+    for time_max in (3, 10, 5):
+        result = predictions.predict_risk(callback, sample, time_max=time_max, time_resolution=1, time_max_horizon=10)
+        assert result.index.tolist() == list(range(time_max + 1))
+    assert callback.call_count == 1
+    assert callback.call_args[1]["time_max"] == 10
+
+    # Beyond the horizon, the predictions go up to `time_max`.
+    result = predictions.predict_risk(callback, sample, time_max=12, time_resolution=1, time_max_horizon=10)
+    assert result.index.tolist() == list(range(13))
+
+
+def test_submit_prediction_in_background():
+    predictions.PREDICTION_CACHE.clear()
+    sample = DataSample(static={"age": 1}, temporal=[], event=[])
+    started, release = threading.Event(), threading.Event()
+
+    def callback(data_sample, time_max, time_resolution):
+        started.set()
+        release.wait(timeout=5)
+        return pd.DataFrame({"risk_prediction": [0.5]})
+
+    callback = Mock(wraps=callback)
+    first = predictions.submit_prediction(callback, sample, time_max=5, time_resolution=1)
+    second = predictions.submit_prediction(callback, sample, time_max=5, time_resolution=1)
+    started.wait(timeout=5)
+    assert not first.done()
+    first.cancel()  # The other pending prediction still waits for the call.
+    release.set()
+    assert second.result(timeout=5)["risk_prediction"].tolist() == [0.5]
+    assert callback.call_count == 1
+
+    # Cached, once the call is done.
+    deadline = time.monotonic() + 5
+    while len(predictions.PREDICTION_CACHE) == 0 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert predictions.submit_prediction(callback, sample, time_max=5, time_resolution=1).done()
+
+
+def test_callback_id():
+    class Model:
+        def __call__(self, data_sample, time_max, time_resolution):
+            pass
+
+        def predict(self, data_sample, time_max, time_resolution):
+            pass
+
+    first, second = Model(), Model()
+    assert predictions.callback_id(first) == predictions.callback_id(first)
+    assert predictions.callback_id(first) != predictions.callback_id(second)
+    assert predictions.callback_id(first.predict) != predictions.callback_id(second.predict)
+    assert predictions.callback_id(lambda: 1) != predictions.callback_id(lambda: 2)
+    assert predictions.callback_id(predictions.with_cache_key("model")(first)) == predictions.callback_id(
+        predictions.with_cache_key("model")(second)
+    )
+    assert predictions.callback_id(predictions.predict_risk) == "tempor.clinic.predictions.predict_risk"
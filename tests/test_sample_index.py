@@ -0,0 +1,42 @@
+from tempor.clinic import sample_index
+
+
+def test_sample_key_index(backend):
+    backend.put_many(
+        [
+            {"key": key, "static": {"sex": sex}, "temporal": [], "event": []}
+            for key, sex in [("abc1", "female"), ("abd2", "male"), ("xab3", "male"), ("zzz4", "female")]
+        ]
+    )
+    index = sample_index.SampleKeyIndex(backend, search_fields=["sex"])
+
+    assert index.search("ab").keys == ["abc1", "abd2"]
+    assert index.search("ab", mode="substring").keys == ["abc1", "abd2", "xab3"]
+    assert index.search("MA", field="sex").keys == ["abd2", "xab3"]
+
+    results = index.search(page=1, page_size=3)
+    assert results == sample_index.SearchResults(keys=["zzz4"], n_matches=4, page=1, n_pages=2)
+
+    index.add("aba0", static={"sex": "male"})
+    index.remove("abc1")
+    index.update("zzz4", static={"sex": "male"})
+    assert index.search("ab").keys == ["aba0", "abd2"]
+    assert index.search("ab", mode="substring").keys == ["aba0", "abd2", "xab3"]
+    assert index.search("male", field="sex").keys == ["aba0", "abd2", "xab3", "zzz4"]
+
+
+def test_sample_index_updated_on_writes(backend):
+    backend.put_many([{"key": "a1", "static": {}, "temporal": [], "event": []}])
+    index = sample_index.get_sample_index(backend)
+    assert sample_index.get_sample_index(backend) is index
+
+    sample_index.on_sample_added(backend, "b2")
+    sample_index.on_sample_deleted(backend, "a1")
+    assert index.search().keys == ["b2"]
+
+    sample_index.configure_sample_indexes(max_count=1)
+    try:
+        sample_index.get_sample_index(backend, search_fields=["sex"])
+        assert sample_index.get_sample_index(backend) is not index
+    finally:
+        sample_index.configure_sample_indexes()
@@ -0,0 +1,39 @@
+from unittest.mock import Mock, patch
+
+import pandas as pd
+
+from tempor.clinic import deta_utils, scoring, storage
+
+
+def test_score_samples_incremental(backend, field_defs, tmp_path):
+    for key in ("a", "b", "c"):
+        deta_utils.add_empty_sample(db=backend, key=key, field_defs=field_defs, current_timestep=0)
+    callback = Mock(
+        side_effect=lambda data_sample, time_max, time_resolution: pd.DataFrame(
+            {"risk_prediction": [0.0, data_sample.static["age"] / 100]}
+        )
+    )
+    score_index = scoring.ScoreIndex(storage.SQLiteBackend(path=str(tmp_path / "scores.db")))
+
+    def run():
+        return scoring.score_samples(
+            backend, field_defs, callback, score_index, time_max=5, time_resolution=1, chunk_size=2, max_workers=2
+        )
+
+    assert run() == scoring.ScoringResult(n_scored=3, n_unchanged=0, n_failed=0, n_removed=0)
+    assert callback.call_count == 3
+
+    sample = deta_utils.get_sample(key="b", db=backend, field_defs=field_defs)
+    sample.static["age"] = 90
+    deta_utils.update_sample(db=backend, key="b", data_sample=sample, field_defs=field_defs)
+    deta_utils.delete_sample(db=backend, key="c")
+    # Only the modified sample is read and scored again, without a full scan.
+    with patch.object(backend, "fetch", side_effect=AssertionError("full scan")):
+        assert run() == scoring.ScoringResult(n_scored=1, n_unchanged=1, n_failed=0, n_removed=1)
+    assert callback.call_count == 4
+    assert [(entry.key, entry.score) for entry in score_index.ranked()] == [("b", 0.9), ("a", 0.5)]
+    # Read back from the store.
+    assert len(scoring.ScoreIndex(score_index.backend).entries()) == 2
+    assert score_index.ranked_page(page=1, page_size=1) == scoring.RankedPage(
+        entries=[score_index.get("a")], n_entries=2, page=1, n_pages=2
+    )
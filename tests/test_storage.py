@@ -0,0 +1,224 @@
+import sqlite3
+import threading
+from unittest.mock import patch
+
+import pytest
+
+from tempor.clinic import delta, deta_utils, storage
+
+
+def test_sqlite_put_get_delete(backend):
+    data = {"static": {"age": 42}, "temporal": [{"time_index": 0, "hr": 80.0}], "event": []}
+
+    backend.put(data, key="abc")
+    assert backend.get("abc") == dict(data, key="abc")
+
+    backend.delete("abc")
+    assert backend.get("abc") is None
+
+
+def test_sqlite_fetch_paginates(backend):
+    for i in range(5):
+        backend.put({"static": {"i": i}}, key=f"key{i}")
+
+    first = backend.fetch(limit=2)
+    assert [x["key"] for x in first.items] == ["key0", "key1"]
+    assert first.last == "key1"
+
+    second = backend.fetch(limit=2, last=first.last)
+    third = backend.fetch(limit=2, last=second.last)
+    assert [x["key"] for x in second.items] == ["key2", "key3"]
+    assert [x["key"] for x in third.items] == ["key4"]
+    assert third.last is None
+
+
+def test_sqlite_connection_per_thread(backend):
+    backend.put({"static": {}}, key="abc")
+    connections = [backend._connection()]
+
+    def worker():
+        connections.append(backend._connection())
+        assert backend.get("abc") is not None
+
+    thread = threading.Thread(target=worker)
+    thread.start()
+    thread.join()
+
+    assert len(connections) == 2
+    assert connections[0] is not connections[1]
+    assert backend._connection() is connections[0]
+
+    # All the connections are closed, including the one of the finished thread, and reopened on next use.
+    backend.close()
+    for conn in connections:
+        with pytest.raises(sqlite3.ProgrammingError):
+            conn.execute("SELECT 1")
+    assert backend.get("abc") is not None
+
+
+def test_sqlite_fetch_keys_paginates(backend):
+    for i in range(5):
+        backend.put({"static": {"i": i}}, key=f"key{i}")
+
+    page = backend.fetch_keys(limit=3)
+    assert page.keys == ["key0", "key1", "key2"]
+    assert page.last == "key2"
+
+    page = backend.fetch_keys(limit=3, last=page.last)
+    assert page.keys == ["key3", "key4"]
+    assert page.last is None
+
+
+def test_iter_sample_keys_follows_cursor(backend):
+    for i in range(7):
+        backend.put({"static": {}}, key=f"key{i}")
+
+    assert list(deta_utils.iter_sample_keys(backend, page_size=2)) == [f"key{i}" for i in range(7)]
+    assert deta_utils.get_all_sample_keys(backend, page_size=3) == [f"key{i}" for i in range(7)]
+
+
+def test_sqlite_update(backend):
+    backend.put({"static": {"age": 50}, "temporal": [{"time_index": 0, "hr": 70.0}], "event": []}, key="abc")
+    new = {
+        "static": {"age": 51},
+        "temporal": [{"time_index": 0, "hr": 80.0}] + [{"time_index": i, "hr": 70.0} for i in range(1, 100)],
+        "event": [],
+    }
+    changes = [
+        delta.SetValue(path=("static", "age"), value=51),
+        delta.SetValue(path=("temporal", 0, "hr"), value=80.0),
+        delta.AppendItems(modality="temporal", items=new["temporal"][1:]),  # Spans several statements.
+    ]
+
+    backend.update("abc", changes=changes, data=new)
+    assert backend.get("abc") == dict(new, key="abc")
+
+    backend.update("abc", changes=[delta.ReplaceModality(modality="temporal", items=[])], data=new)
+    assert backend.get("abc")["temporal"] == []
+
+
+def test_sqlite_update_applies_changes_in_order(backend):
+    temporal = [{"time_index": t, "hr": 70.0} for t in range(3)]
+    backend.put({"static": {"age": 50}, "temporal": temporal, "event": []}, key="abc")
+    changes = [
+        delta.ReplaceModality(modality="temporal", items=[dict(temporal[0], hr=80.0)]),
+        delta.AppendItems(modality="temporal", items=[{"time_index": 5, "hr": 75.0}]),
+        delta.SetValue(path=("temporal", 1, "hr"), value=76.0),
+        delta.AppendItems(modality="temporal", items=[{"time_index": 6, "hr": 77.0}]),
+    ]
+    # The appends go after the items of the replaced list, not after the three items stored before.
+    backend.update("abc", changes=changes, data=dict())
+    assert backend.get("abc")["temporal"] == [
+        {"time_index": 0, "hr": 80.0},
+        {"time_index": 5, "hr": 76.0},
+        {"time_index": 6, "hr": 77.0},
+    ]
+
+
+def test_sqlite_get_projected(backend):
+    item = {
+        "static": {"age": 50, "sex": "male"},
+        "temporal": [{"time_index": t, "hr": 70.0 + t} for t in range(5)],
+        "event": [],
+    }
+    backend.put(item, key="a")
+    projection = storage.Projection(modalities=("static", "temporal"), fields={"static": ["age"]}, time_range=(1, 3))
+
+    expected = {"key": "a", "static": {"age": 50}, "temporal": item["temporal"][1:4]}
+    assert backend.get_projected("a", projection) == expected
+    # Backends without `get_projected` fall back to slicing the whole item.
+    assert storage.apply_projection(backend.get("a"), projection) == expected
+    assert backend.get_projected("missing", projection) is None
+
+
+def test_get_sample_projected(backend, field_defs):
+    deta_utils.add_empty_sample(db=backend, key="a", field_defs=field_defs, current_timestep=0)
+    data_sample = deta_utils.get_sample(key="a", db=backend, field_defs=field_defs, use_cache=False)
+    data_sample.temporal = [dict(data_sample.temporal[0], time_index=t) for t in range(5)]
+    deta_utils.update_sample(db=backend, key="a", data_sample=data_sample, field_defs=field_defs)
+
+    for use_cache in (False, True):
+        projected = deta_utils.get_sample(
+            key="a",
+            db=backend,
+            field_defs=field_defs,
+            use_cache=use_cache,
+            modalities=("temporal",),
+            fields={"temporal": ["time_index", "hr"]},
+            time_range=(2, 3),
+        )
+        assert projected.static == {} and projected.event == []
+        assert projected.temporal == [{"time_index": t, "hr": 70.0} for t in (2, 3)]
+        # Cache the full sample for the second round.
+        deta_utils.get_sample(key="a", db=backend, field_defs=field_defs)
+
+
+def test_get_sample_projected_without_backend_support(backend, field_defs):
+    class PlainBackend:  # A backend that can only read whole items.
+        namespace = "plain"
+
+        def get(self, key):
+            return backend.get(key)
+
+    deta_utils.add_empty_sample(db=backend, key="a", field_defs=field_defs, current_timestep=0)
+    deta_utils.SAMPLE_CACHE.clear()
+    projected = deta_utils.get_sample(key="a", db=PlainBackend(), field_defs=field_defs, modalities=("static",))
+    assert projected.temporal == [] and projected.static
+    # The whole sample was cached.
+    assert deta_utils.get_sample(key="a", db=PlainBackend(), field_defs=field_defs).temporal
+    assert len(deta_utils.SAMPLE_CACHE) == 1
+
+
+@pytest.fixture
+def chunked(tmp_path):
+    main = storage.SQLiteBackend(path=str(tmp_path / "chunked.db"))
+    chunks = storage.SQLiteBackend(path=str(tmp_path / "chunked.db"), table="chunks")
+    yield storage.ChunkedBackend(main, chunks_backend=chunks, chunk_size=3)
+    main.close()
+    chunks.close()
+
+
+def test_chunked_put_get_and_projection(chunked):
+    item = {"static": {"age": 50}, "temporal": [{"time_index": t, "hr": 70.0} for t in range(7)], "event": []}
+    chunked.put(item, key="a")
+
+    assert chunked.get("a") == dict(item, key="a")
+    assert [entry["n"] for entry in chunked.backend.get("a")["chunks"]["temporal"]] == [3, 3, 1]
+
+    with patch.object(chunked.chunks_backend, "get", wraps=chunked.chunks_backend.get) as get_chunk:
+        projected = chunked.get_projected("a", storage.Projection(modalities=("temporal",), time_range=(4, 5)))
+    assert projected["temporal"] == item["temporal"][4:6]
+    assert get_chunk.call_count == 1
+
+    chunked.put(dict(item, temporal=item["temporal"][:2]), key="a")
+    assert chunked.chunks_backend.fetch_keys().keys == ["a.temporal.000000"]
+    chunked.delete("a")
+    assert chunked.get("a") is None and chunked.chunks_backend.fetch_keys().keys == []
+
+
+def test_chunked_update_appends_to_last_chunk(chunked):
+    old = {"static": {"age": 50}, "temporal": [{"time_index": t, "hr": 70.0} for t in range(4)], "event": []}
+    chunked.put(old, key="a")
+    new = {
+        "static": {"age": 51},
+        "temporal": [dict(x, hr=80.0) if x["time_index"] == 1 else x for x in old["temporal"]]
+        + [{"time_index": t, "hr": 70.0} for t in range(4, 9)],
+        "event": [],
+    }
+
+    with patch.object(chunked.chunks_backend, "put_many", wraps=chunked.chunks_backend.put_many) as put_many:
+        chunked.update("a", delta.diff_records(old, new), data=new)
+    written = [chunk["key"] for call in put_many.call_args_list for chunk in call.args[0]]
+    assert sorted(written) == ["a.temporal.000000", "a.temporal.000001", "a.temporal.000002"]
+    assert chunked.get("a") == dict(new, key="a")
+
+
+def test_deta_namespace_is_stable():
+    from deta import _Base as DetaBase
+
+    def make_base():
+        base = DetaBase.__new__(DetaBase)
+        base.base_path = "/v1/project/samples"
+        return base
+
+    assert storage.DetaBackend(make_base()).namespace == storage.DetaBackend(make_base()).namespace
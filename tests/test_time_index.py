@@ -0,0 +1,52 @@
+import pytest
+
+from tempor.clinic import time_index
+from tempor.clinic.const import DataSample
+
+
+def _sample(time_indexes):
+    return DataSample(static={}, temporal=[{"time_index": t, "hr": float(t)} for t in time_indexes], event=[])
+
+
+def test_sorted_time_index():
+    index = time_index.SortedTimeIndex([5, 1, 3])
+    assert index.to_list() == [1, 3, 5]
+    assert 3 in index and 4 not in index
+    assert index.max() == 5
+    assert index.position(5) == 2
+    assert index.insert(4) == 2
+    assert index.move(0, 10) == 3
+    assert index.to_list() == [3, 4, 5, 10]
+    assert index.window(1, 3) == [4, 5]
+    with pytest.raises(ValueError):
+        index.insert(4)
+    with pytest.raises(ValueError):
+        index.position(1)
+
+
+def test_sorted_time_index_search():
+    index = time_index.SortedTimeIndex([10, 20, 30])
+    assert [index.search(t) for t in (0, 10, 15, 30, 99)] == [0, 0, 1, 2, 2]
+
+
+def test_timestep_operations_keep_time_order():
+    data_sample = _sample([1, 2, 3])
+    index = time_index.get_time_index(data_sample)
+    assert time_index.get_time_index(data_sample) is index
+
+    assert time_index.insert_timestep(data_sample, {"time_index": 0, "hr": 0.0}) == 0
+    assert time_index.move_timestep(data_sample, 1, {"time_index": 7, "hr": 1.0}) == 3
+    time_index.delete_timestep(data_sample, 0)
+
+    assert [x["time_index"] for x in data_sample.temporal] == [2, 3, 7]
+    assert time_index.get_time_index(data_sample) is index
+    assert index.to_list() == [2, 3, 7]
+
+    # Rebuilt if the temporal data was replaced.
+    data_sample.temporal = [{"time_index": 9, "hr": 9.0}]
+    assert time_index.get_time_index(data_sample).to_list() == [9]
+
+    # Unsorted time-steps are sorted with the index.
+    data_sample.temporal = [{"time_index": 5, "hr": 5.0}, {"time_index": 1, "hr": 1.0}]
+    assert time_index.get_time_index(data_sample).to_list() == [1, 5]
+    assert [x["time_index"] for x in data_sample.temporal] == [1, 5]
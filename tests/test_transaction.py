@@ -0,0 +1,50 @@
+from unittest.mock import patch
+
+import pytest
+
+from tempor.clinic import delta, deta_utils
+from tempor.clinic.transaction import SampleTransaction
+
+
+@pytest.fixture
+def sample(backend, field_defs):
+    deta_utils.add_empty_sample(db=backend, key="abc", field_defs=field_defs, current_timestep=0)
+    return deta_utils.get_sample(key="abc", db=backend, field_defs=field_defs)
+
+
+def test_commit_writes_once_and_recomputes_static(backend, field_defs, sample):
+    with patch.object(backend, "update", wraps=backend.update) as update:
+        with SampleTransaction(
+            db=backend, key="abc", data_sample=sample, field_defs=field_defs, current_timestep=0
+        ) as transaction:
+            sample.temporal.append(dict(sample.temporal[0], time_index=1))
+            transaction.mark_modified("temporal")
+        assert update.call_count == 1
+        assert update.call_args[1]["changes"] == [
+            delta.SetValue(path=("static", "n_visits"), value=2),
+            delta.AppendItems(modality="temporal", items=[sample.temporal[1]]),
+        ]
+
+    assert deta_utils.get_sample(key="abc", db=backend, field_defs=field_defs).static["n_visits"] == 2
+
+
+def test_unmodified_or_rolled_back_skips_write(backend, field_defs, sample):
+    with patch.object(backend, "update", wraps=backend.update) as update:
+        with SampleTransaction(db=backend, key="abc", data_sample=sample, field_defs=field_defs, current_timestep=0):
+            pass
+        with SampleTransaction(
+            db=backend, key="abc", data_sample=sample, field_defs=field_defs, current_timestep=0
+        ) as transaction:
+            transaction.mark_modified("static")  # Marked, but the values are unchanged.
+        with SampleTransaction(
+            db=backend, key="abc", data_sample=sample, field_defs=field_defs, current_timestep=0
+        ) as transaction:
+            transaction.mark_modified("static")
+            transaction.rollback()
+        with pytest.raises(ValueError):
+            with SampleTransaction(
+                db=backend, key="abc", data_sample=sample, field_defs=field_defs, current_timestep=0
+            ) as transaction:
+                transaction.mark_modified("static")
+                raise ValueError
+        assert update.call_count == 0
@@ -0,0 +1,64 @@
+import os
+
+import pandas as pd
+import pytest
+
+from tempor.clinic import workers
+from tempor.clinic.const import DataSample
+
+
+def load_model():
+    def model(data_sample, time_max, time_resolution):
+        if data_sample.static.get("crash"):
+            os._exit(1)
+        hr = [x["hr"] for x in data_sample.temporal]
+        return pd.DataFrame({"risk_prediction": [sum(hr) / 1000], "pid": [os.getpid()]})
+
+    return model
+
+
+def test_shared_memory_round_trip(field_defs):
+    sample = DataSample(
+        static={"age": 2},
+        temporal=[{"time_index": i, "hr": 70.0 + i, "smoker": i == 1, "hr_x_age": 1.0} for i in range(3)],
+        event=[],
+    )
+    shared, shm = workers.to_shared_memory(sample, field_defs=field_defs)
+    try:
+        assert [column.name for column in shared.columns] == ["time_index", "hr", "smoker", "hr_x_age"]
+        assert workers.from_shared_memory(shared) == sample
+    finally:
+        shm.close()
+        shm.unlink()
+
+    # Missing values are kept as `None`.
+    sample.temporal[1]["hr"] = None
+    shared, shm = workers.to_shared_memory(sample, field_defs=field_defs)
+    try:
+        assert list(shared.object_columns) == ["hr"]
+        assert workers.from_shared_memory(shared) == sample
+    finally:
+        shm.close()
+        shm.unlink()
+
+
+@pytest.mark.slow
+def test_model_worker_pool(field_defs):
+    pool = workers.ModelWorkerPool(load_model, n_workers=1, field_defs=field_defs, health_check_interval=None)
+    try:
+        sample = DataSample(
+            static={"age": 2},
+            temporal=[{"time_index": i, "hr": 100.0, "smoker": False, "hr_x_age": 1.0} for i in range(3)],
+            event=[],
+        )
+        result = pool(sample, time_max=5, time_resolution=1)
+        assert result["risk_prediction"][0] == 0.3
+        pid = result["pid"][0]
+
+        with pytest.raises(RuntimeError, match="crashed"):
+            pool(DataSample(static={"crash": True}, temporal=[], event=[]), time_max=5, time_resolution=1)
+        # The crashed worker was restarted.
+        assert pool.check_health() == 0
+        assert pool(sample, time_max=5, time_resolution=1)["pid"][0] != pid
+    finally:
+        pool.close()